@@ -0,0 +1,253 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import CATALOG_FILE
+
+# Central SQLite catalog of instances and versions.
+# Instances are keyed by (root, name) where root is the game's INSTANCES_DIR, versions by
+# (root, name) where root is the game's VERSIONS_DIR. The per-instance instance_info.json
+# files are still written as an export and are used to rebuild the catalog if it is lost.
+
+INSTANCE_COLUMNS = ("version", "last_played", "last_played_ts", "size", "created")
+
+_conn = None
+_lock = threading.RLock()
+
+
+def connect():
+    """Return the shared connection, creating the database on first use."""
+    global _conn
+    with _lock:
+        if _conn is None:
+            os.makedirs(os.path.dirname(CATALOG_FILE), exist_ok=True)
+            conn = sqlite3.connect(CATALOG_FILE, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS instances (
+                        root TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        version TEXT NOT NULL DEFAULT '',
+                        last_played TEXT NOT NULL DEFAULT '',
+                        last_played_ts REAL,
+                        size INTEGER,
+                        created REAL,
+                        extra TEXT NOT NULL DEFAULT '{}',
+                        PRIMARY KEY (root, name)
+                    );
+                    CREATE INDEX IF NOT EXISTS instances_by_version ON instances (root, version);
+                    CREATE TABLE IF NOT EXISTS versions (
+                        root TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        size INTEGER,
+                        created REAL,
+                        tier TEXT NOT NULL DEFAULT 'hot',
+                        PRIMARY KEY (root, name)
+                    );
+                """)
+                columns = {row["name"] for row in conn.execute("PRAGMA table_info(instances)")}
+                if "last_played_ts" not in columns:
+                    conn.execute("ALTER TABLE instances ADD COLUMN last_played_ts REAL")
+                columns = {row["name"] for row in conn.execute("PRAGMA table_info(versions)")}
+                if "tier" not in columns:
+                    conn.execute("ALTER TABLE versions ADD COLUMN tier TEXT NOT NULL DEFAULT 'hot'")
+            _conn = conn
+        return _conn
+
+
+def _row_to_info(row):
+    info = json.loads(row["extra"])
+    info.update({
+        "instance": row["name"],
+        "version": row["version"],
+        "last_played": row["last_played"],
+        "last_played_ts": row["last_played_ts"],
+        "size": row["size"],
+        "created": row["created"],
+    })
+    return info
+
+
+def _info_to_params(root, name, info):
+    extra = {k: v for k, v in info.items() if k not in INSTANCE_COLUMNS and k != "instance"}
+    return (root, name, info.get("version") or "", info.get("last_played") or "", info.get("last_played_ts"),
+            info.get("size"), info.get("created") or time.time(), json.dumps(extra))
+
+
+_UPSERT_INSTANCE = """
+    INSERT INTO instances (root, name, version, last_played, last_played_ts, size, created, extra)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (root, name) DO UPDATE SET
+        version = excluded.version,
+        last_played = excluded.last_played,
+        last_played_ts = excluded.last_played_ts,
+        size = COALESCE(excluded.size, instances.size),
+        created = COALESCE(instances.created, excluded.created),
+        extra = excluded.extra
+"""
+
+
+def get_instance(root, name):
+    """Return the catalog info dict for an instance, or None if it is not catalogued."""
+    with _lock:
+        row = connect().execute("SELECT * FROM instances WHERE root = ? AND name = ?", (root, name)).fetchone()
+    return _row_to_info(row) if row else None
+
+
+def put_instance(root, name, info, export=None):
+    """
+    Insert or update an instance. export, if given, is called inside the transaction
+    (used to write instance_info.json) so a failed export rolls the catalog back.
+    """
+    with _lock:
+        conn = connect()
+        with conn:
+            conn.execute(_UPSERT_INSTANCE, _info_to_params(root, name, info))
+            if export:
+                export()
+
+
+def put_instances(root, infos):
+    """Insert or update several {name: info} instances in one transaction."""
+    with _lock:
+        conn = connect()
+        with conn:
+            conn.executemany(_UPSERT_INSTANCE, [_info_to_params(root, name, info) for name, info in infos.items()])
+
+
+def delete_instance(root, name):
+    with _lock:
+        conn = connect()
+        with conn:
+            conn.execute("DELETE FROM instances WHERE root = ? AND name = ?", (root, name))
+
+
+def delete_instances(root, names):
+    with _lock:
+        conn = connect()
+        with conn:
+            conn.executemany("DELETE FROM instances WHERE root = ? AND name = ?", [(root, name) for name in names])
+
+
+def rename_instance(root, old_name, new_name):
+    with _lock:
+        conn = connect()
+        with conn:
+            conn.execute("DELETE FROM instances WHERE root = ? AND name = ?", (root, new_name))
+            conn.execute("UPDATE instances SET name = ? WHERE root = ? AND name = ?", (new_name, root, old_name))
+
+
+def list_instances(root):
+    """Return the info dicts of every catalogued instance under root, ordered by name."""
+    with _lock:
+        rows = connect().execute("SELECT * FROM instances WHERE root = ? ORDER BY name", (root,)).fetchall()
+    return [_row_to_info(row) for row in rows]
+
+
+def instance_names(root):
+    with _lock:
+        rows = connect().execute("SELECT name FROM instances WHERE root = ? ORDER BY name", (root,)).fetchall()
+    return [row["name"] for row in rows]
+
+
+def instances_for_version(root, version):
+    """Return the names of the instances under root built from version (uses the version index)."""
+    with _lock:
+        rows = connect().execute("SELECT name FROM instances WHERE root = ? AND version = ? ORDER BY name",
+                                 (root, version)).fetchall()
+    return [row["name"] for row in rows]
+
+
+def retarget_instances(root, old_version, new_version, export=None):
+    """
+    Point every instance of old_version at new_version in one transaction and return their names.
+    export, if given, is called as export(names) inside the transaction.
+    """
+    with _lock:
+        conn = connect()
+        with conn:
+            rows = conn.execute("SELECT name FROM instances WHERE root = ? AND version = ?",
+                                (root, old_version)).fetchall()
+            names = [row["name"] for row in rows]
+            conn.execute("UPDATE instances SET version = ? WHERE root = ? AND version = ?",
+                         (new_version, root, old_version))
+            if export:
+                export(names)
+    return names
+
+
+def list_versions(root):
+    with _lock:
+        rows = connect().execute("SELECT name FROM versions WHERE root = ? ORDER BY name", (root,)).fetchall()
+    return [row["name"] for row in rows]
+
+
+def put_version(root, name, size=None, created=None):
+    with _lock:
+        conn = connect()
+        with conn:
+            conn.execute("""
+                INSERT INTO versions (root, name, size, created) VALUES (?, ?, ?, ?)
+                ON CONFLICT (root, name) DO UPDATE SET size = COALESCE(excluded.size, versions.size)
+            """, (root, name, size, created or time.time()))
+
+
+def delete_version(root, name):
+    with _lock:
+        conn = connect()
+        with conn:
+            conn.execute("DELETE FROM versions WHERE root = ? AND name = ?", (root, name))
+
+
+def rename_version(root, old_name, new_name):
+    with _lock:
+        conn = connect()
+        with conn:
+            conn.execute("DELETE FROM versions WHERE root = ? AND name = ?", (root, new_name))
+            conn.execute("UPDATE versions SET name = ? WHERE root = ? AND name = ?", (new_name, root, old_name))
+
+
+def get_version_tier(root, name):
+    """Return "hot", or "cold" for a version moved to cold storage by the tiering policy."""
+    with _lock:
+        row = connect().execute("SELECT tier FROM versions WHERE root = ? AND name = ?", (root, name)).fetchone()
+    return row["tier"] if row else "hot"
+
+
+def set_version_tier(root, name, tier):
+    with _lock:
+        conn = connect()
+        with conn:
+            conn.execute("UPDATE versions SET tier = ? WHERE root = ? AND name = ?", (tier, root, name))
+
+
+def version_usage(versions_root, instances_root):
+    """
+    Return a dict per version under versions_root with its tier, created time and last_used:
+    the latest last played (or created) time of the instances under instances_root built from it.
+    """
+    with _lock:
+        rows = connect().execute("""
+            SELECT v.name, v.tier, v.created, MAX(COALESCE(i.last_played_ts, i.created)) AS last_used
+            FROM versions v LEFT JOIN instances i ON i.root = ? AND i.version = v.name
+            WHERE v.root = ?
+            GROUP BY v.name
+        """, (instances_root, versions_root)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def sync_versions(root, names):
+    """Make the catalogued versions under root match names (the folders on disk)."""
+    known = set(list_versions(root))
+    with _lock:
+        conn = connect()
+        with conn:
+            conn.executemany("INSERT INTO versions (root, name, created) VALUES (?, ?, ?)",
+                             [(root, name, time.time()) for name in names if name not in known])
+            conn.executemany("DELETE FROM versions WHERE root = ? AND name = ?",
+                             [(root, name) for name in known if name not in names])
@@ -0,0 +1,301 @@
+import argparse
+import contextlib
+import json
+import sys
+import threading
+
+from config import LOCAL_VERSION, LOCAL_INSTANCE, games
+import catalog
+from instance_info import list_instance_infos
+from trash import purge, reap_due, UNDO_SECONDS
+from file_store import collect_garbage
+from prefetch import load_profile, summarize
+from supervisor import Supervisor, LaunchQueue
+from launch_profile import parse_cpus, empty_profile
+from operations import ensure_game_folders, sync_catalog, create_instance, clone_instance, trash_instance, \
+    rename_instance, launch_instance, prefetch_profile_path, verify_instance, get_instance_path, get_version_source, \
+    get_version_options, load_version_files, rehydrate_version, instance_name_error, record_session, instance_stats, \
+    run_batch, BATCH_WORKERS, get_launch_profile, set_launch_profile, launch_cap, resync_instance
+
+# Command line access to the launcher's instance and version operations, without the window:
+#   python -m cli [--game NAME] [--jobs N] <command> ...
+# (run from the Code folder). Results are printed to stdout as JSON; the usual [INFO] log lines
+# go to stderr. Commands that take several names run them concurrently, and the exit code is 1
+# if any of them failed.
+
+
+def find_game(name):
+    """Return (name, game) for a game name, case-insensitively; the first game when name is None."""
+    if name is None:
+        return next(iter(games.items()))
+    for game_name, game in games.items():
+        if game_name.lower() == name.lower():
+            return game_name, game
+    raise SystemExit(f"Unknown game '{name}'. Choose from: {', '.join(games)}")
+
+
+def batch(names, func, jobs):
+    """Run func(name) for every name concurrently; return one result dict per name, in order."""
+    results = []
+    for name, result, error in run_batch(names, lambda name, progress, cancel_event: func(name), workers=jobs):
+        entry = {"instance": name, "ok": error is None}
+        if error is None:
+            entry.update(result or {})
+        else:
+            entry["error"] = str(error)
+        results.append(entry)
+    return results
+
+
+def optional_int(text):
+    """argparse type for options where an empty value unsets the setting."""
+    return "" if text == "" else int(text)
+
+
+def summarize_verify(report):
+    return {"version": report["version"], "clean": not (report["missing"] or report["modified"]),
+            "ok_files": report["ok"], "missing": report["missing"], "modified": report["modified"],
+            "added": report["added"]}
+
+
+def cmd_list(args, game):
+    if args.versions:
+        return [{"version": version, "tier": catalog.get_version_tier(game["VERSIONS_DIR"], version)
+                 if version != LOCAL_VERSION else "hot"} for version in get_version_options(game)]
+    return [info for info in list_instance_infos(game["INSTANCES_DIR"]) if info.get("instance") != LOCAL_INSTANCE]
+
+
+def cmd_create(args, game):
+    version = args.version
+    if version != LOCAL_VERSION:
+        source = get_version_source(version, game)
+        if not source:
+            raise SystemExit(f"Version '{version}' not found.")
+        # Hash the version once up front instead of in every concurrent create.
+        load_version_files(game, version, source)
+
+    def create(name):
+        error = instance_name_error(game, name)
+        if error:
+            raise ValueError(error)
+        result = create_instance(name, version, game, force_copy=True)
+        if result != get_instance_path(name, game):
+            raise RuntimeError(result)
+        return {"path": result, "version": version}
+
+    results = batch(args.names, create, args.jobs)
+    if version != LOCAL_VERSION and catalog.get_version_tier(game["VERSIONS_DIR"], version) == "cold":
+        rehydrate_version(version, game)
+    return results
+
+
+def cmd_clone(args, game):
+    def clone(name):
+        error = instance_name_error(game, name)
+        if error:
+            raise ValueError(error)
+        stats = clone_instance(args.source, name, game)
+        return {"path": get_instance_path(name, game), "bytes": stats["bytes"], "seconds": stats["seconds"]}
+
+    return batch(args.names, clone, args.jobs)
+
+
+def cmd_delete(args, game):
+    def delete(name):
+        if name == LOCAL_INSTANCE:
+            raise ValueError("Cannot delete the Global Instance.")
+        entry = trash_instance(get_instance_path(name, game), game)
+        if args.purge:
+            purge(game["TRASH_DIR"], entry)
+        return {"purged": args.purge}
+
+    return batch(args.names, delete, args.jobs)
+
+
+def cmd_rename(args, game):
+    if args.old == LOCAL_INSTANCE:
+        raise SystemExit("Cannot rename the Global Instance.")
+    error = instance_name_error(game, args.new)
+    if error:
+        raise SystemExit(error)
+    return {"instance": args.new, "ok": True, "path": rename_instance(args.old, args.new, game)}
+
+
+def cmd_launch(args, game):
+    # Launches above an instance's running limit wait here until enough of the games started by
+    # this command have exited.
+    supervisor = Supervisor(on_exit=lambda session: record_session(session.instance_name, game, session.summary()))
+    launches = LaunchQueue(supervisor)
+    results = {}
+    sessions = {}
+    startups = []
+
+    def launcher(name):
+        def launch():
+            try:
+                process, startup = launch_instance(name, game, prefetch=not args.no_prefetch,
+                                                   warm=False if args.cold else None)
+            except Exception as e:
+                results[name] = {"instance": name, "ok": False, "error": str(e)}
+                return
+            sessions[name] = supervisor.watch(process, name, game)
+            results[name] = {"instance": name, "ok": True, "pid": process.pid}
+            if startup:
+                # Stay until the game has started so the prefetch profile and startup time get recorded.
+                thread = threading.Thread(target=lambda: results[name].update(run=startup()))
+                thread.start()
+                startups.append(thread)
+        return launch
+
+    for name in args.names:
+        launches.request(name, launch_cap(name, game), launcher(name))
+    while launches.pending():
+        # Re-check the caps now and then even without an exit event, so a missed one can't hang the queue.
+        supervisor.wait(timeout=supervisor.interval)
+        launches.dispatch()
+    for thread in startups:
+        thread.join()
+    if args.wait:
+        for session in sessions.values():
+            session.done.wait()
+    for name, result in results.items():
+        run = result.pop("run", None)
+        if run:
+            result["ready_seconds"] = run["ready"]
+            result["prefetched"] = run["prefetched"]
+            result["cached"] = run.get("cached")
+            result["startup"] = summarize(load_profile(prefetch_profile_path(name, game)))
+        if args.wait and name in sessions:
+            result["session"] = sessions[name].summary()
+    return [results[name] for name in args.names if name in results]
+
+
+def cmd_profile(args, game):
+    profile = get_launch_profile(args.name, game)
+    if args.clear:
+        profile = empty_profile()
+    if args.nice is not None:
+        profile["nice"] = None if args.nice == "" else args.nice
+    if args.cpus is not None:
+        try:
+            profile["cpus"] = parse_cpus(args.cpus)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    if args.max_running is not None:
+        profile["max_running"] = None if args.max_running == "" else args.max_running
+    if args.clear or args.nice is not None or args.cpus is not None or args.max_running is not None:
+        try:
+            set_launch_profile(args.name, game, profile)
+        except (OSError, ValueError) as e:
+            raise SystemExit(str(e))
+    return {"instance": args.name, "ok": True, "launch_profile": profile}
+
+
+def cmd_stats(args, game):
+    return instance_stats(game)
+
+
+def cmd_verify(args, game):
+    return batch(args.names, lambda name: summarize_verify(verify_instance(get_instance_path(name, game), game)),
+                 args.jobs)
+
+
+def cmd_sync(args, game):
+    def sync(name):
+        if name == LOCAL_INSTANCE:
+            raise ValueError("The Global Instance is the Steam installation itself.")
+        return resync_instance(get_instance_path(name, game), game, prune=args.prune)
+
+    return batch(args.names, sync, args.jobs)
+
+
+def cmd_gc(args, game):
+    return {"ok": True, "freed_bytes": collect_garbage()}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Manage CMLauncher instances without the window.")
+    parser.add_argument("--game", help=f"game to work on (default: {next(iter(games))})")
+    parser.add_argument("--jobs", type=int, default=BATCH_WORKERS, help="operations to run at once")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="list instances (or versions) as JSON")
+    list_parser.add_argument("--versions", action="store_true")
+    list_parser.set_defaults(func=cmd_list)
+
+    create_parser = commands.add_parser("create", help="create instances from a version")
+    create_parser.add_argument("names", nargs="+")
+    create_parser.add_argument("--version", default=LOCAL_VERSION)
+    create_parser.set_defaults(func=cmd_create)
+
+    clone_parser = commands.add_parser("clone", help="clone an instance under new names")
+    clone_parser.add_argument("source")
+    clone_parser.add_argument("names", nargs="+")
+    clone_parser.set_defaults(func=cmd_clone)
+
+    delete_parser = commands.add_parser(
+        "delete", help="move instances to the trash",
+        description=f"Move instances to the trash. Once the {UNDO_SECONDS}s undo window is over they are deleted "
+                    f"for good by the next command run, or by the launcher if it is open.")
+    delete_parser.add_argument("names", nargs="+")
+    delete_parser.add_argument("--purge", action="store_true", help="delete at once instead of after the undo window")
+    delete_parser.set_defaults(func=cmd_delete)
+
+    rename_parser = commands.add_parser("rename", help="rename an instance")
+    rename_parser.add_argument("old")
+    rename_parser.add_argument("new")
+    rename_parser.set_defaults(func=cmd_rename)
+
+    launch_parser = commands.add_parser("launch", help="launch instances, queueing any above their running limit")
+    launch_parser.add_argument("names", nargs="+")
+    launch_parser.add_argument("--no-prefetch", action="store_true", help="don't warm or record the startup files")
+    launch_parser.add_argument("--cold", action="store_true",
+                               help="don't warm the startup files, to measure the startup time without prefetch")
+    launch_parser.add_argument("--wait", action="store_true",
+                               help="wait for the games to exit and record their playtime and resource use")
+    launch_parser.set_defaults(func=cmd_launch)
+
+    profile_parser = commands.add_parser("profile", help="show or change an instance's launch profile")
+    profile_parser.add_argument("name")
+    profile_parser.add_argument("--nice", type=optional_int, help="niceness, -20 (highest priority) to 19; empty to unset")
+    profile_parser.add_argument("--cpus", help="CPUs to pin the game to, e.g. 0-3,6; empty to unset")
+    profile_parser.add_argument("--max-running", type=optional_int, help="only start while fewer games run; empty to unset")
+    profile_parser.add_argument("--clear", action="store_true", help="reset the profile before applying the options")
+    profile_parser.set_defaults(func=cmd_profile)
+
+    stats_parser = commands.add_parser("stats", help="playtime and last session stats of every instance")
+    stats_parser.set_defaults(func=cmd_stats)
+
+    verify_parser = commands.add_parser("verify", help="check instances against their versions")
+    verify_parser.add_argument("names", nargs="+")
+    verify_parser.set_defaults(func=cmd_verify)
+
+    sync_parser = commands.add_parser("sync", help="copy the files that changed in the instances' versions")
+    sync_parser.add_argument("names", nargs="+")
+    sync_parser.add_argument("--prune", action="store_true",
+                             help="also delete files an earlier sync installed that the version no longer ships")
+    sync_parser.set_defaults(func=cmd_sync)
+
+    gc_parser = commands.add_parser("gc", help="remove file store files no version or instance uses anymore")
+    gc_parser.set_defaults(func=cmd_gc)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    _, game = find_game(args.game)
+    out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        ensure_game_folders(game)
+        # There is no background reaper here: reclaim what earlier deletes left past their undo window.
+        reap_due(game["TRASH_DIR"])
+        sync_catalog(game)
+        result = args.func(args, game)
+    json.dump(result, out, indent=2, default=str)
+    out.write("\n")
+    failed = [entry for entry in result if not entry.get("ok", True)] if isinstance(result, list) else []
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,48 @@ import os
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 INSTALL_PATHS_FILE = os.path.join(BASE_DIR, "install_paths.json")
+CATALOG_FILE = os.path.join(BASE_DIR, "launcher.db")
+# Last known instance rows and install path of every game, painted at startup before the disk is checked.
+SNAPSHOT_FILE = os.path.join(BASE_DIR, "snapshot.json")
+
+# Content-addressed file store shared by all versions and instances (see file_store.py).
+STORE_DIR = os.path.join(BASE_DIR, "Store")
+
+# How instances and clones are built:
+#   "reflink" - copy-on-write clone every file where the volume supports it (btrfs, XFS), else copy.
+#               Every instance has fully private, writable files.
+#   "store"   - hardlink version files from the file store, copy everything else. Saves the most disk
+#               space, but shared files are read-only in every instance (see file_store.py).
+#   "copy"    - plain byte copy
+COPY_MODE = "reflink"
+
+# Files the game or the user is expected to write in place (settings, saves, mods) are never
+# hardlinked from the file store: every instance gets its own writable copy of them. Patterns are
+# matched case-insensitively against "/"-separated paths relative to the instance; "*" also
+# matches across folders.
+STORE_PRIVATE_PATTERNS = ["*.ini", "*.cfg", "*.config", "*.xml", "*.json", "*.txt", "*.log", "*.sav",
+                          "saves/*", "*/saves/*", "mods/*", "*/mods/*"]
+
+# Cold storage: when the version folders of a game take more than VERSION_DISK_BUDGET bytes, the
+# least recently played ones are compressed into archives (None disables it). Versions played in
+# the last COLD_MIN_IDLE_DAYS days are never moved.
+VERSION_DISK_BUDGET = None
+COLD_MIN_IDLE_DAYS = 14
+
+# Prefetch: remember which files an instance reads while starting and warm them into the OS cache
+# when it is launched again (see prefetch.py). Startup is watched for at most PREFETCH_RECORD_SECONDS.
+PREFETCH = True
+PREFETCH_RECORD_SECONDS = 60
+# One launch in PREFETCH_BASELINE_EVERY skips the warming, so the startup time without prefetch
+# keeps being measured (None never skips it). At most prefetch.MAX_RUNS + 1.
+PREFETCH_BASELINE_EVERY = 5
+
+# Running games have their CPU time, memory and disk I/O sampled this often (see supervisor.py).
+SUPERVISOR_SAMPLE_SECONDS = 5.0
+
+# Most games the launcher starts at once; further launches wait in the queue until one exits.
+# None for no limit. An instance's launch profile can set a lower limit for itself (see launch_profile.py).
+MAX_RUNNING_INSTANCES = None
 
 LOCAL_VERSION = "Steam Version"
 LOCAL_INSTANCE = "Global Instance"
@@ -21,6 +63,7 @@ games = {
     "CastleMiner Z": {
         "VERSIONS_DIR": os.path.join(BASE_DIR, "Games", "CastleMiner Z", "Versions"),
         "INSTANCES_DIR": os.path.join(BASE_DIR, "Games", "CastleMiner Z", "Instances"),
+        "TRASH_DIR": os.path.join(BASE_DIR, "Games", "CastleMiner Z", ".trash"),
         "APP_ID": 253430,
         "EXE_NAME": "CastleMinerZ.exe",
         "POSSIBLE_PATHS": [
@@ -31,6 +74,7 @@ games = {
     "CastleMiner Warfare": {
         "VERSIONS_DIR": os.path.join(BASE_DIR, "Games", "CastleMiner Warfare", "Versions"),
         "INSTANCES_DIR": os.path.join(BASE_DIR, "Games", "CastleMiner Warfare", "Instances"),
+        "TRASH_DIR": os.path.join(BASE_DIR, "Games", "CastleMiner Warfare", ".trash"),
         "APP_ID": 675210,
         "EXE_NAME": "CastleMinerWarfare.exe",
         "POSSIBLE_PATHS": [
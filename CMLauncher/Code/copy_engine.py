@@ -0,0 +1,224 @@
+import errno
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+
+from config import COPY_MODE
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CHUNK_SIZE = 4 * 1024 * 1024
+LARGE_FILE_SIZE = 32 * 1024 * 1024
+COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Linux ioctl that makes dst share src's extents (btrfs, XFS, bcachefs...).
+FICLONE = 0x40049409
+
+# Errors that mean "this volume can't do that", as opposed to a real I/O failure.
+UNSUPPORTED_ERRNOS = {errno.EOPNOTSUPP, errno.ENOTSUP, errno.EXDEV, errno.EINVAL,
+                      errno.ENOTTY, errno.ENOSYS, errno.EBADF}
+
+# (source device, destination device) -> strategies still believed to work there.
+_volume_strategies = {}
+_volume_lock = threading.Lock()
+
+
+class CopyCancelled(Exception):
+    """Raised when a copy is stopped through its cancel event."""
+
+
+def scan_tree(src):
+    """
+    Walk src with os.scandir.
+    Returns (dirs, files) where dirs are relative folder paths (parents first)
+    and files are (relative path, size) tuples.
+    """
+    dirs = []
+    files = []
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(src, rel_dir)) as it:
+            for entry in it:
+                rel = os.path.join(rel_dir, entry.name)
+                if entry.is_dir():
+                    dirs.append(rel)
+                    stack.append(rel)
+                elif entry.is_file():
+                    files.append((rel, entry.stat().st_size))
+    dirs.sort(key=lambda d: d.count(os.sep))
+    return dirs, files
+
+
+class _Progress:
+    """Thread-safe byte counter that forwards to an optional callback."""
+
+    def __init__(self, total, callback, cancel_event):
+        self.total = total
+        self.done = 0
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.lock = threading.Lock()
+        self.strategies = Counter()
+
+    def check_cancel(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise CopyCancelled("Copy cancelled.")
+
+    def add(self, count):
+        with self.lock:
+            self.done += count
+            done = self.done
+        if self.callback:
+            self.callback(done, self.total)
+
+    def used(self, strategy):
+        with self.lock:
+            self.strategies[strategy] += 1
+
+
+def _reflink(fsrc, fdst, size, progress):
+    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    progress.add(size)
+
+
+def _copy_file_range(fsrc, fdst, size, progress):
+    remaining = size
+    while remaining > 0:
+        progress.check_cancel()
+        copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), min(CHUNK_SIZE, remaining))
+        if copied == 0:
+            break
+        remaining -= copied
+        progress.add(copied)
+
+
+def _byte_copy(fsrc, fdst, size, progress):
+    if size < LARGE_FILE_SIZE:
+        progress.check_cancel()
+        shutil.copyfileobj(fsrc, fdst, CHUNK_SIZE)
+        progress.add(size)
+        return
+    while True:
+        progress.check_cancel()
+        chunk = fsrc.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        fdst.write(chunk)
+        progress.add(len(chunk))
+
+
+COPIERS = {
+    "reflink": _reflink,
+    "copy_file_range": _copy_file_range,
+    "copy": _byte_copy,
+}
+
+
+def available_strategies():
+    """Strategies to try, best first, for the configured COPY_MODE."""
+    strategies = []
+    if COPY_MODE != "copy":
+        if fcntl is not None and os.uname().sysname == "Linux":
+            strategies.append("reflink")
+        if hasattr(os, "copy_file_range"):
+            strategies.append("copy_file_range")
+    strategies.append("copy")
+    return strategies
+
+
+def volume_strategy(src, dst):
+    """Return the copy strategy currently cached for the volumes holding src and dst."""
+    key = (os.stat(src).st_dev, os.stat(dst).st_dev)
+    with _volume_lock:
+        return _volume_strategies.setdefault(key, available_strategies())[0]
+
+
+def _copy_file(src, dst, size, volume, progress):
+    """Copy one file with the best strategy known to work for volume, falling back as needed."""
+    progress.check_cancel()
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        while True:
+            with _volume_lock:
+                strategy = _volume_strategies.setdefault(volume, available_strategies())[0]
+            try:
+                COPIERS[strategy](fsrc, fdst, size, progress)
+                break
+            except OSError as e:
+                if strategy == "copy" or e.errno not in UNSUPPORTED_ERRNOS or fdst.tell() > 0:
+                    raise
+                with _volume_lock:
+                    strategies = _volume_strategies[volume]
+                    if strategies[0] == strategy:
+                        print(f"[INFO] '{strategy}' not supported on this volume, falling back.")
+                        strategies.pop(0)
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+    shutil.copystat(src, dst)
+    progress.used(strategy)
+
+
+def copy_tree(src, dst, progress=None, cancel_event=None, workers=COPY_WORKERS):
+    """
+    Copy the folder src to the new folder dst.
+    Files are copied in parallel on a thread pool; each one is cloned copy-on-write (reflink)
+    or copied in-kernel when the volume supports it, otherwise streamed in chunks.
+    The strategy is detected on the first file and cached per volume.
+    progress is called as progress(bytes_done, bytes_total) from worker threads.
+    Setting cancel_event stops the copy, removes the partial dst and raises CopyCancelled.
+    Returns a stats dict with files, bytes, seconds, throughput (bytes/s) and strategy.
+    """
+    if os.path.exists(dst):
+        raise FileExistsError(f"Destination already exists: {dst}")
+    start = time.perf_counter()
+    dirs, files = scan_tree(src)
+    total = sum(size for _, size in files)
+    tracker = _Progress(total, progress, cancel_event)
+
+    os.makedirs(dst)
+    try:
+        volume = (os.stat(src).st_dev, os.stat(dst).st_dev)
+        for rel in dirs:
+            os.makedirs(os.path.join(dst, rel), exist_ok=True)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [pool.submit(_copy_file, os.path.join(src, rel), os.path.join(dst, rel), size, volume, tracker)
+                       for rel, size in files]
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+            for future in done:
+                future.result()
+        for rel in reversed(dirs):
+            shutil.copystat(os.path.join(src, rel), os.path.join(dst, rel))
+        shutil.copystat(src, dst)
+    except BaseException:
+        shutil.rmtree(dst, ignore_errors=True)
+        raise
+
+    seconds = time.perf_counter() - start
+    stats = {
+        "files": len(files),
+        "bytes": total,
+        "seconds": seconds,
+        "throughput": total / seconds if seconds > 0 else 0.0,
+        "strategy": "+".join(name for name, _ in tracker.strategies.most_common()) or "copy",
+    }
+    print(f"[INFO] Copied {format_copy_stats(stats)}")
+    return stats
+
+
+def format_copy_stats(stats):
+    """Return a short human readable summary of copy_tree stats."""
+    mb = stats["bytes"] / (1024 * 1024)
+    rate = stats["throughput"] / (1024 * 1024)
+    text = f"{stats['files']} files ({mb:.1f} MB) in {stats['seconds']:.2f}s ({rate:.1f} MB/s)"
+    if "strategy" in stats:
+        text += f" using {stats['strategy']}"
+    return text
@@ -1,4 +1,5 @@
 import tkinter as tk
+from tkinter import scrolledtext
 
 from config import QUESTION_ICON, EXCLAMATION_ICON, ERROR_ICON
 
@@ -115,3 +116,32 @@ def centered_askyesno(parent, title, message, height=150, width=300):
     tk.Button(button_frame, text="No", command=on_no, width=10).pack(side=tk.LEFT, padx=10)
     dialog.wait_window()
     return result[0]
+
+
+def custom_report(parent, title, message, details, ask=False):
+    """Show a message with a scrollable list of detail lines. With ask=True, returns the Yes/No answer."""
+    result = [False]
+    dlg = tk.Toplevel(parent)
+    dlg.title(title)
+    dlg.geometry("420x320")
+    dlg.iconbitmap(QUESTION_ICON if ask else EXCLAMATION_ICON)  # Set the icon
+    dlg.transient(parent)
+    dlg.grab_set()
+    center_window(dlg, parent)
+    tk.Label(dlg, text=message, wraplength=400, justify=tk.LEFT).pack(pady=10)
+    text = scrolledtext.ScrolledText(dlg, wrap=tk.NONE, height=10)
+    text.pack(fill=tk.BOTH, expand=True, padx=10)
+    text.insert(tk.END, "\n".join(details))
+    text.configure(state="disabled")
+    button_frame = tk.Frame(dlg)
+    button_frame.pack(pady=10)
+    def on_yes():
+        result[0] = True
+        dlg.destroy()
+    if ask:
+        tk.Button(button_frame, text="Yes", command=on_yes, width=10).pack(side=tk.LEFT, padx=10)
+        tk.Button(button_frame, text="No", command=dlg.destroy, width=10).pack(side=tk.LEFT, padx=10)
+    else:
+        tk.Button(button_frame, text="OK", command=dlg.destroy, width=10).pack(side=tk.LEFT, padx=10)
+    dlg.wait_window()
+    return result[0]
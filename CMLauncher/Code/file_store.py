@@ -0,0 +1,351 @@
+import fnmatch
+import json
+import os
+import shutil
+import stat
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import STORE_DIR, COPY_MODE, STORE_PRIVATE_PATTERNS
+from copy_engine import scan_tree, copy_tree, CopyCancelled, COPY_WORKERS
+from manifest import hash_file
+
+# Every folder built from the store records which of its files are hardlinks to which blob.
+STORE_LINKS_FILE = "store_links.json"
+
+# Content-addressed file store, used when COPY_MODE is "store" (the default "reflink" and "copy"
+# modes give every instance fully private files and leave the store alone).
+# Blobs live under STORE_DIR/objects/<first two hex digits>/<sha256> and are kept read-only.
+# Version and instance files are hardlinks to those blobs, so identical files only take up
+# disk space once. The launcher never writes through a link: detach_file replaces a link with
+# a private copy first, and the read-only flag stops other programs from editing blobs in place.
+# Files the game or the user normally write (STORE_PRIVATE_PATTERNS in config.py) are never
+# stored, and links to them left by older launchers are detached before each launch.
+# Any other stored file is read-only in every instance: a game or tool that rewrites it in place
+# gets a permission error (clearing the flag by hand would change it for every instance sharing
+# it). Replacing the file (delete, then copy in) is safe and just gives that instance its own copy.
+# Folders deleted outside the launcher leave their blobs behind; collect_garbage (Free Space in
+# Manage Versions, or "python -m cli gc") removes them.
+
+
+def blob_path(digest):
+    return os.path.join(STORE_DIR, "objects", digest[:2], digest)
+
+
+def is_private(rel):
+    """True if rel is a path that must stay a private copy in every folder (see STORE_PRIVATE_PATTERNS)."""
+    rel = rel.replace(os.sep, "/").lower()
+    return any(fnmatch.fnmatchcase(rel, pattern.lower()) for pattern in STORE_PRIVATE_PATTERNS)
+
+
+def read_links(folder):
+    """Return the {relative path: digest} map of store links for a folder."""
+    links_file = os.path.join(folder, STORE_LINKS_FILE)
+    if os.path.exists(links_file):
+        try:
+            with open(links_file, "r") as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+
+def write_links(folder, links):
+    links_file = os.path.join(folder, STORE_LINKS_FILE)
+    if not links:
+        if os.path.exists(links_file):
+            os.remove(links_file)
+        return
+    with open(links_file, "w") as f:
+        json.dump(links, f)
+
+
+def is_linked(path, digest):
+    """True if path is still a hardlink to the blob for digest."""
+    try:
+        return os.path.samestat(os.stat(path), os.stat(blob_path(digest)))
+    except OSError:
+        return False
+
+
+def _make_read_only(path):
+    mode = os.stat(path).st_mode
+    os.chmod(path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def _make_writable(path):
+    mode = os.stat(path).st_mode
+    os.chmod(path, mode | stat.S_IWUSR)
+
+
+def _unlink_linked(path, digest):
+    """Remove one hardlink to a blob, keeping the blob read-only."""
+    if os.name == "nt":
+        # Windows refuses to delete read-only files, and the flag is shared by every link.
+        _make_writable(path)
+        os.remove(path)
+        _make_read_only(blob_path(digest))
+    else:
+        os.remove(path)
+
+
+def _release_blob(digest):
+    """Delete a blob once nothing but the store references it."""
+    blob = blob_path(digest)
+    try:
+        if os.stat(blob).st_nlink == 1:
+            _make_writable(blob)
+            os.remove(blob)
+    except OSError:
+        pass
+
+
+def _store_file(path, digest):
+    """Move the file at path into the store (or link it to the existing blob)."""
+    blob = blob_path(digest)
+    if os.path.exists(blob):
+        if not os.path.samefile(path, blob):
+            tmp = path + ".cml-tmp"
+            os.link(blob, tmp)
+            os.replace(tmp, path)
+    else:
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            os.link(path, blob)
+        except FileExistsError:
+            # Another ingest worker stored the same content first: link to its blob instead.
+            return _store_file(path, digest)
+        _make_read_only(blob)
+
+
+def ingest_tree(folder, cancel_event=None, hashes=None):
+    """
+    Turn every file in folder into a hardlink to a store blob.
+    Files that are already linked are skipped, so repeated calls only hash new or changed files.
+    hashes is an optional {relative path: sha256} map (from the version manifest) that saves
+    re-hashing. Returns the updated links map.
+    """
+    detach_private(folder)
+    links = read_links(folder)
+    _, files = scan_tree(folder)
+    todo = []
+    fresh = {}
+    for rel, _ in files:
+        if rel == STORE_LINKS_FILE or is_private(rel):
+            continue
+        digest = links.get(rel)
+        if digest and is_linked(os.path.join(folder, rel), digest):
+            fresh[rel] = digest
+        else:
+            todo.append(rel)
+
+    def ingest(rel):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CopyCancelled("Ingest cancelled.")
+        path = os.path.join(folder, rel)
+        digest = hashes.get(rel) if hashes else None
+        if digest is None:
+            digest = hash_file(path)
+        _store_file(path, digest)
+        return rel, digest
+
+    if todo:
+        print(f"[INFO] Adding {len(todo)} files from '{folder}' to the file store...")
+        with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+            for rel, digest in pool.map(ingest, todo):
+                fresh[rel] = digest
+    if fresh != links:
+        write_links(folder, fresh)
+    return fresh
+
+
+def link_tree(src, dst, ingest=False, progress=None, cancel_event=None, hashes=None):
+    """
+    Build dst from src using hardlinks into the store for every stored file of src.
+    Files of src that are not in the store are copied. With ingest=True, src is added to
+    the store first, using hashes like ingest_tree. Falls back to copy_tree when COPY_MODE is not "store" or the store is on
+    another volume. Returns copy_tree style stats with an extra "linked" count.
+    """
+    if COPY_MODE != "store":
+        return copy_tree(src, dst, progress=progress, cancel_event=cancel_event)
+    try:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        links = ingest_tree(src, cancel_event, hashes) if ingest else read_links(src)
+    except OSError as e:
+        print(f"[WARN] File store unavailable for '{src}' ({e}), copying instead.")
+        return copy_tree(src, dst, progress=progress, cancel_event=cancel_event)
+
+    if os.path.exists(dst):
+        raise FileExistsError(f"Destination already exists: {dst}")
+    start = time.perf_counter()
+    dirs, files = scan_tree(src)
+    files = [(rel, size) for rel, size in files if rel != STORE_LINKS_FILE]
+    total = sum(size for _, size in files)
+    done = 0
+    linked = {}
+    os.makedirs(dst)
+    try:
+        for rel in dirs:
+            os.makedirs(os.path.join(dst, rel), exist_ok=True)
+        for rel, size in files:
+            if cancel_event is not None and cancel_event.is_set():
+                raise CopyCancelled("Copy cancelled.")
+            src_path = os.path.join(src, rel)
+            dst_path = os.path.join(dst, rel)
+            digest = links.get(rel)
+            if digest and not is_private(rel) and is_linked(src_path, digest):
+                os.link(blob_path(digest), dst_path)
+                linked[rel] = digest
+            else:
+                shutil.copy2(src_path, dst_path)
+            done += size
+            if progress:
+                progress(done, total)
+        write_links(dst, linked)
+    except BaseException:
+        remove_tree(dst)
+        raise
+
+    seconds = time.perf_counter() - start
+    print(f"[INFO] Linked {len(linked)} of {len(files)} files from the file store in {seconds:.2f}s")
+    return {
+        "files": len(files),
+        "linked": len(linked),
+        "bytes": total,
+        "seconds": seconds,
+        "throughput": total / seconds if seconds > 0 else 0.0,
+        "strategy": "hardlink",
+    }
+
+
+def restore_file(src, dst, rel, src_links=None):
+    """
+    Put src's copy of rel into dst, replacing whatever is there.
+    Uses a store hardlink when src has one, otherwise copies. Returns the bytes restored.
+    src_links can be passed in to avoid re-reading src's links map for every file.
+    """
+    remove_file(dst, rel)
+    src_path = os.path.join(src, rel)
+    dst_path = os.path.join(dst, rel)
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    if src_links is None:
+        src_links = read_links(src)
+    digest = src_links.get(rel) if COPY_MODE == "store" else None
+    if digest and not is_private(rel) and is_linked(src_path, digest):
+        os.link(blob_path(digest), dst_path)
+        links = read_links(dst)
+        links[rel] = digest
+        write_links(dst, links)
+    else:
+        shutil.copy2(src_path, dst_path)
+    return os.path.getsize(dst_path)
+
+
+def detach_file(folder, rel):
+    """
+    Replace a stored hardlink inside folder with a private writable copy so it can be modified
+    without touching the blob. Does nothing for files that are not linked.
+    """
+    links = read_links(folder)
+    digest = links.pop(rel, None)
+    if digest is None:
+        return
+    path = os.path.join(folder, rel)
+    if is_linked(path, digest):
+        tmp = path + ".cml-tmp"
+        shutil.copyfile(path, tmp)
+        shutil.copystat(path, tmp)
+        _make_writable(tmp)
+        _unlink_linked(path, digest)
+        os.replace(tmp, path)
+    write_links(folder, links)
+
+
+def detach_private(folder):
+    """Give folder private copies of any stored files it should not share (see is_private)."""
+    for rel in read_links(folder):
+        if is_private(rel):
+            detach_file(folder, rel)
+
+
+def remove_file(folder, rel):
+    """Delete one file from folder, dropping its store link if it has one."""
+    links = read_links(folder)
+    digest = links.pop(rel, None)
+    path = os.path.join(folder, rel)
+    if digest and is_linked(path, digest):
+        _unlink_linked(path, digest)
+        _release_blob(digest)
+    elif os.path.exists(path):
+        os.remove(path)
+    if digest:
+        write_links(folder, links)
+
+
+def remove_tree(folder):
+    """
+    Delete a folder that may contain store links, releasing blobs nothing else uses.
+    Works for ordinary folders as well.
+    """
+    links = read_links(folder)
+    for rel, digest in links.items():
+        path = os.path.join(folder, rel)
+        if is_linked(path, digest):
+            _unlink_linked(path, digest)
+            _release_blob(digest)
+
+    def retry_writable(func, path, _):
+        _make_writable(path)
+        func(path)
+
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(folder, onexc=retry_writable)
+    else:
+        shutil.rmtree(folder, onerror=retry_writable)
+
+
+def folder_usage(folder):
+    """
+    Return (unique, shared) bytes of folder, counting each file once however many hardlinks it has.
+    unique is what deleting the folder would free; shared is kept alive by other folders linking
+    to the same files (store blobs count as unique once only the store and folder link to them).
+    """
+    links = read_links(folder)
+    _, files = scan_tree(folder)
+    inodes = {}
+    for rel, _ in files:
+        path = os.path.join(folder, rel)
+        st = os.stat(path)
+        key = (st.st_dev, st.st_ino)
+        if key in inodes:
+            inodes[key][1] += 1
+            continue
+        stored = rel in links and is_linked(path, links[rel])
+        # Links outside the folder, not counting the store's own (remove_tree releases that blob).
+        inodes[key] = [st.st_size, 1, st.st_nlink - (1 if stored else 0)]
+    unique = shared = 0
+    for size, inside, nlink in inodes.values():
+        if nlink <= inside:
+            unique += size
+        else:
+            shared += size
+    return unique, shared
+
+
+def collect_garbage():
+    """Remove every blob that no version or instance links to anymore. Returns bytes freed."""
+    freed = 0
+    objects = os.path.join(STORE_DIR, "objects")
+    if not os.path.exists(objects):
+        return 0
+    for prefix in os.scandir(objects):
+        if not prefix.is_dir():
+            continue
+        for blob in os.scandir(prefix.path):
+            st = blob.stat()
+            if st.st_nlink == 1:
+                _make_writable(blob.path)
+                os.remove(blob.path)
+                freed += st.st_size
+    return freed
@@ -1,11 +1,42 @@
+import datetime
 import json
 import os
+import time
 
+import catalog
 from config import LOCAL_INSTANCE, LOCAL_VERSION
 
+# Instance metadata lives in the SQLite catalog (see catalog.py).
+# instance_info.json is still written into every instance as an export, and is read back
+# when an instance is not in the catalog yet (first run, or the catalog was deleted).
+# last_played_ts (epoch seconds) is the sortable value; last_played is its display string.
 
-def get_instance_info(instance_path):
-    """Read instance metadata from instance_info.json if available."""
+LAST_PLAYED_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def played_timestamp(info):
+    """Return the last played epoch time of an info dict, or None if it was never played."""
+    ts = info.get("last_played_ts")
+    if ts is None and info.get("last_played"):
+        try:
+            ts = datetime.datetime.strptime(info["last_played"], LAST_PLAYED_FORMAT).timestamp()
+        except ValueError:
+            ts = None
+    return ts
+
+
+def format_played(ts):
+    return datetime.datetime.fromtimestamp(ts).strftime(LAST_PLAYED_FORMAT) if ts else ""
+
+
+def mark_played(info, when=None):
+    """Set both the epoch and display forms of last played on an info dict."""
+    info["last_played_ts"] = time.time() if when is None else when
+    info["last_played"] = format_played(info["last_played_ts"])
+
+
+def read_instance_json(instance_path):
+    """Read instance metadata straight from instance_info.json if available."""
     info_file = os.path.join(instance_path, "instance_info.json")
     if os.path.exists(info_file):
         try:
@@ -16,11 +47,106 @@ def get_instance_info(instance_path):
     return {"instance": os.path.basename(instance_path), "version": "", "last_played": ""}
 
 
-def write_instance_info(instance_path, info):
-    """Write instance metadata to instance_info.json."""
+def _import_info(instance_path):
+    info = read_instance_json(instance_path)
+    info.setdefault("created", os.path.getmtime(instance_path))
+    info["last_played_ts"] = played_timestamp(info)
+    return info
+
+
+def get_instance_info(instance_path):
+    """Read instance metadata from the catalog, importing instance_info.json on first sight."""
+    root, name = os.path.split(instance_path)
+    info = catalog.get_instance(root, name)
+    if info is None:
+        if not os.path.isdir(instance_path):
+            return read_instance_json(instance_path)
+        info = _import_info(instance_path)
+        catalog.put_instance(root, name, info)
+    return info
+
+
+def _export_json(instance_path, info):
     info_file = os.path.join(instance_path, "instance_info.json")
     with open(info_file, "w") as f:
-        json.dump(info, f)
+        json.dump({k: v for k, v in info.items() if v is not None}, f)
+
+
+def write_instance_info(instance_path, info):
+    """Write instance metadata to the catalog and export it to instance_info.json in one transaction."""
+    root, name = os.path.split(instance_path)
+    info["last_played_ts"] = played_timestamp(info)
+    catalog.put_instance(root, name, info, export=lambda: _export_json(instance_path, info))
+
+
+def rename_instance_info(old_path, new_path):
+    """Move the metadata of a renamed instance folder to its new name."""
+    root, old_name = os.path.split(old_path)
+    catalog.rename_instance(root, old_name, os.path.basename(new_path))
+    info = get_instance_info(new_path)
+    info["instance"] = os.path.basename(new_path)
+    write_instance_info(new_path, info)
+
+
+def delete_instance_info(instance_path):
+    root, name = os.path.split(instance_path)
+    catalog.delete_instance(root, name)
+
+
+def instances_using_version(instances_dir, version):
+    """Return the names of the instances built from version, without touching the disk."""
+    return catalog.instances_for_version(instances_dir, version)
+
+
+def retarget_version(instances_dir, old_version, new_version):
+    """
+    Point the instances of a renamed version at its new name in one atomic batch.
+    Only the affected instances get their instance_info.json rewritten. Returns their names.
+    """
+    def export(names):
+        for name in names:
+            _export_json(os.path.join(instances_dir, name), catalog.get_instance(instances_dir, name))
+
+    return catalog.retarget_instances(instances_dir, old_version, new_version, export=export)
+
+
+def list_instance_infos(instances_dir):
+    """Return the metadata of every catalogued instance of a game with a single query."""
+    return catalog.list_instances(instances_dir)
+
+
+def sync_instance_infos(instances_dir, names, reimport=False):
+    """
+    Make the catalog match the instance folders in names.
+    New folders are imported from their instance_info.json and vanished ones are dropped.
+    With reimport=True every instance is re-read from its JSON export (recovery).
+    """
+    known = set(catalog.instance_names(instances_dir))
+    names = set(names)
+    todo = names if reimport else names - known
+    if todo:
+        catalog.put_instances(instances_dir, {name: _import_info(os.path.join(instances_dir, name))
+                                              for name in todo})
+    stale = known - names
+    if stale:
+        catalog.delete_instances(instances_dir, stale)
+
+
+def refresh_instance_infos(instances_dir, names):
+    """
+    Re-check only the given instance folder names (reported by the folder watcher):
+    new folders are imported and vanished ones dropped, without listing the whole folder.
+    """
+    known = set(catalog.instance_names(instances_dir))
+    present = {name for name in names if os.path.isdir(os.path.join(instances_dir, name))}
+    new = present - known
+    if new:
+        catalog.put_instances(instances_dir, {name: _import_info(os.path.join(instances_dir, name))
+                                              for name in new})
+    gone = (set(names) - present) & known
+    if gone:
+        catalog.delete_instances(instances_dir, gone)
+    return bool(new or gone)
 
 
 # --- Global Instance Info --- #
@@ -41,4 +167,4 @@ def write_global_instance_info(game, info):
     """Write Global Instance metadata to a file."""
     info_file = os.path.join(game["INSTANCES_DIR"], "Global_Instance_Info.json")
     with open(info_file, "w") as f:
-        json.dump(info, f)
\ No newline at end of file
+        json.dump(info, f)
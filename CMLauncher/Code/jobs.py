@@ -0,0 +1,140 @@
+import queue
+import threading
+import traceback
+
+from copy_engine import CopyCancelled
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+JOB_WORKERS = 2
+
+
+class Job:
+    """A unit of background work. func is called as func(job) on a worker thread."""
+
+    _next_id = 1
+    _id_lock = threading.Lock()
+
+    def __init__(self, title, func, on_done=None, on_error=None, hidden=False):
+        with Job._id_lock:
+            self.id = Job._next_id
+            Job._next_id += 1
+        self.title = title
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.hidden = hidden
+        self.state = QUEUED
+        self.progress = (0, 0)
+        self.status = ""
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+
+    def report(self, done, total):
+        """Progress callback for worker code; safe to call from any thread."""
+        self.progress = (done, total)
+
+    def set_status(self, text):
+        self.status = text
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def finished(self):
+        return self.state in (DONE, FAILED, CANCELLED)
+
+
+class JobQueue:
+    """
+    Runs jobs on worker threads. State changes are pushed onto a thread-safe
+    result queue which the UI drains with poll() from its own thread.
+    """
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.pending = queue.Queue()
+        self.results = queue.Queue()
+        self.jobs = []
+        self.lock = threading.Lock()
+        self.threads = []
+        for _ in range(workers):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, title, func, on_done=None, on_error=None, hidden=False):
+        """
+        Queue func(job) to run in the background and return the Job.
+        Hidden jobs (short UI housekeeping such as loading a tab) skip the queue, run on their
+        own thread so long copies can't delay them, and are not shown in the jobs panel.
+        """
+        job = Job(title, func, on_done, on_error, hidden)
+        with self.lock:
+            self.jobs.append(job)
+        self.results.put(job)
+        if hidden:
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        else:
+            self.pending.put(job)
+        return job
+
+    def _worker(self):
+        while True:
+            job = self.pending.get()
+            if job is None:
+                break
+            self._run(job)
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            job.state = CANCELLED
+            self.results.put(job)
+            return
+        job.state = RUNNING
+        self.results.put(job)
+        try:
+            job.result = job.func(job)
+            job.state = DONE
+        except CopyCancelled:
+            job.state = CANCELLED
+        except Exception as e:
+            job.error = e
+            job.state = FAILED
+            print(f"[ERROR] Job '{job.title}' failed:")
+            traceback.print_exc()
+        self.results.put(job)
+
+    def poll(self):
+        """Return the jobs whose state changed since the last poll. Call from the UI thread."""
+        changed = []
+        while True:
+            try:
+                job = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if job not in changed:
+                changed.append(job)
+        return changed
+
+    def active(self):
+        with self.lock:
+            return [job for job in self.jobs if not job.finished]
+
+    def forget(self, job):
+        with self.lock:
+            if job in self.jobs:
+                self.jobs.remove(job)
+
+    def shutdown(self, timeout=5.0):
+        """Cancel outstanding jobs and wait briefly for the workers to stop."""
+        for job in self.active():
+            job.cancel()
+        for _ in self.threads:
+            self.pending.put(None)
+        for thread in self.threads:
+            thread.join(timeout)
@@ -0,0 +1,164 @@
+import os
+import subprocess
+
+# Launch profiles: per-instance settings for how its game process is started, kept in the instance
+# metadata as "launch_profile" = {"nice": int or None, "cpus": [cpu numbers] or None,
+# "max_running": int or None}. nice is the Unix niceness (-20 highest priority .. 19 lowest); on
+# Windows it picks the nearest priority class. cpus pins the process (and the threads it starts)
+# to those CPUs. max_running holds the launch in the queue while that many games are running
+# (see supervisor.LaunchQueue).
+# Raising priority (nice below 0) needs root on Linux and administrator rights for the high class
+# on Windows; a setting that can't be applied is skipped with a warning and the game still starts.
+
+# Lowest niceness of each Windows priority class.
+WINDOWS_PRIORITY_CLASSES = [
+    (15, "IDLE_PRIORITY_CLASS"),
+    (5, "BELOW_NORMAL_PRIORITY_CLASS"),
+    (-4, "NORMAL_PRIORITY_CLASS"),
+    (-14, "ABOVE_NORMAL_PRIORITY_CLASS"),
+    (-20, "HIGH_PRIORITY_CLASS"),
+]
+
+PROFILE_KEYS = ("nice", "cpus", "max_running")
+
+
+def empty_profile():
+    return {key: None for key in PROFILE_KEYS}
+
+
+def parse_cpus(text):
+    """Parse a CPU list such as "0-3,6" into sorted CPU numbers; an empty text means no pinning (None)."""
+    text = text.strip()
+    if not text:
+        return None
+    cpus = set()
+    for part in text.split(","):
+        part = part.strip()
+        first, dash, last = part.partition("-")
+        try:
+            first = int(first)
+            last = int(last) if dash else first
+        except ValueError:
+            raise ValueError(f"'{part}' is not a CPU number or range.")
+        if first < 0 or last < first:
+            raise ValueError(f"'{part}' is not a valid CPU range.")
+        cpus.update(range(first, last + 1))
+    return sorted(cpus)
+
+
+def format_cpus(cpus):
+    """The inverse of parse_cpus: [0, 1, 2, 3, 6] -> "0-3,6"."""
+    if not cpus:
+        return ""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+def profile_error(profile):
+    """Return why a launch profile is invalid on this machine, or None if it is fine."""
+    nice = profile.get("nice")
+    if nice is not None and not -20 <= nice <= 19:
+        return "Priority (niceness) must be between -20 and 19."
+    cpus = profile.get("cpus")
+    if cpus is not None:
+        if not cpus:
+            return "The CPU list cannot be empty."
+        count = os.cpu_count() or 1
+        if max(cpus) >= count:
+            return f"This machine only has CPUs {format_cpus(range(count))}."
+    max_running = profile.get("max_running")
+    if max_running is not None and max_running < 1:
+        return "The running instance limit must be at least 1."
+    return None
+
+
+def describe(profile):
+    """A short description of a profile for the UI, e.g. "nice 10, CPUs 0-3, max 2 running"."""
+    parts = []
+    if profile.get("nice") is not None:
+        parts.append(f"nice {profile['nice']}")
+    if profile.get("cpus"):
+        parts.append(f"CPUs {format_cpus(profile['cpus'])}")
+    if profile.get("max_running") is not None:
+        parts.append(f"max {profile['max_running']} running")
+    return ", ".join(parts) or "default"
+
+
+def creation_flags(profile):
+    """Popen creationflags for the profile: the priority class on Windows, 0 elsewhere."""
+    nice = profile.get("nice")
+    if os.name != "nt" or nice is None:
+        return 0
+    for lowest, name in WINDOWS_PRIORITY_CLASSES:
+        if nice >= lowest:
+            return getattr(subprocess, name, 0)
+    return 0
+
+
+def _set_windows_affinity(process, cpus):
+    import ctypes
+    mask = sum(1 << cpu for cpu in cpus)
+    if not ctypes.windll.kernel32.SetProcessAffinityMask(int(process._handle), mask):
+        raise ctypes.WinError()
+
+
+def child_setup(profile):
+    """
+    Return a Popen preexec_fn that applies the affinity and niceness of a profile in the child,
+    between fork and exec, so every thread the game ever starts inherits them. None when there
+    is nothing to apply this way (always on Windows: see creation_flags and apply_profile).
+    """
+    cpus = profile.get("cpus")
+    nice = profile.get("nice")
+    pin = bool(cpus) and hasattr(os, "sched_setaffinity")
+    renice = nice is not None and hasattr(os, "setpriority")
+    if not pin and not renice:
+        return None
+
+    def setup():
+        # Runs in the forked child, so only plain syscalls. A failure must not stop the game from
+        # starting; apply_profile reports what didn't take.
+        if pin:
+            try:
+                os.sched_setaffinity(0, cpus)
+            except (OSError, ValueError):
+                pass
+        if renice:
+            try:
+                os.setpriority(os.PRIO_PROCESS, 0, nice)
+            except OSError:
+                pass
+    return setup
+
+
+def apply_profile(process, profile):
+    """
+    Finish applying a profile to a just-started process. On Windows this sets the affinity of the
+    whole process (its priority class came from creation_flags). Elsewhere child_setup already did
+    the work before exec, and any setting that didn't take is reported with a warning.
+    """
+    cpus = profile.get("cpus")
+    nice = profile.get("nice")
+    if cpus:
+        try:
+            if hasattr(os, "sched_getaffinity"):
+                if os.sched_getaffinity(process.pid) != set(cpus):
+                    print(f"[WARN] Could not pin the game to CPUs {format_cpus(cpus)}.")
+            elif os.name == "nt":
+                _set_windows_affinity(process, cpus)
+            else:
+                print("[WARN] CPU affinity is not supported on this system.")
+        except (OSError, ValueError) as e:
+            if process.poll() is None:
+                print(f"[WARN] Could not pin the game to CPUs {format_cpus(cpus)}: {e}")
+    if nice is not None and hasattr(os, "getpriority"):
+        try:
+            if os.getpriority(os.PRIO_PROCESS, process.pid) != nice:
+                print(f"[WARN] Could not set the game's niceness to {nice}.")
+        except OSError:
+            pass
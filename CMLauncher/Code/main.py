@@ -1,134 +1,38 @@
+import bisect
 import os
-import shutil
 import subprocess
 import tkinter as tk
 import webbrowser
 from tkinter import ttk, scrolledtext
 import tkinter.font as tkFont
-import json
-import datetime
+import zipfile
 
 from config import MANAGE_ICON, PLUS_ICON, BASE_ICON, VERSION
-from config import LOCAL_VERSION, LOCAL_INSTANCE, games, INSTALL_PATHS_FILE
+from copy_engine import format_copy_stats, CopyCancelled
+from config import LOCAL_VERSION, LOCAL_INSTANCE, games, VERSION_DISK_BUDGET
+from manifest import rename_version_manifest
 from custom_windows import custom_error, custom_validated_askstring, centered_askyesno, center_window, custom_askstring, \
-    custom_info
-from instance_info import write_instance_info, get_instance_info, get_global_instance_info, write_global_instance_info
-
-def read_install_paths():
-    if os.path.exists(INSTALL_PATHS_FILE):
-        with open(INSTALL_PATHS_FILE, "r") as f:
-            return json.load(f)
-    return {}
-
-def write_install_paths(paths):
-    with open(INSTALL_PATHS_FILE, "w") as f:
-        json.dump(paths, f, indent=4)
-
-def check_install_paths():
-    paths = read_install_paths()
-    updated_paths = {}
-    for game_name, path in paths.items():
-        exe_path = os.path.join(path, games[game_name]["EXE_NAME"])
-        if os.path.exists(exe_path):
-            updated_paths[game_name] = path
-    if updated_paths != paths:
-        write_install_paths(updated_paths)
-    return updated_paths
-
-
-def ensure_game_folders(game):
-    """Ensure that required folders exist for the given game."""
-    for key in ["VERSIONS_DIR", "INSTANCES_DIR"]:
-        folder = game[key]
-        if not os.path.exists(folder):
-            os.makedirs(folder)
-            print(f"[INFO] Created folder: {folder}")
-
-
-def find_install_location(game):
-    """
-    Try to auto-detect the install location for the game by checking its POSSIBLE_PATHS.
-    """
-    for path in game["POSSIBLE_PATHS"]:
-        exe_path = os.path.join(path, game["EXE_NAME"])
-        if os.path.exists(exe_path):
-            return path
-    return None
-
-
-def overlay_version_files(instance_path, version, game):
-    """
-    Overlay version-specific files onto an instance folder.
-    If version is the vanilla version, do nothing.
-    Otherwise, overlay files from the Versions folder.
-    """
-    if version == LOCAL_VERSION:
-        return
-    version_path = os.path.join(game["VERSIONS_DIR"], version)
-    if not os.path.exists(version_path):
-        print(f"[ERROR] Version files for '{version}' not found in Versions folder!")
-        return
-    for root, _, files in os.walk(version_path):
-        for file in files:
-            relative_path = os.path.relpath(root, version_path)
-            dest_path = os.path.join(instance_path, relative_path, file)
-            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-            shutil.copy2(os.path.join(root, file), dest_path)
-            print(f"[INFO] Overlaying file: {dest_path}")
-
-
-def create_instance(instance_name, version, game, force_copy=False):
-    """
-    Create a new instance with the given name and version.
-    For modded instances, this copies all files from the version folder.
-    Note: When creating an instance with the vanilla (Steam) version,
-    if force_copy is False, the function will not copy (as that is reserved for the Global Instance).
-    If force_copy is True, the installed game files (detected via find_install_location)
-    are copied.
-    """
-    instance_path = os.path.join(game["INSTANCES_DIR"], instance_name)
-    if os.path.exists(instance_path):
-        return "exists"
-    try:
-        print(f"[INFO] Creating new instance '{instance_name}' with version '{version}'...")
-        if version == LOCAL_VERSION:
-            if not force_copy:
-                return "Global instance is not copied."
-            else:
-                source_path = find_install_location(game)
-                if not source_path:
-                    return "Installation for vanilla version not found!"
-        else:
-            source_path = os.path.join(game["VERSIONS_DIR"], version)
-            if not os.path.exists(source_path):
-                return f"Version folder for '{version}' not found!"
-        shutil.copytree(source_path, instance_path)
-        info = {
-            "instance": instance_name,
-            "version": version,
-            "last_played": ""
-        }
-        write_instance_info(instance_path, info)
-        return instance_path
-    except Exception as e:
-        return str(e)
-
-
-def launch_game(instance_path, game):
-    """Launch the game from the given instance folder (or base directory) and update last played."""
-    game_exe = os.path.join(instance_path, game["EXE_NAME"])
-    app_id_path = os.path.join(instance_path, "steam_appid.txt")
-    with open(app_id_path, "w") as f:
-        app_id = game["APP_ID"]
-        f.write(str(app_id))
-    if os.path.exists(game_exe):
-        print("[INFO] Launching game from instance...")
-        env = os.environ.copy()
-        env["PATH"] = instance_path + ";" + env["PATH"]
-        env["PWD"] = instance_path
-        subprocess.Popen(game_exe, cwd=instance_path, env=env)
-    else:
-        custom_error(tk._default_root, "Error", "Game executable not found in the instance folder.")
+    custom_info, custom_report
+import catalog
+from instance_info import get_global_instance_info, played_timestamp, format_played, list_instance_infos, \
+    instances_using_version, retarget_version
+from jobs import JobQueue, RUNNING, DONE, FAILED, CANCELLED
+from trash import Reaper, UNDO_SECONDS
+from watcher import DirectoryWatcher
+from prefetch import load_profile, summarize, format_summary
+from supervisor import Supervisor, LaunchQueue
+from launch_profile import parse_cpus, format_cpus, profile_error, describe
+from file_store import collect_garbage
+from version_archive import ARCHIVE_SUFFIX
+from version_delta import DELTA_SUFFIX
+from operations import read_install_paths, write_install_paths, check_install_paths, read_snapshot, write_snapshot, \
+    ensure_game_folders, find_install_location, add_install_candidate, create_instance, get_instance_path, \
+    launch_instance, prefetch_profile_path, instance_name_error, version_name_error, rename_instance, trash_instance, \
+    trash_version, restore_trashed, sync_catalog, apply_disk_changes, compress_version, \
+    store_version_delta, convert_version_to_delta, import_version_archive, plan_cold_storage, apply_cold_storage, \
+    rehydrate_version, list_instances, get_version_options, clone_instance, clone_version, get_version_source, \
+    verify_instance, repair_instance, resync_instance, record_session, instance_stats, run_batch, next_clone_name, \
+    install_paths_lock, get_launch_profile, set_launch_profile, launch_cap
 
 
 def open_instance_folder(instance_path):
@@ -139,36 +43,6 @@ def open_instance_folder(instance_path):
         custom_error(tk._default_root, "Error", "Folder not found.")
 
 
-def delete_instance(instance_path):
-    """Delete the given instance folder after confirmation using a centered dialog."""
-    if centered_askyesno(tk._default_root, "Confirm Delete", "Are you sure you wish to delete this instance?"):
-        try:
-            shutil.rmtree(instance_path)
-            return True
-        except Exception as e:
-            custom_error(tk._default_root, "Error", f"Failed to delete instance: {e}")
-    return False
-
-
-def list_instances(game):
-    """Return a list of instance folder names for the game (excluding the Global Instance)."""
-    if not os.path.exists(game["INSTANCES_DIR"]):
-        os.makedirs(game["INSTANCES_DIR"])
-    return [instance for instance in os.listdir(game["INSTANCES_DIR"])
-            if os.path.isdir(os.path.join(game["INSTANCES_DIR"], instance)) and instance != LOCAL_INSTANCE]
-
-
-def get_version_options(game):
-    """Return a list of available versions (vanilla plus folders in Versions)."""
-    options = [LOCAL_VERSION]
-    if os.path.exists(game["VERSIONS_DIR"]):
-        for folder in os.listdir(game["VERSIONS_DIR"]):
-            folder_path = os.path.join(game["VERSIONS_DIR"], folder)
-            if os.path.isdir(folder_path):
-                options.append(folder)
-    return options
-
-
 def new_version_dialog(game, parent):
     """
     Open a modal dialog to create a new version for the game.
@@ -198,18 +72,14 @@ def new_version_dialog(game, parent):
 
     def on_create():
         version_name = version_var.get().strip()
-        if not version_name:
-            error_label.config(text="Version name cannot be empty.")
-            return
-        if version_name == LOCAL_VERSION:
-            error_label.config(text="Cannot use 'Steam Version' as a version name.")
+        error = version_name_error(game, version_name)
+        if error:
+            error_label.config(text=error)
             return
         version_path = os.path.join(game["VERSIONS_DIR"], version_name)
-        if os.path.exists(version_path):
-            error_label.config(text="Version already exists.")
-            return
         try:
             os.makedirs(version_path)
+            catalog.put_version(game["VERSIONS_DIR"], version_name)
             dialog.destroy()
         except Exception as e:
             error_label.config(text=f"Error: {e}")
@@ -219,88 +89,64 @@ def new_version_dialog(game, parent):
     return None
 
 
-def get_product_version(exe_path):
-    try:
-        import win32api
-        info = win32api.GetFileVersionInfo(exe_path, "\\")
-        ms = info['FileVersionMS']
-        ls = info['FileVersionLS']
-        return f"{(ms >> 16) & 0xFFFF}.{ms & 0xFFFF}.{(ls >> 16) & 0xFFFF}.{ls & 0xFFFF}"
-    except Exception:
-        return "Unknown"
-
-
-# --- Helper functions for cloning ---
-def clone_instance(instance_name, game):
-    """Clone an instance (including Global Instance) with a new name."""
-    if instance_name == LOCAL_INSTANCE:
-        source = find_install_location(game)
-        if not source:
-            custom_error(tk._default_root, "Error", "Global Instance source not found.")
-            return
-    else:
-        source = os.path.join(game["INSTANCES_DIR"], instance_name)
-
-    def validate_instance_name(name):
-        if not name:
-            return "Instance name cannot be empty."
-        if name == LOCAL_INSTANCE:
-            return "Cannot use 'Global Instance' as an instance name."
-        if len(name) > 25:
-            return "Instance name cannot exceed 25 characters."
-        new_path = os.path.join(game["INSTANCES_DIR"], name)
-        if os.path.exists(new_path):
-            return "An instance with that name already exists."
-        return None
-
-    new_name = custom_validated_askstring(tk._default_root, "Clone Instance",
-                                          "Enter new instance name:", validate_instance_name)
-    if not new_name:
-        return
-    new_path = os.path.join(game["INSTANCES_DIR"], new_name)
-    try:
-        shutil.copytree(source, new_path)
-        info = get_instance_info(new_path)
-        info["instance"] = new_name
-        if instance_name == LOCAL_INSTANCE:
-            info["version"] = LOCAL_VERSION
-        info["last_played"] = ""
-        write_instance_info(new_path, info)
-        custom_info(tk._default_root, "Clone", f"Instance cloned as '{new_name}'.")
-    except Exception as e:
-        custom_error(tk._default_root, "Error", f"Failed to clone instance: {e}")
-
-def clone_version(version_name, game):
-    """Clone a version folder with a new name (including the vanilla version)."""
-    if version_name == LOCAL_VERSION:
-        source = find_install_location(game)
-        if not source:
-            custom_error(tk._default_root, "Error", "Installation for vanilla version not found.")
-            return
-    else:
-        source = os.path.join(game["VERSIONS_DIR"], version_name)
-    def validate_version_name(name):
-        if not name:
-            return "Version name cannot be empty."
-        if name == LOCAL_VERSION:
-            return "Cannot use 'Steam Version' as a version name."
-        if len(name) > 25:
-            return "Version name cannot exceed 25 characters."
-        new_path = os.path.join(game["VERSIONS_DIR"], name)
-        if os.path.exists(new_path):
-            return "A version with that name already exists."
-        return None
-    new_name = custom_validated_askstring(tk._default_root, "Clone Version",
-                                          "Enter new version name:", validate_version_name)
-    if not new_name:
-        return
-    new_path = os.path.join(game["VERSIONS_DIR"], new_name)
-    try:
-        shutil.copytree(source, new_path)
-        custom_info(tk._default_root, "Clone", f"Version cloned as '{new_name}'.")
-    except Exception as e:
-        custom_error(tk._default_root, "Error", f"Failed to clone version: {e}")
-
+def ask_clone_instance_name(game):
+    """Prompt for the name of a cloned instance. Returns None if cancelled."""
+    return custom_validated_askstring(tk._default_root, "Clone Instance", "Enter new instance name:",
+                                      lambda name: instance_name_error(game, name))
+
+
+def ask_clone_version_name(game):
+    """Prompt for the name of a cloned version. Returns None if cancelled."""
+    return custom_validated_askstring(tk._default_root, "Clone Version", "Enter new version name:",
+                                      lambda name: version_name_error(game, name))
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60}s"
+    return f"{seconds}s"
+
+
+def format_stats_line(entry):
+    """One line of the instance stats report: playtime plus the last session's resource use."""
+    sessions = entry["sessions"]
+    line = f"{entry['instance']}: {format_duration(entry['playtime'])} in {sessions} session{'' if sessions == 1 else 's'}"
+    session = entry["last_session"]
+    if session:
+        if "cpu_percent" in session:
+            line += f", {session['cpu_percent']:.0f}% CPU"
+        if "peak_rss" in session:
+            line += f", {session['peak_rss'] / (1024 * 1024):.0f} MB peak"
+        if "read_bytes" in session:
+            line += f", {session['read_bytes'] / (1024 * 1024):.0f} MB read"
+        if session["exit_code"]:
+            line += f", exit code {session['exit_code']}"
+    return line
+
+
+def longest_increasing_run(values):
+    """Return the indexes of a longest strictly increasing subsequence of values."""
+    tails = []
+    tail_indexes = []
+    parents = [None] * len(values)
+    for index, value in enumerate(values):
+        pos = bisect.bisect_left(tails, value)
+        if pos == len(tails):
+            tails.append(value)
+            tail_indexes.append(index)
+        else:
+            tails[pos] = value
+            tail_indexes[pos] = index
+        parents[index] = tail_indexes[pos - 1] if pos else None
+    result = []
+    index = tail_indexes[-1] if tail_indexes else None
+    while index is not None:
+        result.append(index)
+        index = parents[index]
+    return result[::-1]
 
 
 # ----------------------------
@@ -371,6 +217,11 @@ class HomeTab(tk.Frame):
         self.text_widget.insert(tk.END,
                                 "4. Copy and replace all of the mod files (or follow mod-specific installation instructions).\n",
                                 "body")
+        self.text_widget.insert(tk.END,
+                                "Instance files are private copies you can edit freely. If you set COPY_MODE to \"store\" in "
+                                "config.py to save disk space, files other than settings, saves and mods are shared between "
+                                "versions and instances and are read-only: delete them and copy in the new ones rather than "
+                                "overwriting or editing them in place.\n", "body")
         self.text_widget.insert(tk.END, "5. Select the instance, and play!\n", "body")
 
         self.text_widget.insert(tk.END, "\n")
@@ -417,27 +268,105 @@ class HomeTab(tk.Frame):
 
 
 class GameTab(tk.Frame):
-    def __init__(self, master, game_name, game):
+    # Instance info keys kept in the startup snapshot (enough to rebuild a row).
+    SNAPSHOT_KEYS = ("instance", "version", "last_played", "last_played_ts")
+
+    def __init__(self, master, game_name, game, snapshot=None):
         super().__init__(master)
         self.game_name = game_name
         self.game = game
-        ensure_game_folders(self.game)
         self.sort_column = "instance"
         self.sort_reverse = False
+        self.list_refreshers = []
+        self.refresh_pending = False
+        self.loaded = False
+        self.loading = False
+        self.snapshot = snapshot
+        self.install_path = None
+        self.placeholder = None
+        self.watcher = None
+        # (version, seconds) of the cold versions rehydrated this session, for the storage report.
+        self.rehydrations = []
+
+        # Nothing touches the disk until the tab is first shown (see load). If the last session
+        # left a snapshot, paint it right away so Play works before the disk has been checked.
+        if snapshot and snapshot.get("install_path"):
+            self.install_path = snapshot["install_path"]
+            add_install_candidate(game, self.install_path)
+            self.create_widgets()
+            self.apply_rows({info["instance"]: self.row_for(info) for info in snapshot.get("instances", [])})
+        else:
+            self.placeholder = tk.Label(self, text=f"Loading {game_name}...")
+            self.placeholder.pack(pady=20)
 
-        install_paths = check_install_paths()
-        if game_name in install_paths:
-            self.game["POSSIBLE_PATHS"].insert(0, install_paths[game_name])
+    def load(self):
+        """Probe the disk for this game in the background, then build the tab. Only runs once."""
+        if self.loaded or self.loading:
+            return
+        self.loading = True
+        self.winfo_toplevel().jobs.submit(f"Load {self.game_name}", lambda job: self.probe(),
+                                          on_done=self.on_probed, on_error=self.on_probe_failed, hidden=True)
 
-        if find_install_location(self.game) is None:
+    def probe(self):
+        """Disk work for load(). Runs on a worker thread, so it must not touch Tk."""
+        ensure_game_folders(self.game)
+        install_paths = check_install_paths()
+        if self.game_name in install_paths:
+            add_install_candidate(self.game, install_paths[self.game_name])
+        sync_catalog(self.game)
+        return find_install_location(self.game, refresh=True)
+
+    def on_probed(self, job):
+        self.loading = False
+        self.loaded = True
+        self.install_path = job.result
+        self.start_watcher()
+        if VERSION_DISK_BUDGET is not None:
+            self.free_space(automatic=True)
+        if job.result is None:
             self.load_no_install_ui()
+        elif self.placeholder is None:
+            # Painted from the snapshot: only the differences reach the tree.
+            self.populate_instances()
         else:
+            self.placeholder.destroy()
+            self.placeholder = None
             self.create_widgets()
             self.populate_instances()
 
+    def on_probe_failed(self, job):
+        self.loading = False
+        if self.placeholder is None:
+            print(f"[WARN] Could not refresh {self.game_name}, showing the last known instances: {job.error}")
+            return
+        self.placeholder.config(text=f"Failed to load {self.game_name}: {job.error}", fg="red")
+        retry_button = tk.Button(self, text="Retry")
+        retry_button.config(command=lambda: [retry_button.destroy(), self.placeholder.config(
+            text=f"Loading {self.game_name}...", fg="black"), self.load()])
+        retry_button.pack(pady=10)
+
+    def start_watcher(self):
+        """Keep the catalog and lists current when instance or version folders change outside the launcher."""
+        if self.watcher is not None:
+            return
+        jobs = self.winfo_toplevel().jobs
+
+        def on_changes(changes):
+            # Runs on the watcher thread; the job queue carries the refresh back to the UI thread.
+            jobs.submit(f"Refresh {self.game_name}", lambda job: apply_disk_changes(self.game, changes),
+                        on_done=lambda job: job.result and self.request_refresh(), hidden=True)
+
+        # Versions can also be single files: archives made by Free Space and deltas.
+        self.watcher = DirectoryWatcher([self.game["INSTANCES_DIR"], self.game["VERSIONS_DIR"]], on_changes,
+                                        file_suffixes=(ARCHIVE_SUFFIX, DELTA_SUFFIX))
+        self.watcher.start()
+
     def load_no_install_ui(self):
         for widget in self.winfo_children():
             widget.destroy()
+        self.placeholder = None
+        if hasattr(self, "tree"):
+            del self.tree
         label = tk.Label(self, text=f"Installation for {self.game_name} not detected.")
         label.pack(pady=20)
         btn = tk.Button(self, text="Set Steam Installation Path", command=self.set_install_path)
@@ -449,10 +378,12 @@ class GameTab(tk.Frame):
         if path:
             exe_path = os.path.join(path, self.game["EXE_NAME"])
             if os.path.exists(exe_path):
-                self.game["POSSIBLE_PATHS"].insert(0, path)
-                install_paths = read_install_paths()
-                install_paths[self.game_name] = path
-                write_install_paths(install_paths)
+                add_install_candidate(self.game, path)
+                with install_paths_lock:
+                    install_paths = read_install_paths()
+                    install_paths[self.game_name] = path
+                    write_install_paths(install_paths)
+                self.install_path = path
                 for widget in self.winfo_children():
                     widget.destroy()
                 self.create_widgets()
@@ -482,6 +413,11 @@ class GameTab(tk.Frame):
         self.tree.column("last_played", anchor="w", width=150)
         self.tree.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
         self.tree.bind("<<TreeviewSelect>>", self.on_instance_select)
+        # Rows are keyed by instance name; row_values mirrors what the tree shows, row_order its order
+        # and row_keys holds a precomputed sort key per column.
+        self.row_values = {}
+        self.row_keys = {}
+        self.row_order = []
 
         self.play_btn = tk.Button(self, text="   Play   ", command=self.start_instance, state=tk.DISABLED,
                                   font=("Arial", 18))
@@ -490,12 +426,149 @@ class GameTab(tk.Frame):
         self.selected_instance_label = tk.Label(self, text="No instance selected", font=("Arial", 10))
         self.selected_instance_label.pack(pady=(5, 15))
 
+    def run_job(self, title, func, on_done=None):
+        """Run func(job) on the launcher's job queue and refresh the views when it finishes."""
+        def done(job):
+            if isinstance(job.result, dict) and "strategy" in job.result:
+                print(f"[INFO] {title}: {format_copy_stats(job.result)}")
+            if on_done:
+                on_done(job)
+            self.request_refresh()
+
+        def failed(job):
+            self.request_refresh()
+            if job.state == FAILED:
+                custom_error(tk._default_root, "Error", f"{title} failed:\n{job.error}")
+
+        return self.winfo_toplevel().jobs.submit(title, func, on_done=done, on_error=failed)
+
+    def free_space(self, automatic=False):
+        """
+        Remove unused file store blobs, then plan cold storage in the background, show the plan and
+        apply it once the user agrees. automatic (the check when the tab loads) skips the file store
+        and stays quiet unless there is something to move.
+        """
+        budget = VERSION_DISK_BUDGET
+        mb = 1024 * 1024
+        freed = [0]
+
+        def store_note():
+            return (f"\n\nRemoved {freed[0] / mb:.1f} MB of files nothing uses anymore from the file store."
+                    if freed[0] else "")
+
+        def show(job):
+            report = job.result
+            details = [f"Moved to cold storage: {version}" for version in report["moved"]]
+            details += [f"Rehydrated '{version}' in {seconds:.2f}s" for version, seconds in self.rehydrations]
+            custom_report(tk._default_root, "Storage",
+                          f"Reclaimed {report['reclaimed_bytes'] / mb:.1f} MB by moving "
+                          f"{len(report['moved'])} idle version(s) to cold storage.\n"
+                          f"Version folders now use {report['hot_bytes'] / mb:.1f} MB "
+                          f"(budget {budget / mb:.1f} MB)." + store_note(), details)
+
+        def confirm(job):
+            versions, sizes, hot_bytes, shared = job.result
+            # Versions its instances still link to would free nothing, so they are never moved.
+            shared_note = ""
+            if shared:
+                shared_note = (f"\n\n{len(shared)} version(s) share their files with instances and would not free "
+                               f"space: " + ", ".join(sorted(shared)[:5]) + (", ..." if len(shared) > 5 else ""))
+            if not versions:
+                if not automatic:
+                    custom_info(tk._default_root, "Storage",
+                                f"Version folders use {sum(sizes.values()) / mb:.1f} MB "
+                                f"(budget {budget / mb:.1f} MB); nothing to move." + shared_note + store_note())
+                return
+            question = (f"Compress {len(versions)} idle version(s) into cold storage?\n\n"
+                        + "\n".join(f"{version} ({sizes[version] / mb:.1f} MB)" for version in versions[:10])
+                        + ("\n..." if len(versions) > 10 else "")
+                        + f"\n\nVersion folders would use {hot_bytes / mb:.1f} MB (budget {budget / mb:.1f} MB)."
+                        + shared_note)
+            if not centered_askyesno(self.winfo_toplevel(), "Free Space", question):
+                return
+            self.run_job(f"Cold storage for {self.game_name}",
+                         lambda apply_job: apply_cold_storage(self.game, budget, plan=job.result,
+                                                              progress=apply_job.report,
+                                                              cancel_event=apply_job.cancel_event),
+                         on_done=show)
+
+        def plan(job=None):
+            if job is not None:
+                freed[0] = job.result
+            if budget is None:
+                note = store_note() or "\n\nThe file store had nothing to remove."
+                custom_info(tk._default_root, "Storage", "No version disk budget is set (VERSION_DISK_BUDGET in "
+                                                         "config.py), so no versions were moved." + note)
+                return
+            self.run_job(f"Plan cold storage for {self.game_name}",
+                         lambda plan_job: plan_cold_storage(self.game, budget), on_done=confirm)
+
+        if automatic:
+            plan()
+        else:
+            # Blobs are left behind when version or instance folders are deleted outside the launcher.
+            self.run_job("Clean up the file store", lambda job: collect_garbage(), on_done=plan)
+
+    def rehydrate_if_cold(self, version):
+        """Bring a cold version back to a folder in the background after it has been used."""
+        if version == LOCAL_VERSION or catalog.get_version_tier(self.game["VERSIONS_DIR"], version) != "cold":
+            return
+
+        def rehydrated(job):
+            self.rehydrations.append((version, job.result))
+
+        self.run_job(f"Rehydrate version '{version}'",
+                     lambda job: rehydrate_version(version, self.game, progress=job.report,
+                                                   cancel_event=job.cancel_event),
+                     on_done=rehydrated)
+
+    def deleted(self, text, entries):
+        """Refresh after things were moved to the trash and offer to undo it until they are reclaimed."""
+        app = self.winfo_toplevel()
+        app.reaper.notify()
+        self.request_refresh()
+
+        def undo():
+            errors = []
+            for entry in entries:
+                try:
+                    restore_trashed(entry, self.game)
+                except Exception as e:
+                    errors.append(str(e))
+            if errors:
+                custom_error(tk._default_root, "Error", "Could not undo:\n" + "\n".join(errors))
+            self.request_refresh()
+
+        app.jobs_panel.add_undo(text, undo, UNDO_SECONDS)
+
+    def request_refresh(self):
+        """Coalesce refreshes of the instance list and any open manage dialogs."""
+        if self.refresh_pending:
+            return
+        self.refresh_pending = True
+
+        def refresh():
+            self.refresh_pending = False
+            for refresher in list(self.list_refreshers):
+                refresher()
+            if hasattr(self, "tree"):
+                self.populate_instances()
+        self.after_idle(refresh)
+
     def open_selected_main(self):
         path = self.get_selected_instance_path()
         if path:
             open_instance_folder(path)
 
+    def resync_catalog(self):
+        """Re-check the catalog against the folders on disk in the background, then refresh the views."""
+        self.winfo_toplevel().jobs.submit(f"Refresh {self.game_name}", lambda job: sync_catalog(self.game),
+                                          on_done=lambda job: self.request_refresh(), hidden=True)
+
     def manage_instances_dialog(self):
+        # The list shows the catalog right away and is refreshed once the re-check, which picks up
+        # anything the folder watcher missed, is done.
+        self.resync_catalog()
         dialog = tk.Toplevel(self)
         dialog.title("Manage Instances")
         dialog.geometry("400x300")
@@ -504,9 +577,13 @@ class GameTab(tk.Frame):
         dialog.grab_set()
         center_window(dialog, self)
 
-        listbox = tk.Listbox(dialog)
+        # Extended selection: Delete, Clone, Verify / Repair and Re-sync work on every selected instance as one job.
+        listbox = tk.Listbox(dialog, selectmode=tk.EXTENDED)
         listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        def selected_names():
+            return [listbox.get(index) for index in listbox.curselection()]
+
         def refresh_list():
             listbox.delete(0, tk.END)
             global_install = find_install_location(self.game)
@@ -515,26 +592,59 @@ class GameTab(tk.Frame):
                 listbox.insert(tk.END, global_info.get("instance", LOCAL_INSTANCE))
             for instance in list_instances(self.game):
                 listbox.insert(tk.END, instance)
+            # Keep the selection across refreshes, by name.
+            for index in range(listbox.size()):
+                if listbox.get(index) in selection:
+                    listbox.selection_set(index)
+
+        selection = []
+
+        def remember_selection(event=None):
+            selection[:] = selected_names()
 
+        listbox.bind("<<ListboxSelect>>", remember_selection)
         refresh_list()
+        self.list_refreshers.append(refresh_list)
 
         # Right-click context for Instances listbox
         instance_menu = tk.Menu(listbox, tearoff=0)
         instance_menu.add_command(label="Rename", command=lambda: rename_inst())
         instance_menu.add_command(label="Delete", command=lambda: delete_inst())
         instance_menu.add_command(label="Clone", command=lambda: clone_inst())
+        instance_menu.add_command(label="Verify / Repair", command=lambda: verify_inst())
+        instance_menu.add_command(label="Re-sync from Version", command=lambda: resync_inst())
+        instance_menu.add_command(label="Launch Profile", command=lambda: profile_inst())
         instance_menu.add_command(label="Open Folder", command=lambda: open_inst())
 
         def show_inst_menu(event):
             index = listbox.nearest(event.y)
-            listbox.selection_clear(0, tk.END)
-            listbox.selection_set(index)
-            inst = listbox.get(index)
+            if index not in listbox.curselection():
+                listbox.selection_clear(0, tk.END)
+                listbox.selection_set(index)
+            remember_selection()
+            names = selected_names()
             instance_menu = tk.Menu(listbox, tearoff=0)
+            if len(names) > 1:
+                instance_menu.add_command(label=f"Delete {len(names)} Instances", command=lambda: delete_inst())
+                instance_menu.add_command(label=f"Clone {len(names)} Instances", command=lambda: clone_inst())
+                instance_menu.add_command(label=f"Verify / Repair {len(names)} Instances",
+                                          command=lambda: verify_inst())
+                instance_menu.add_command(label=f"Re-sync {len(names)} Instances from their Versions",
+                                          command=lambda: resync_inst())
+                instance_menu.add_command(label=f"Launch Profile of {len(names)} Instances",
+                                          command=lambda: profile_inst())
+                instance_menu.tk_popup(event.x_root, event.y_root)
+                instance_menu.grab_release()
+                return
+            inst = names[0]
             if inst != LOCAL_INSTANCE:
                 instance_menu.add_command(label="Rename", command=lambda: rename_inst())
                 instance_menu.add_command(label="Delete", command=lambda: delete_inst())
             instance_menu.add_command(label="Clone", command=lambda: clone_inst())
+            if inst != LOCAL_INSTANCE:
+                instance_menu.add_command(label="Verify / Repair", command=lambda: verify_inst())
+                instance_menu.add_command(label="Re-sync from Version", command=lambda: resync_inst())
+            instance_menu.add_command(label="Launch Profile", command=lambda: profile_inst())
             instance_menu.add_command(label="Open Folder", command=lambda: open_inst())
             instance_menu.tk_popup(event.x_root, event.y_root)
             instance_menu.grab_release()
@@ -551,64 +661,200 @@ class GameTab(tk.Frame):
                 custom_error(dialog, "Error", "Cannot rename the Global Instance.")
                 return
 
-            def validate_instance_name(name):
-                if not name:
-                    return "Instance name cannot be empty."
-                if name == LOCAL_INSTANCE:
-                    return "Cannot use 'Global Instance' as an instance name."
-                if len(name) > 25:
-                    return "Instance name cannot exceed 25 characters."
-                new_path = os.path.join(self.game["INSTANCES_DIR"], name)
-                if os.path.exists(new_path):
-                    return "An instance with that name already exists."
-                return None
-
             new_name = custom_validated_askstring(tk._default_root, "Rename Instance", "Enter new instance name:",
-                                                  validate_instance_name)
+                                                  lambda name: instance_name_error(self.game, name))
             if not new_name:
                 return
-            old_path = os.path.join(self.game["INSTANCES_DIR"], inst)
-            new_path = os.path.join(self.game["INSTANCES_DIR"], new_name)
             try:
-                os.rename(old_path, new_path)
-
-                # Update the instance metadata with the new name
-                info = get_instance_info(new_path)
-                info["instance"] = new_name
-                write_instance_info(new_path, info)
-
+                rename_instance(inst, new_name, self.game)
                 refresh_list()
                 self.populate_instances()
             except Exception as e:
                 custom_error(tk._default_root, "Error", f"Failed to rename instance: {e}")
 
+        def report_batch_errors(title, results):
+            failed = [f"{name}: {error}" for name, _, error in results
+                      if error is not None and not isinstance(error, CopyCancelled)]
+            if failed:
+                custom_report(tk._default_root, title, f"{len(failed)} of {len(results)} failed.", failed)
+
         def delete_inst():
-            sel = listbox.curselection()
-            if not sel:
-                custom_error(dialog, "Error", "No instance selected.")
+            names = [name for name in selected_names() if name != LOCAL_INSTANCE]
+            if not names:
+                custom_error(dialog, "Error", "No instance selected." if not listbox.curselection()
+                             else "Cannot delete the Global Instance.")
                 return
-            instance_name = listbox.get(sel[0])
-            if instance_name == LOCAL_INSTANCE:
-                custom_error(dialog, "Error", "Cannot delete the Global Instance.")
+            question = (f"Delete instance '{names[0]}'?" if len(names) == 1
+                        else f"Delete {len(names)} instances?\n\n" + "\n".join(names[:10])
+                        + ("\n..." if len(names) > 10 else ""))
+            if not centered_askyesno(self.winfo_toplevel(), "Confirm Delete", question):
                 return
-            instance_path = os.path.join(self.game["INSTANCES_DIR"], instance_name)
-            if centered_askyesno(self.winfo_toplevel(), "Confirm Delete", f"Delete instance '{instance_name}'?"):
-                try:
-                    shutil.rmtree(instance_path)
-                    refresh_list()
-                    self.populate_instances()
-                except Exception as e:
-                    custom_error(dialog, "Error", f"Failed to delete instance: {e}")
+            text = f"Deleted instance '{names[0]}'" if len(names) == 1 else f"Deleted {len(names)} instances"
+
+            def trashed(job):
+                entries = [entry for _, entry, error in job.result if error is None]
+                if entries:
+                    self.deleted(text, entries)
+                report_batch_errors("Delete", job.result)
+
+            self.run_job(f"Delete {len(names)} instance(s)",
+                         lambda job: run_batch(names, lambda name, progress, cancel_event: trash_instance(
+                             os.path.join(self.game["INSTANCES_DIR"], name), self.game),
+                             progress=job.report, cancel_event=job.cancel_event),
+                         on_done=trashed)
 
         def clone_inst():
-            sel = listbox.curselection()
-            if not sel:
+            names = selected_names()
+            if not names:
                 custom_error(dialog, "Error", "No instance selected.")
                 return
-            inst = listbox.get(sel[0])
-            clone_instance(inst, self.game)
-            refresh_list()
-            self.populate_instances()
+            if len(names) == 1:
+                inst = names[0]
+                new_name = ask_clone_instance_name(self.game)
+                if not new_name:
+                    return
+                self.run_job(f"Clone instance '{inst}' as '{new_name}'",
+                             lambda job: clone_instance(inst, new_name, self.game,
+                                                        progress=job.report, cancel_event=job.cancel_event))
+                return
+            new_names = {}
+            for name in names:
+                new_names[name] = next_clone_name(self.game, name, taken=new_names.values())
+            if not centered_askyesno(self.winfo_toplevel(), "Confirm Clone", f"Clone {len(names)} instances?\n\n"
+                                     + "\n".join(f"{name} -> {new_names[name]}" for name in names[:10])
+                                     + ("\n..." if len(names) > 10 else "")):
+                return
+            self.run_job(f"Clone {len(names)} instances",
+                         lambda job: run_batch(names, lambda name, progress, cancel_event: clone_instance(
+                             name, new_names[name], self.game, progress=progress, cancel_event=cancel_event),
+                             progress=job.report, cancel_event=job.cancel_event),
+                         on_done=lambda job: report_batch_errors("Clone", job.result))
+
+        def verify_inst():
+            names = selected_names()
+            if not names:
+                custom_error(dialog, "Error", "No instance selected.")
+                return
+            if len(names) > 1:
+                verify_many([name for name in names if name != LOCAL_INSTANCE])
+                return
+            inst = names[0]
+            if inst == LOCAL_INSTANCE:
+                custom_error(dialog, "Error", "The Global Instance is the Steam installation itself.")
+                return
+            instance_path = os.path.join(self.game["INSTANCES_DIR"], inst)
+
+            def repaired(job):
+                report = job.result
+                self.rehydrate_if_cold(report["version"])
+                custom_info(tk._default_root, "Repair",
+                            f"Restored {report['restored']} files ({report['restored_bytes'] / (1024 * 1024):.1f} MB).")
+
+            def show_report(job):
+                report = job.result
+                drifted = report["missing"] + report["modified"]
+                details = ([f"Missing: {rel}" for rel in report["missing"]] +
+                           [f"Modified: {rel}" for rel in report["modified"]] +
+                           [f"User-added: {rel}" for rel in report["added"]])
+                summary = (f"'{inst}' against '{report['version']}': {report['ok']} files intact, "
+                           f"{len(report['missing'])} missing, {len(report['modified'])} modified, "
+                           f"{len(report['added'])} user-added.")
+                if not drifted:
+                    custom_report(tk._default_root, "Verify", summary, details)
+                elif custom_report(tk._default_root, "Verify", summary + "\nRestore the missing and modified files?",
+                                   details, ask=True):
+                    self.run_job(f"Repair instance '{inst}'",
+                                 lambda repair_job: repair_instance(instance_path, self.game, report,
+                                                                    progress=repair_job.report,
+                                                                    cancel_event=repair_job.cancel_event),
+                                 on_done=repaired)
+
+            self.run_job(f"Verify instance '{inst}'",
+                         lambda job: verify_instance(instance_path, self.game,
+                                                     progress=job.report, cancel_event=job.cancel_event),
+                         on_done=show_report)
+
+        def verify_many(names):
+            """Verify every instance in one job, then offer to repair all the drifted ones in another."""
+            def verify(name, progress, cancel_event):
+                return verify_instance(os.path.join(self.game["INSTANCES_DIR"], name), self.game,
+                                       progress=progress, cancel_event=cancel_event)
+
+            def repaired(job):
+                restored = [(name, report) for name, report, error in job.result if error is None]
+                for version in {report["version"] for _, report in restored}:
+                    self.rehydrate_if_cold(version)
+                files = sum(report["restored"] for _, report in restored)
+                size = sum(report["restored_bytes"] for _, report in restored)
+                custom_info(tk._default_root, "Repair", f"Restored {files} files ({size / (1024 * 1024):.1f} MB) "
+                                                        f"in {len(restored)} instances.")
+                report_batch_errors("Repair", job.result)
+
+            def show_report(job):
+                reports = {name: report for name, report, error in job.result if error is None}
+                drifted = [name for name, report in reports.items() if report["missing"] or report["modified"]]
+                details = []
+                for name, report in reports.items():
+                    details.append(f"{name}: {report['ok']} intact, {len(report['missing'])} missing, "
+                                   f"{len(report['modified'])} modified, {len(report['added'])} user-added")
+                details += [f"{name}: {error}" for name, _, error in job.result
+                            if error is not None and not isinstance(error, CopyCancelled)]
+                summary = f"{len(reports) - len(drifted)} of {len(names)} instances intact, {len(drifted)} drifted."
+                if not drifted:
+                    custom_report(tk._default_root, "Verify", summary, details)
+                elif custom_report(tk._default_root, "Verify", summary + "\nRestore the drifted instances?",
+                                   details, ask=True):
+                    self.run_job(f"Repair {len(drifted)} instances",
+                                 lambda repair_job: run_batch(
+                                     drifted, lambda name, progress, cancel_event: repair_instance(
+                                         os.path.join(self.game["INSTANCES_DIR"], name), self.game, reports[name],
+                                         progress=progress, cancel_event=cancel_event),
+                                     progress=repair_job.report, cancel_event=repair_job.cancel_event),
+                                 on_done=repaired)
+
+            self.run_job(f"Verify {len(names)} instances",
+                         lambda job: run_batch(names, verify, progress=job.report, cancel_event=job.cancel_event),
+                         on_done=show_report)
+
+        def resync_inst():
+            names = [name for name in selected_names() if name != LOCAL_INSTANCE]
+            if not names:
+                custom_error(dialog, "Error", "No instance selected." if not listbox.curselection()
+                             else "The Global Instance is the Steam installation itself.")
+                return
+            which = f"'{names[0]}'" if len(names) == 1 else f"{len(names)} instances"
+            if not centered_askyesno(self.winfo_toplevel(), "Re-sync from Version",
+                                     f"Copy the files that differ from the version into {which}?\n"
+                                     f"Changes made to those files in the instance are replaced.", height=170):
+                return
+            prune = centered_askyesno(self.winfo_toplevel(), "Re-sync from Version",
+                                      "Also delete files an earlier re-sync installed that the version "
+                                      "no longer ships?", height=170)
+
+            def resynced(job):
+                summaries = [summary for _, summary, error in job.result if error is None]
+                for version in {summary["version"] for summary in summaries}:
+                    self.rehydrate_if_cold(version)
+                copied = sum(summary["copied"] for summary in summaries)
+                size = sum(summary["copied_bytes"] for summary in summaries)
+                removed = sum(summary["removed"] for summary in summaries)
+                custom_info(tk._default_root, "Re-sync", f"Copied {copied} files ({size / (1024 * 1024):.1f} MB)"
+                                                         f"{f' and removed {removed}' if prune else ''} "
+                                                         f"in {len(summaries)} instance(s).")
+                report_batch_errors("Re-sync", job.result)
+
+            self.run_job(f"Re-sync {len(names)} instance(s)",
+                         lambda job: run_batch(names, lambda name, progress, cancel_event: resync_instance(
+                             os.path.join(self.game["INSTANCES_DIR"], name), self.game, prune=prune),
+                             progress=job.report, cancel_event=job.cancel_event),
+                         on_done=resynced)
+
+        def profile_inst():
+            names = selected_names()
+            if not names:
+                custom_error(dialog, "Error", "No instance selected.")
+                return
+            self.launch_profile_dialog(names)
 
         def open_inst():
             sel = listbox.curselection()
@@ -630,9 +876,19 @@ class GameTab(tk.Frame):
 
         btn_frame = tk.Frame(dialog)
         btn_frame.pack(pady=5)
+        def stats_report():
+            stats = instance_stats(self.game)
+            details = [format_stats_line(entry) for entry in stats]
+            total = sum(entry["playtime"] for entry in stats)
+            custom_report(tk._default_root, "Stats", f"Total playtime: {format_duration(total)}. "
+                                                     f"CPU, peak memory and disk reads are from each "
+                                                     f"instance's last session.", details)
+
         tk.Button(btn_frame, text="Create New", command=lambda: [self.new_instance_dialog(), refresh_list()]).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Stats", command=stats_report).pack(side=tk.LEFT, padx=5)
         tk.Button(btn_frame, text="Close", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
         dialog.wait_window()
+        self.list_refreshers.remove(refresh_list)
         self.populate_instances()
 
     def new_instance_dialog(self):
@@ -663,17 +919,9 @@ class GameTab(tk.Frame):
 
         def on_create():
             inst_name = instance_var.get().strip()
-            if not inst_name:
-                error_label.config(text="Instance name cannot be empty.")
-                return
-            if inst_name == LOCAL_INSTANCE:
-                error_label.config(text="Cannot use 'Global Instance' as an instance name.")
-                return
-            if len(inst_name) > 25:
-                error_label.config(text="Instance name cannot exceed 25 characters.")
-                return
-            if os.path.exists(os.path.join(self.game["INSTANCES_DIR"], inst_name)):
-                error_label.config(text="An instance with that name already exists.")
+            error = instance_name_error(self.game, inst_name)
+            if error:
+                error_label.config(text=error)
                 return
             ver = selected_version.get()
             force_copy = False
@@ -686,44 +934,142 @@ class GameTab(tk.Frame):
                     return
                 else:
                     force_copy = True
-            result = create_instance(inst_name, ver, self.game, force_copy=force_copy)
-            if result is None or result == "exists":
-                error_label.config(text="Failed to create instance.")
-            else:
-                self.populate_instances()
-                dialog.destroy()
+            instance_path = os.path.join(self.game["INSTANCES_DIR"], inst_name)
+
+            def work(job):
+                result = create_instance(inst_name, ver, self.game, force_copy=force_copy,
+                                         progress=job.report, cancel_event=job.cancel_event)
+                if result != instance_path:
+                    raise RuntimeError("Failed to create instance." if result in (None, "exists") else result)
+                return result
+
+            self.run_job(f"Create instance '{inst_name}'", work, on_done=lambda job: self.rehydrate_if_cold(ver))
+            dialog.destroy()
 
         tk.Button(dialog, text="Create Instance", command=on_create).pack(pady=10)
         dialog.wait_window()
 
+    def launch_profile_dialog(self, names):
+        """Edit the launch profile of the named instances; it starts from the first one's."""
+        dialog = tk.Toplevel(self)
+        dialog.title("Launch Profile")
+        dialog.geometry("320x300")
+        dialog.iconbitmap(MANAGE_ICON)
+        dialog.transient(self)
+        dialog.grab_set()
+        center_window(dialog, self)
+
+        profile = get_launch_profile(names[0], self.game)
+        title = f"'{names[0]}'" if len(names) == 1 else f"{len(names)} instances"
+        tk.Label(dialog, text=f"Launch profile of {title}").pack(pady=5)
+
+        tk.Label(dialog, text="Priority (niceness, -20 high .. 19 low; blank for normal):").pack()
+        nice_var = tk.StringVar(value="" if profile["nice"] is None else str(profile["nice"]))
+        tk.Entry(dialog, textvariable=nice_var).pack(pady=2)
+
+        tk.Label(dialog, text=f"CPUs (e.g. 0-3,6; blank for all {os.cpu_count() or 1}):").pack()
+        cpus_var = tk.StringVar(value=format_cpus(profile["cpus"]))
+        tk.Entry(dialog, textvariable=cpus_var).pack(pady=2)
+
+        tk.Label(dialog, text="Only start while fewer than this many games run:").pack()
+        cap_var = tk.StringVar(value="" if profile["max_running"] is None else str(profile["max_running"]))
+        tk.Entry(dialog, textvariable=cap_var).pack(pady=2)
+
+        error_label = tk.Label(dialog, text="", fg="red")
+        error_label.pack(pady=5)
+
+        def number(text, what):
+            text = text.strip()
+            if not text:
+                return None
+            try:
+                return int(text)
+            except ValueError:
+                raise ValueError(f"{what} must be a whole number.")
+
+        def on_save():
+            try:
+                new_profile = {"nice": number(nice_var.get(), "Priority"), "cpus": parse_cpus(cpus_var.get()),
+                               "max_running": number(cap_var.get(), "The running limit")}
+            except ValueError as e:
+                error_label.config(text=str(e))
+                return
+            error = profile_error(new_profile)
+            if error:
+                error_label.config(text=error)
+                return
+            failed = []
+            for name in names:
+                try:
+                    set_launch_profile(name, self.game, new_profile)
+                except (OSError, ValueError) as e:
+                    failed.append(f"{name}: {e}")
+            dialog.destroy()
+            if failed:
+                custom_report(tk._default_root, "Launch Profile", f"{len(failed)} of {len(names)} failed.", failed)
+            else:
+                self.winfo_toplevel().jobs_panel.add_note(f"Launch profile of {title}: {describe(new_profile)}",
+                                                          NOTE_SECONDS)
+
+        btn_frame = tk.Frame(dialog)
+        btn_frame.pack(pady=5)
+        tk.Button(btn_frame, text="Save", command=on_save).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Cancel", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+        dialog.wait_window()
+
     def new_version_dialog(self):
         new_version_dialog(self.game, self)
 
     def populate_instances(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        global_install = find_install_location(self.game)
-        if global_install:
+        """
+        Refresh the instance list by diffing it against what the tree already shows.
+        Only added, removed or changed rows touch Tk, and selection and scroll position are kept.
+        """
+        infos = []
+        if self.install_path:
             global_info = get_global_instance_info(self.game)
-            self.tree.insert("", "end", values=(global_info.get("instance", LOCAL_INSTANCE),
-                                                 global_info.get("version", LOCAL_VERSION),
-                                                 global_info.get("last_played", "")))
-        for inst in list_instances(self.game):
-            inst_path = os.path.join(self.game["INSTANCES_DIR"], inst)
-            info_file = os.path.join(inst_path, "instance_info.json")
-            if os.path.exists(info_file):
-                try:
-                    with open(info_file, "r") as f:
-                        info = json.load(f)
-                except Exception:
-                    info = {"instance": inst, "version": "", "last_played": ""}
-            else:
-                info = {"instance": inst, "version": "", "last_played": ""}
-            self.tree.insert("", "end", values=(info.get("instance", inst),
-                                                 info.get("version", ""),
-                                                 info.get("last_played", "")))
+            global_info.setdefault("instance", LOCAL_INSTANCE)
+            global_info.setdefault("version", LOCAL_VERSION)
+            infos.append(global_info)
+        infos.extend(info for info in list_instance_infos(self.game["INSTANCES_DIR"])
+                     if info["instance"] != LOCAL_INSTANCE)
+        self.snapshot = {"install_path": self.install_path,
+                         "instances": [{key: info.get(key) for key in self.SNAPSHOT_KEYS} for info in infos]}
+        self.apply_rows({info["instance"]: self.row_for(info) for info in infos})
+
+    @staticmethod
+    def row_for(info):
+        """Return (display values, sort keys) for an instance info dict."""
+        ts = played_timestamp(info)
+        name = str(info["instance"])
+        version = str(info.get("version", ""))
+        last_played = format_played(ts) if ts else info.get("last_played", "")
+        return (name, version, last_played), (name, version, ts if ts is not None else float("-inf"))
+
+    def apply_rows(self, rows):
+        """Make the tree show rows ({name: (values, sort keys)}) with the minimum number of Tk calls."""
+        yview = self.tree.yview()
+        removed = [iid for iid in self.row_values if iid not in rows]
+        if removed:
+            self.tree.delete(*removed)
+            for iid in removed:
+                del self.row_values[iid]
+                del self.row_keys[iid]
+            removed_set = set(removed)
+            self.row_order = [iid for iid in self.row_order if iid not in removed_set]
+        for iid, (values, keys) in rows.items():
+            old = self.row_values.get(iid)
+            if old is None:
+                self.tree.insert("", "end", iid=iid, values=values)
+                self.row_order.append(iid)
+            elif old != values:
+                self.tree.item(iid, values=values)
+            self.row_values[iid] = values
+            self.row_keys[iid] = keys
         self.sort_tree(self.sort_column, self.sort_reverse)
-        self.set_action_buttons_state(False)
+        if self.tree.yview() != yview:
+            self.tree.yview_moveto(yview[0])
+        self.on_instance_select(None)
 
     def sort_by(self, column):
         if self.sort_column == column:
@@ -734,17 +1080,29 @@ class GameTab(tk.Frame):
         self.sort_tree(self.sort_column, self.sort_reverse)
 
     def sort_tree(self, col, reverse):
-        items = [(self.tree.set(k, col), k) for k in self.tree.get_children("")]
-        if col == "last_played":
-            def conv(x):
-                try:
-                    return datetime.datetime.strptime(x, "%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    return datetime.datetime.min
-            items = [(conv(val), k) for (val, k) in items]
-        items.sort(reverse=reverse)
-        for index, (val, k) in enumerate(items):
-            self.tree.move(k, "", index)
+        index = self.tree["columns"].index(col)
+        keys = self.row_keys
+        self.reorder_rows(sorted(self.row_order, key=lambda k: (keys[k][index], k), reverse=reverse))
+
+    def reorder_rows(self, order):
+        """
+        Reorder the tree to order with as few tree.move calls as possible: the longest run of rows
+        already in the right relative order stays put and only the others are moved.
+        """
+        current = self.row_order
+        if current == order:
+            return
+        position = {iid: index for index, iid in enumerate(current)}
+        keep = longest_increasing_run([position[iid] for iid in order])
+        keep = {order[index] for index in keep}
+        prev = None
+        for iid in order:
+            if iid not in keep:
+                current.remove(iid)
+                index = current.index(prev) + 1 if prev is not None else 0
+                self.tree.move(iid, "", index)
+                current.insert(index, iid)
+            prev = iid
 
     def on_instance_select(self, event):
         if self.tree.selection():
@@ -765,36 +1123,58 @@ class GameTab(tk.Frame):
         if selected:
             item = self.tree.item(selected[0])
             inst_name = str(item["values"][0])
-            if inst_name == LOCAL_INSTANCE:
-                return find_install_location(self.game)
-            else:
-                return os.path.join(self.game["INSTANCES_DIR"], inst_name)
+            return get_instance_path(inst_name, self.game)
         return None
 
     def start_instance(self):
         selected = self.tree.selection()
         if selected:
             item = self.tree.item(selected[0])
-            inst_name = item["values"][0]
-            path = self.get_selected_instance_path()
-            if path:
-                launch_game(path, self.game)
-                if inst_name == LOCAL_INSTANCE:
-                    global_info = get_global_instance_info(self.game)
-                    global_info["last_played"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    write_global_instance_info(self.game, global_info)
-                else:
-                    info_file = os.path.join(path, "instance_info.json")
-                    info = {}
-                    if os.path.exists(info_file):
-                        try:
-                            with open(info_file, "r") as f:
-                                info = json.load(f)
-                        except Exception:
-                            info = {}
-                    info["last_played"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    write_instance_info(path, info)
-                self.populate_instances()
+            inst_name = str(item["values"][0])
+            app = self.winfo_toplevel()
+            waiting = []
+
+            def launch():
+                for frame in waiting:
+                    frame.destroy()
+                self.launch(inst_name)
+
+            # Over the running-instance limit the launch waits in the queue until a game exits.
+            request = app.launch_queue.request(inst_name, launch_cap(inst_name, self.game), launch)
+            if request is not None:
+                reason = f"limit {request['cap']} running" if request["cap"] is not None else "queued behind others"
+                waiting.append(app.jobs_panel.add_waiting(f"'{inst_name}' starts when a game exits ({reason})",
+                                                          lambda: app.launch_queue.cancel(request)))
+
+    def launch(self, inst_name):
+        app = self.winfo_toplevel()
+        # Starting the game (and warming its startup files) runs on a worker; until the supervisor
+        # watches it, it still counts against the running-instance limits.
+        app.launch_queue.hold()
+
+        def started(job):
+            process, startup = job.result
+            app.supervisor.watch(process, inst_name, self.game)
+            app.launch_queue.release()
+            self.populate_instances()
+            if startup:
+
+                def measured(job):
+                    if job.result["ready"] is not None:
+                        summary = format_summary(summarize(load_profile(prefetch_profile_path(inst_name, self.game))))
+                        app.jobs_panel.add_note(f"'{inst_name}': {summary}", NOTE_SECONDS)
+
+                app.jobs.submit(f"Measure startup of '{inst_name}'", lambda job: startup(), on_done=measured,
+                                hidden=True)
+
+        def failed(job):
+            app.launch_queue.release()
+            # A missing exe, but also no permission, a bad executable, a locked file, ...
+            reason = getattr(job.error, "strerror", None) or job.error
+            custom_error(tk._default_root, "Error", f"Could not start '{inst_name}': {reason}")
+
+        app.jobs.submit(f"Launch '{inst_name}'", lambda job: launch_instance(inst_name, self.game),
+                        on_done=started, on_error=failed, hidden=True)
 
     def open_instance(self):
         path = self.get_selected_instance_path()
@@ -802,6 +1182,7 @@ class GameTab(tk.Frame):
             open_instance_folder(path)
 
     def manage_versions_dialog(self):
+        self.resync_catalog()
         dialog = tk.Toplevel(self)
         dialog.title("Manage Versions")
         dialog.geometry("400x300")
@@ -820,8 +1201,10 @@ class GameTab(tk.Frame):
                 listbox.insert(tk.END, v)
 
         refresh_list()
+        self.list_refreshers.append(refresh_list)
 
         version_menu = tk.Menu(listbox, tearoff=0)
+        version_menu.add_command(label="Rename", command=lambda: rename_selected_version())
         version_menu.add_command(label="Delete", command=lambda: delete_version())
         version_menu.add_command(label="Clone", command=lambda: in_clone_version())
         version_menu.add_command(label="Open Folder", command=lambda: open_version())
@@ -833,7 +1216,11 @@ class GameTab(tk.Frame):
             ver = listbox.get(index)
             version_menu = tk.Menu(listbox, tearoff=0)
             if ver != LOCAL_VERSION:
+                version_menu.add_command(label="Rename", command=lambda: rename_selected_version())
                 version_menu.add_command(label="Delete", command=lambda: delete_version())
+                if os.path.isdir(os.path.join(self.game["VERSIONS_DIR"], ver)):
+                    version_menu.add_command(label="Compress", command=lambda: compress_selected_version())
+                    version_menu.add_command(label="Store as Delta", command=lambda: delta_selected_version())
             version_menu.add_command(label="Clone", command=lambda: in_clone_version())
             version_menu.add_command(label="Open Folder", command=lambda: open_version())
             version_menu.tk_popup(event.x_root, event.y_root)
@@ -851,39 +1238,24 @@ class GameTab(tk.Frame):
                 custom_error(dialog, "Error", "Cannot rename the vanilla version.")
                 return
 
-            def validate_version_name(name):
-                if not name:
-                    return "Version name cannot be empty."
-                if name == LOCAL_VERSION:
-                    return "Cannot use 'Steam Version' as a version name."
-                if len(name) > 25:
-                    return "Version name cannot exceed 25 characters."
-                new_path = os.path.join(self.game["VERSIONS_DIR"], name)
-                if os.path.exists(new_path):
-                    return "A version with that name already exists."
-                return None
-
             new_name = custom_validated_askstring(tk._default_root, "Rename Version", "Enter new version name:",
-                                                  validate_version_name)
+                                                  lambda name: version_name_error(self.game, name))
             if not new_name:
                 return
-            old_path = os.path.join(self.game["VERSIONS_DIR"], ver)
-            new_path = os.path.join(self.game["VERSIONS_DIR"], new_name)
+            old_path = get_version_source(ver, self.game)
+            # Archives and deltas keep their suffix.
+            new_path = (os.path.join(self.game["VERSIONS_DIR"], new_name)
+                        + old_path[len(os.path.join(self.game["VERSIONS_DIR"], ver)):])
             try:
                 os.rename(old_path, new_path)
-                custom_info(tk._default_root, "Rename", f"Version renamed to '{new_name}'.")
-
-                # Update metadata in all instances that reference the old version:
-                def update_instances_version(game, old_ver, new_ver):
-                    for inst in list_instances(game):
-                        inst_path = os.path.join(game["INSTANCES_DIR"], inst)
-                        info = get_instance_info(inst_path)
-                        if info.get("version") == old_ver:
-                            info["version"] = new_ver
-                            write_instance_info(inst_path, info)
-
-                update_instances_version(self.game, ver, new_name)
+                rename_version_manifest(self.game, ver, new_name)
+                catalog.rename_version(self.game["VERSIONS_DIR"], ver, new_name)
+                # Update metadata in only the instances that reference the old version:
+                updated = retarget_version(self.game["INSTANCES_DIR"], ver, new_name)
+                custom_info(tk._default_root, "Rename",
+                            f"Version renamed to '{new_name}'. {len(updated)} instance(s) updated.")
                 refresh_list()
+                self.request_refresh()
             except Exception as e:
                 custom_error(tk._default_root, "Error", f"Failed to rename version: {e}")
 
@@ -896,13 +1268,81 @@ class GameTab(tk.Frame):
             if ver == LOCAL_VERSION:
                 custom_error(dialog, "Error", "Cannot delete the vanilla version.")
                 return
-            ver_path = os.path.join(self.game["VERSIONS_DIR"], ver)
-            if centered_askyesno(self.winfo_toplevel(), "Confirm Delete", f"Delete version '{ver}'?"):
+            dependents = instances_using_version(self.game["INSTANCES_DIR"], ver)
+            message = f"Delete version '{ver}'?"
+            height = 150
+            if dependents:
+                shown = ", ".join(dependents[:5]) + (f" and {len(dependents) - 5} more" if len(dependents) > 5 else "")
+                message += f"\n{len(dependents)} instance(s) were created from it: {shown}."
+                height = 200
+            if centered_askyesno(self.winfo_toplevel(), "Confirm Delete", message, height=height):
                 try:
-                    shutil.rmtree(ver_path)
-                    refresh_list()
+                    entry = trash_version(ver, self.game)
                 except Exception as e:
-                    custom_error(dialog, "Error", f"Failed to delete version: {e}")
+                    custom_error(tk._default_root, "Error", f"Failed to delete version: {e}")
+                    return
+                self.deleted(f"Deleted version '{ver}'", [entry])
+
+        def compress_selected_version():
+            sel = listbox.curselection()
+            if not sel:
+                custom_error(dialog, "Error", "No version selected.")
+                return
+            ver = listbox.get(sel[0])
+
+            def compressed(job):
+                saved = job.result["folder_bytes"] - job.result["archive_bytes"]
+                print(f"[INFO] Compressing '{ver}' saved {saved / (1024 * 1024):.1f} MB")
+
+            self.run_job(f"Compress version '{ver}'",
+                         lambda job: compress_version(ver, self.game, progress=job.report,
+                                                      cancel_event=job.cancel_event), on_done=compressed)
+
+        def delta_selected_version():
+            sel = listbox.curselection()
+            if not sel:
+                custom_error(dialog, "Error", "No version selected.")
+                return
+            ver = listbox.get(sel[0])
+
+            def stored(job):
+                print(f"[INFO] Stored '{ver}' as a delta of {job.result['changed']} changed files "
+                      f"({job.result['delta_bytes'] / (1024 * 1024):.1f} MB)")
+
+            self.run_job(f"Store version '{ver}' as a delta",
+                         lambda job: convert_version_to_delta(ver, self.game, progress=job.report,
+                                                              cancel_event=job.cancel_event), on_done=stored)
+
+        def import_archive():
+            path = custom_askstring(tk._default_root, "Import",
+                                    "Enter the path of a .zip or a folder of the game\n"
+                                    "(folders are stored as a delta against the Steam Version):")
+            if not path:
+                return
+            path = path.strip().strip('"')
+            if os.path.isdir(path):
+                name = os.path.basename(os.path.normpath(path))[:25]
+                error = version_name_error(self.game, name)
+                if error:
+                    custom_error(dialog, "Error", f"Cannot import as '{name}': {error}")
+                    return
+                self.run_job(f"Import version '{name}'",
+                             lambda job: store_version_delta(path, name, self.game, progress=job.report,
+                                                             cancel_event=job.cancel_event))
+                return
+            if not os.path.isfile(path) or not zipfile.is_zipfile(path):
+                custom_error(dialog, "Error", "That is not a zip file or a folder.")
+                return
+            name = os.path.basename(path)[:-len(ARCHIVE_SUFFIX)] if path.lower().endswith(ARCHIVE_SUFFIX) \
+                else os.path.basename(path)
+            name = name[:25]
+            error = version_name_error(self.game, name)
+            if error:
+                custom_error(dialog, "Error", f"Cannot import as '{name}': {error}")
+                return
+            self.run_job(f"Import version '{name}'",
+                         lambda job: import_version_archive(path, name, self.game, progress=job.report,
+                                                            cancel_event=job.cancel_event))
 
         def in_clone_version():
             sel = listbox.curselection()
@@ -910,8 +1350,12 @@ class GameTab(tk.Frame):
                 custom_error(dialog, "Error", "No version selected.")
                 return
             ver = listbox.get(sel[0])
-            clone_version(ver, self.game)  # calls helper
-            refresh_list()
+            new_name = ask_clone_version_name(self.game)
+            if not new_name:
+                return
+            self.run_job(f"Clone version '{ver}' as '{new_name}'",
+                         lambda job: clone_version(ver, new_name, self.game,
+                                                   progress=job.report, cancel_event=job.cancel_event))
 
         def open_version():
             sel = listbox.curselection()
@@ -925,8 +1369,10 @@ class GameTab(tk.Frame):
                     custom_error(dialog, "Error", "Installation not found.")
                     return
             else:
-                folder = os.path.join(self.game["VERSIONS_DIR"], ver)
-            if os.path.exists(folder):
+                folder = get_version_source(ver, self.game) or os.path.join(self.game["VERSIONS_DIR"], ver)
+            if os.path.isfile(folder):
+                subprocess.Popen(["explorer", "/select,", folder])
+            elif os.path.exists(folder):
                 subprocess.Popen(["explorer", folder])
             else:
                 custom_error(dialog, "Error", "Folder not found.")
@@ -934,17 +1380,180 @@ class GameTab(tk.Frame):
         btn_frame = tk.Frame(dialog)
         btn_frame.pack(pady=5)
         tk.Button(btn_frame, text="Create New", command=lambda: [self.new_version_dialog(), refresh_list()]).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Import", command=import_archive).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Free Space", command=lambda: self.free_space()).pack(side=tk.LEFT, padx=5)
         tk.Button(btn_frame, text="Close", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
         dialog.wait_window()
+        self.list_refreshers.remove(refresh_list)
+
+
+NOTE_SECONDS = 15
+
+
+class JobsPanel(tk.Frame):
+    """Shows queued, running and failed background jobs with their progress."""
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.rows = {}
+
+    def update_job(self, job):
+        if job.hidden:
+            return
+        row = self.rows.get(job.id)
+        if row is None:
+            frame = tk.Frame(self)
+            frame.pack(fill=tk.X, padx=10, pady=2)
+            label = tk.Label(frame, text=job.title, anchor="w", width=30)
+            label.pack(side=tk.LEFT)
+            bar = ttk.Progressbar(frame, length=150, mode="determinate")
+            bar.pack(side=tk.LEFT, padx=5)
+            state_label = tk.Label(frame, text="", width=10, anchor="w")
+            state_label.pack(side=tk.LEFT)
+            button = tk.Button(frame, text="Cancel", command=job.cancel)
+            button.pack(side=tk.RIGHT)
+            row = {"frame": frame, "label": label, "bar": bar, "state": state_label, "button": button}
+            self.rows[job.id] = row
+
+        row["state"].config(text=job.state, fg="red" if job.state == FAILED else "black")
+        if job.state == RUNNING:
+            self.update_progress(job)
+        elif job.state == DONE:
+            if isinstance(job.result, dict) and "strategy" in job.result:
+                row["label"].config(text=f"{job.title}: {format_copy_stats(job.result)}", width=0)
+            row["bar"].stop()
+            row["bar"].config(mode="determinate", value=100, maximum=100)
+            row["button"].config(state=tk.DISABLED)
+            self.after(3000, lambda: self.remove_job(job))
+        elif job.state in (FAILED, CANCELLED):
+            row["bar"].stop()
+            row["button"].config(text="Dismiss", command=lambda: self.remove_job(job))
+
+    def update_progress(self, job):
+        row = self.rows.get(job.id)
+        if row is None or job.state != RUNNING:
+            return
+        done, total = job.progress
+        bar = row["bar"]
+        if total:
+            if str(bar["mode"]) != "determinate":
+                bar.stop()
+                bar.config(mode="determinate")
+            bar.config(maximum=total, value=done)
+        elif str(bar["mode"]) != "indeterminate":
+            bar.config(mode="indeterminate")
+            bar.start(15)
+
+    def remove_job(self, job):
+        row = self.rows.pop(job.id, None)
+        if row is not None:
+            row["frame"].destroy()
+        self.winfo_toplevel().jobs.forget(job)
+
+    def add_undo(self, text, undo, seconds):
+        """Show text with an Undo button that calls undo(), for the given number of seconds."""
+        frame = tk.Frame(self)
+        frame.pack(fill=tk.X, padx=10, pady=2)
+        tk.Label(frame, text=text, anchor="w").pack(side=tk.LEFT)
+
+        def on_undo():
+            frame.destroy()
+            undo()
+
+        tk.Button(frame, text="Undo", command=on_undo).pack(side=tk.RIGHT)
+        self.after(int(seconds * 1000), frame.destroy)
+
+    def add_waiting(self, text, cancel):
+        """Show text with a Cancel button that calls cancel(). Returns the row, for the caller to destroy."""
+        frame = tk.Frame(self)
+        frame.pack(fill=tk.X, padx=10, pady=2)
+        tk.Label(frame, text=text, anchor="w").pack(side=tk.LEFT)
+
+        def on_cancel():
+            frame.destroy()
+            cancel()
+
+        tk.Button(frame, text="Cancel", command=on_cancel).pack(side=tk.RIGHT)
+        return frame
+
+    def add_note(self, text, seconds):
+        """Show text for the given number of seconds."""
+        label = tk.Label(self, text=text, anchor="w")
+        label.pack(fill=tk.X, padx=10, pady=2)
+        self.after(int(seconds * 1000), label.destroy)
 
 
 class LauncherGUI(tk.Tk):
+    JOB_POLL_MS = 100
+
     def __init__(self):
         super().__init__()
         self.title(f"CMLauncher {VERSION}")
         self.geometry("600x500")
         self.iconbitmap(BASE_ICON)
+        self.jobs = JobQueue()
+        # Reclaims deleted instances and versions in the background, starting with leftovers.
+        self.reaper = Reaper([game["TRASH_DIR"] for game in games.values()])
+        self.reaper.start()
+        # Tracks launched games and adds each session to the instance's metadata when it exits.
+        self.supervisor = Supervisor(on_exit=lambda session: record_session(session.instance_name, session.game,
+                                                                            session.summary()))
+        self.launch_queue = LaunchQueue(self.supervisor)
+        self.jobs_panel = JobsPanel(self)
+        self.jobs_panel.pack(side=tk.BOTTOM, fill=tk.X)
         self.create_tabs()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(self.JOB_POLL_MS, self.poll_jobs)
+
+    def poll_jobs(self):
+        # Reschedule first so callbacks that open modal dialogs don't stall the jobs panel.
+        self.after(self.JOB_POLL_MS, self.poll_jobs)
+        for job in self.jobs.poll():
+            self.jobs_panel.update_job(job)
+            if job.finished:
+                callback = job.on_done if job.state == DONE else job.on_error
+                if callback:
+                    self.after_idle(callback, job)
+                if job.hidden:
+                    self.jobs.forget(job)
+        for job in self.jobs.active():
+            self.jobs_panel.update_progress(job)
+        ended = self.supervisor.poll()
+        for session in ended:
+            self.session_ended(session)
+        if ended:
+            self.launch_queue.dispatch()
+
+    def session_ended(self, session):
+        summary = session.summary()
+        text = f"'{session.instance_name}' closed after {format_duration(summary['seconds'])}"
+        if summary["exit_code"]:
+            text += f" (exit code {summary['exit_code']})"
+        self.jobs_panel.add_note(text, NOTE_SECONDS)
+        for tab in self.game_tabs:
+            if tab.game is session.game:
+                tab.request_refresh()
+
+    def on_close(self):
+        if self.jobs.active() and not centered_askyesno(self, "Confirm Exit",
+                                                        "Background jobs are still running. Cancel them and exit?"):
+            return
+        self.jobs.shutdown()
+        self.reaper.stop()
+        self.supervisor.stop()
+        for tab in self.game_tabs:
+            if tab.watcher is not None:
+                tab.watcher.stop()
+        self.save_snapshot()
+        self.destroy()
+
+    def save_snapshot(self):
+        """Save what every game tab last showed so the next start can paint it immediately."""
+        snapshot = {tab.game_name: tab.snapshot for tab in self.game_tabs if tab.snapshot}
+        try:
+            write_snapshot(snapshot)
+        except OSError as e:
+            print(f"[WARN] Could not save the startup snapshot: {e}")
 
     def create_tabs(self):
         notebook = ttk.Notebook(self)
@@ -953,17 +1562,21 @@ class LauncherGUI(tk.Tk):
         home_tab = HomeTab(notebook)
         notebook.add(home_tab, text="Home")
 
+        snapshot = read_snapshot()
+        self.game_tabs = []
         for game_name, game in games.items():
-            game_tab = GameTab(notebook, game_name, game)
+            game_tab = GameTab(notebook, game_name, game, snapshot.get(game_name))
             notebook.add(game_tab, text=game_name)
+            self.game_tabs.append(game_tab)
+        # Game tabs are built the first time they are shown.
+        notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
-
-def initial_setup():
-    for game in games.values():
-        ensure_game_folders(game)
+    def on_tab_changed(self, event):
+        tab = event.widget.nametowidget(event.widget.select())
+        if isinstance(tab, GameTab):
+            tab.load()
 
 
 if __name__ == "__main__":
-    initial_setup()
     app = LauncherGUI()
     app.mainloop()
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import LOCAL_VERSION
+from copy_engine import scan_tree, CopyCancelled
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_FORMAT = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+MMAP_SIZE = 4 * 1024 * 1024
+HASH_WORKERS = os.cpu_count() or 1
+
+# Files the launcher itself keeps inside version and instance folders.
+LAUNCHER_FILES = {"store_links.json", "instance_info.json", "overlay_manifest.json", "steam_appid.txt", "prefetch.json"}
+
+# A manifest maps each relative path of a folder to
+#   {"size": bytes, "mtime": st_mtime_ns, "strong": sha256 hex}.
+# size and mtime are the cheap check; the strong hash (also the file store digest) is only
+# computed for files whose size or mtime changed.
+
+
+def version_manifest_path(game, version):
+    """Manifests are stored next to the version folder, e.g. Versions/1.9.manifest.json."""
+    return os.path.join(game["VERSIONS_DIR"], version + MANIFEST_SUFFIX)
+
+
+def hash_file(path, size=None):
+    """Return the sha256 hex digest of a file, reading large files through mmap."""
+    if size is None:
+        size = os.path.getsize(path)
+    strong = hashlib.sha256()
+    with open(path, "rb") as f:
+        if size >= MMAP_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    for offset in range(0, len(view), HASH_CHUNK_SIZE):
+                        with view[offset:offset + HASH_CHUNK_SIZE] as chunk:
+                            strong.update(chunk)
+        else:
+            while True:
+                chunk = f.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                strong.update(chunk)
+    return strong.hexdigest()
+
+
+def load_manifest(manifest_file):
+    """Return the files dict of a manifest, or {} if it is missing or unreadable."""
+    if os.path.exists(manifest_file):
+        try:
+            with open(manifest_file, "r") as f:
+                data = json.load(f)
+            if data.get("format") == MANIFEST_FORMAT:
+                return data["files"]
+        except Exception:
+            pass
+    return {}
+
+
+def save_manifest(manifest_file, files):
+    # Per-thread temp name: concurrent operations on the same version may save at the same time.
+    tmp = f"{manifest_file}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"format": MANIFEST_FORMAT, "files": files}, f)
+    os.replace(tmp, manifest_file)
+
+
+def stat_tree(folder):
+    """Return {relative path: (size, mtime_ns)} for every file in folder except launcher files."""
+    result = {}
+    _, files = scan_tree(folder)
+    for rel, _ in files:
+        if rel in LAUNCHER_FILES:
+            continue
+        st = os.stat(os.path.join(folder, rel))
+        result[rel] = (st.st_size, st.st_mtime_ns)
+    return result
+
+
+def update_manifest(folder, manifest_file, progress=None, cancel_event=None, workers=HASH_WORKERS):
+    """
+    Bring the manifest of folder up to date and return its files dict.
+    Only files whose size or mtime changed since the last update are hashed, in parallel.
+    """
+    start = time.perf_counter()
+    old = load_manifest(manifest_file)
+    stats = stat_tree(folder)
+    files = {}
+    todo = []
+    for rel, (size, mtime) in stats.items():
+        entry = old.get(rel)
+        if entry and entry["size"] == size and entry["mtime"] == mtime:
+            files[rel] = entry
+        else:
+            todo.append((rel, size, mtime))
+
+    total = sum(size for _, size, _ in todo)
+    done = 0
+
+    def work(item):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CopyCancelled("Hashing cancelled.")
+        rel, size, mtime = item
+        return rel, {"size": size, "mtime": mtime, "strong": hash_file(os.path.join(folder, rel), size)}
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for rel, entry in pool.map(work, todo):
+                files[rel] = entry
+                done += entry["size"]
+                if progress:
+                    progress(done, total)
+    if files != old:
+        save_manifest(manifest_file, files)
+    if todo:
+        print(f"[INFO] Hashed {len(todo)} of {len(files)} files for '{folder}' "
+              f"in {time.perf_counter() - start:.2f}s")
+    return files
+
+
+def update_version_manifest(game, version, source_path, progress=None, cancel_event=None):
+    """Update and return the manifest for a version whose files live in source_path."""
+    return update_manifest(source_path, version_manifest_path(game, version),
+                           progress=progress, cancel_event=cancel_event)
+
+
+def diff_manifests(old, new):
+    """Return (added, removed, changed) relative paths between two manifest files dicts."""
+    added = sorted(rel for rel in new if rel not in old)
+    removed = sorted(rel for rel in old if rel not in new)
+    changed = sorted(rel for rel in new if rel in old and new[rel]["strong"] != old[rel]["strong"])
+    return added, removed, changed
+
+
+def strong_hashes(files):
+    """Return {relative path: sha256} from a manifest files dict."""
+    return {rel: entry["strong"] for rel, entry in files.items()}
+
+
+def rename_version_manifest(game, old_version, new_version):
+    old_path = version_manifest_path(game, old_version)
+    if old_version != LOCAL_VERSION and os.path.exists(old_path):
+        os.replace(old_path, version_manifest_path(game, new_version))
+
+
+def delete_version_manifest(game, version):
+    path = version_manifest_path(game, version)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def verify_tree(folder, files, progress=None, cancel_event=None, workers=HASH_WORKERS):
+    """
+    Compare folder against a manifest files dict.
+    A stat pass clears files whose size and mtime match; only the remaining suspects are hashed.
+    Returns {"missing": [...], "modified": [...], "added": [...], "ok": count}.
+    """
+    current = stat_tree(folder)
+    missing = []
+    modified = []
+    suspects = []
+    ok = 0
+    for rel, entry in files.items():
+        st = current.get(rel)
+        if st is None:
+            missing.append(rel)
+        elif st[0] != entry["size"]:
+            modified.append(rel)
+        elif st[1] == entry["mtime"]:
+            ok += 1
+        else:
+            suspects.append(rel)
+    added = sorted(rel for rel in current if rel not in files)
+
+    total = sum(files[rel]["size"] for rel in suspects)
+    done = 0
+
+    def check(rel):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CopyCancelled("Verify cancelled.")
+        return rel, hash_file(os.path.join(folder, rel), files[rel]["size"]) == files[rel]["strong"]
+
+    if suspects:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for rel, same in pool.map(check, suspects):
+                if same:
+                    ok += 1
+                else:
+                    modified.append(rel)
+                done += files[rel]["size"]
+                if progress:
+                    progress(done, total)
+    return {"missing": sorted(missing), "modified": sorted(modified), "added": added, "ok": ok,
+            "hashed": len(suspects)}
@@ -0,0 +1,1042 @@
+import os
+import shutil
+import subprocess
+import threading
+import time
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from copy_engine import copy_tree, format_copy_stats, scan_tree, CopyCancelled
+from config import LOCAL_VERSION, LOCAL_INSTANCE, games, INSTALL_PATHS_FILE, SNAPSHOT_FILE, VERSION_DISK_BUDGET, \
+    COLD_MIN_IDLE_DAYS, PREFETCH, PREFETCH_RECORD_SECONDS, PREFETCH_BASELINE_EVERY, MAX_RUNNING_INSTANCES
+from manifest import update_version_manifest, version_manifest_path, load_manifest, save_manifest, \
+    strong_hashes, delete_version_manifest, verify_tree, hash_file
+from file_store import link_tree, remove_tree, remove_file, detach_file, detach_private, restore_file, read_links, \
+    folder_usage, STORE_LINKS_FILE
+import catalog
+import steam_library
+from instance_info import write_instance_info, get_instance_info, get_global_instance_info, write_global_instance_info, \
+    rename_instance_info, delete_instance_info, mark_played, list_instance_infos, sync_instance_infos, \
+    refresh_instance_infos
+from trash import move_to_trash, restore
+from launch_profile import empty_profile, profile_error, creation_flags, child_setup, apply_profile, PROFILE_KEYS
+from prefetch import PREFETCH_FILE, load_profile, start_warm, can_observe, record_startup, summarize, format_summary, \
+    baseline_due, cached_fraction, warm_cache
+from version_archive import archive_path, list_archives, pack_tree, index_archive, extract_archive, extract_files
+from version_delta import delta_path, list_deltas, create_delta, read_index, check_baseline, delta_manifest, \
+    materialize_files, materialize_delta, DELTA_SUFFIX
+
+# Instance and version operations shared by the launcher window (main.py) and the command line
+# (cli.py). Nothing here may prompt or import tkinter: failures are raised or returned.
+
+install_paths_lock = threading.Lock()
+
+# Resolved install location per game: APP_ID -> (path, exe stat signature), or (None, None) for
+# "not installed". Entries are revalidated with one stat of the exe and dropped by
+# invalidate_install_location whenever the candidates change or something fails.
+_install_cache = {}
+_install_cache_lock = threading.Lock()
+
+
+def read_install_paths():
+    if os.path.exists(INSTALL_PATHS_FILE):
+        with open(INSTALL_PATHS_FILE, "r") as f:
+            return json.load(f)
+    return {}
+
+def write_install_paths(paths):
+    with open(INSTALL_PATHS_FILE, "w") as f:
+        json.dump(paths, f, indent=4)
+
+def check_install_paths():
+    with install_paths_lock:
+        paths = read_install_paths()
+        updated_paths = {}
+        for game_name, path in paths.items():
+            exe_path = os.path.join(path, games[game_name]["EXE_NAME"])
+            if os.path.exists(exe_path):
+                updated_paths[game_name] = path
+        if updated_paths != paths:
+            write_install_paths(updated_paths)
+        return updated_paths
+
+
+def read_snapshot():
+    """Return the startup snapshot saved at the last shutdown, or {} if there is none."""
+    if os.path.exists(SNAPSHOT_FILE):
+        try:
+            with open(SNAPSHOT_FILE, "r") as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+
+def write_snapshot(snapshot):
+    tmp = SNAPSHOT_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, SNAPSHOT_FILE)
+
+
+def ensure_game_folders(game):
+    """Ensure that required folders exist for the given game."""
+    for key in ["VERSIONS_DIR", "INSTANCES_DIR"]:
+        folder = game[key]
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+            print(f"[INFO] Created folder: {folder}")
+
+
+def staging_path(game, name):
+    """
+    A new path on the same volume as the game's versions, outside Versions, for building or
+    tearing down a version folder that must only ever appear there complete (see rehydrate_version).
+    """
+    staging_dir = os.path.join(os.path.dirname(game["VERSIONS_DIR"]), ".staging")
+    os.makedirs(staging_dir, exist_ok=True)
+    return os.path.join(staging_dir, f"{time.time_ns()}-{name}")
+
+
+def _exe_signature(path, game):
+    st = os.stat(os.path.join(path, game["EXE_NAME"]))
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def find_install_location(game, refresh=False):
+    """
+    Try to auto-detect the install location for the game by checking its POSSIBLE_PATHS, then
+    the Steam libraries listed in libraryfolders.vdf (see steam_library.py). The result is cached: a cached path costs a single stat of the exe to revalidate, and a cached
+    miss is kept until invalidate_install_location or refresh=True.
+    """
+    with _install_cache_lock:
+        cached = None if refresh else _install_cache.get(game["APP_ID"])
+        if cached:
+            path, signature = cached
+            if path is None:
+                return None
+            try:
+                if _exe_signature(path, game) == signature:
+                    return path
+            except OSError:
+                pass
+        found = (None, None)
+        for path in game["POSSIBLE_PATHS"]:
+            try:
+                found = (path, _exe_signature(path, game))
+                break
+            except OSError:
+                continue
+        if found[0] is None:
+            path = steam_library.find_app(game["APP_ID"])
+            if path:
+                try:
+                    found = (path, _exe_signature(path, game))
+                except OSError:
+                    pass
+        _install_cache[game["APP_ID"]] = found
+        return found[0]
+
+
+def invalidate_install_location(game=None):
+    """Forget the resolved install location of game (or of every game)."""
+    with _install_cache_lock:
+        if game is None:
+            _install_cache.clear()
+        else:
+            _install_cache.pop(game["APP_ID"], None)
+
+
+def add_install_candidate(game, path):
+    """Make path the first install candidate of game, removing any duplicate of it."""
+    key = os.path.normcase(os.path.normpath(path))
+    game["POSSIBLE_PATHS"][:] = [path] + [candidate for candidate in game["POSSIBLE_PATHS"]
+                                          if os.path.normcase(os.path.normpath(candidate)) != key]
+    invalidate_install_location(game)
+
+
+OVERLAY_MANIFEST_FILE = "overlay_manifest.json"
+
+
+def read_overlay_manifest(instance_path):
+    """Return {relative path: [size, mtime_ns, sha256 or None]} for the version files last overlaid."""
+    manifest_file = os.path.join(instance_path, OVERLAY_MANIFEST_FILE)
+    if os.path.exists(manifest_file):
+        try:
+            with open(manifest_file, "r") as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+
+def write_overlay_manifest(instance_path, manifest):
+    with open(os.path.join(instance_path, OVERLAY_MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f)
+
+
+def overlay_version_files(instance_path, version, game, prune=False):
+    """
+    Overlay version-specific files onto an instance folder.
+    If version is the vanilla version, do nothing.
+    Otherwise, copy the files from the Versions folder that are new or changed since the last
+    overlay (by size/mtime, then by hash when only the mtime differs). For archived and delta
+    versions the sizes and mtimes come from their manifest and only the changed files are
+    extracted or decoded.
+    With prune=True, files an earlier overlay installed that the version no longer ships are deleted.
+    Returns a summary dict of copied/skipped/removed files and bytes, or None.
+    """
+    if version == LOCAL_VERSION:
+        return None
+    version_path = get_version_source(version, game)
+    if not version_path:
+        print(f"[ERROR] Version files for '{version}' not found in Versions folder!")
+        return None
+    kind = version_kind(version_path)
+    old_manifest = read_overlay_manifest(instance_path)
+    if kind != "folder":
+        version_files = load_version_files(game, version, version_path)
+        sources = [(rel, entry["size"], entry["mtime"]) for rel, entry in version_files.items()]
+    else:
+        version_files = load_manifest(version_manifest_path(game, version))
+        sources = []
+        _, files = scan_tree(version_path)
+        for rel, _ in files:
+            if rel != STORE_LINKS_FILE:
+                src_stat = os.stat(os.path.join(version_path, rel))
+                sources.append((rel, src_stat.st_size, src_stat.st_mtime_ns))
+    manifest = {}
+    summary = {"copied": 0, "copied_bytes": 0, "skipped": 0, "skipped_bytes": 0, "removed": 0}
+    to_copy = []
+    for rel, size, mtime in sources:
+        dest = os.path.join(instance_path, rel)
+        entry = [size, mtime, None]
+        old = old_manifest.get(rel)
+        known = version_files.get(rel)
+        if known and known["size"] == entry[0] and known["mtime"] == entry[1]:
+            entry[2] = known["strong"]
+        elif old and old[0] == entry[0] and old[1] == entry[1]:
+            entry[2] = old[2]
+        try:
+            dest_stat = os.stat(dest)
+        except OSError:
+            dest_stat = None
+        unchanged = False
+        if dest_stat is not None and dest_stat.st_size == size:
+            if dest_stat.st_mtime_ns == mtime:
+                unchanged = True
+            else:
+                if entry[2] is None:
+                    entry[2] = hash_file(os.path.join(version_path, rel))
+                unchanged = hash_file(dest) == entry[2]
+        manifest[rel] = entry
+        if unchanged:
+            summary["skipped"] += 1
+            summary["skipped_bytes"] += size
+            continue
+        to_copy.append(rel)
+        summary["copied"] += 1
+        summary["copied_bytes"] += size
+    if kind == "archive":
+        extract_files(version_path, instance_path, to_copy, version_files)
+    elif kind == "delta":
+        materialize_files(version_path, find_install_location(game), instance_path, to_copy, read_index(version_path))
+    else:
+        for rel in to_copy:
+            dest = os.path.join(instance_path, rel)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            # Never copy over a file store hardlink, that would overwrite the shared blob.
+            remove_file(instance_path, rel)
+            shutil.copy2(os.path.join(version_path, rel), dest)
+    if prune:
+        for rel in old_manifest:
+            if rel not in manifest and os.path.exists(os.path.join(instance_path, rel)):
+                remove_file(instance_path, rel)
+                summary["removed"] += 1
+    else:
+        # Keep remembering files from older overlays so a later prune can still remove them.
+        for rel, entry in old_manifest.items():
+            manifest.setdefault(rel, entry)
+    write_overlay_manifest(instance_path, manifest)
+    print(f"[INFO] Overlaid '{version}': copied {summary['copied']} files ({summary['copied_bytes']} bytes), "
+          f"skipped {summary['skipped']} ({summary['skipped_bytes']} bytes), removed {summary['removed']}")
+    return summary
+
+
+def resync_instance(instance_path, game, prune=False):
+    """
+    Bring an instance up to date with the version recorded in its instance_info.json after the
+    version changed (see overlay_version_files). Returns the overlay summary plus the "version".
+    """
+    version = get_instance_info(instance_path).get("version", "")
+    if version != LOCAL_VERSION and not get_version_source(version, game):
+        raise FileNotFoundError(f"Source version '{version}' for this instance was not found.")
+    summary = overlay_version_files(instance_path, version, game, prune=prune)
+    if summary is None:
+        # Instances of the Steam Version are plain copies with nothing to overlay.
+        summary = {"copied": 0, "copied_bytes": 0, "skipped": 0, "skipped_bytes": 0, "removed": 0}
+    summary["version"] = version
+    return summary
+
+
+def create_instance(instance_name, version, game, force_copy=False, progress=None, cancel_event=None):
+    """
+    Create a new instance with the given name and version.
+    For modded instances, the version's files are hardlinked from the file store
+    (copied if the store is unavailable); archived versions are extracted, linking what the
+    store already has, and delta versions are the Steam files with the delta applied.
+    Note: When creating an instance with the vanilla (Steam) version,
+    if force_copy is False, the function will not copy (as that is reserved for the Global Instance).
+    If force_copy is True, the installed game files (detected via find_install_location)
+    are copied.
+    progress and cancel_event are passed through to copy_tree / link_tree, which pick the
+    copy strategy (hardlink, reflink, copy_file_range or plain copy) from COPY_MODE.
+    """
+    instance_path = os.path.join(game["INSTANCES_DIR"], instance_name)
+    if os.path.exists(instance_path):
+        return "exists"
+    try:
+        print(f"[INFO] Creating new instance '{instance_name}' with version '{version}'...")
+        if version == LOCAL_VERSION:
+            if not force_copy:
+                return "Global instance is not copied."
+            else:
+                source_path = find_install_location(game)
+                if not source_path:
+                    return "Installation for vanilla version not found!"
+        else:
+            source_path = get_version_source(version, game)
+            if not source_path:
+                return f"Version folder for '{version}' not found!"
+        if version == LOCAL_VERSION:
+            try:
+                stats = copy_tree(source_path, instance_path, progress=progress, cancel_event=cancel_event)
+            except OSError:
+                invalidate_install_location(game)
+                raise
+        elif version_kind(source_path) == "delta":
+            install, index, _ = load_delta(game, source_path, progress=progress, cancel_event=cancel_event)
+            stats = materialize_delta(source_path, install, instance_path, index,
+                                      progress=progress, cancel_event=cancel_event)
+        elif version_kind(source_path) == "archive":
+            files = load_version_files(game, version, source_path, progress=progress, cancel_event=cancel_event)
+            stats = extract_archive(source_path, instance_path, files, progress=progress, cancel_event=cancel_event)
+        else:
+            files = update_version_manifest(game, version, source_path, progress=progress, cancel_event=cancel_event)
+            stats = link_tree(source_path, instance_path, ingest=True, progress=progress, cancel_event=cancel_event,
+                              hashes=strong_hashes(files))
+        print(f"[INFO] Instance '{instance_name}' created: {format_copy_stats(stats)}")
+        info = {
+            "instance": instance_name,
+            "version": version,
+            "last_played": "",
+            "size": stats["bytes"],
+        }
+        write_instance_info(instance_path, info)
+        return instance_path
+    except CopyCancelled:
+        raise
+    except Exception as e:
+        return str(e)
+
+
+def get_instance_path(instance_name, game):
+    """Return the folder of an instance; the Global Instance lives in the Steam install (None if not found)."""
+    if instance_name == LOCAL_INSTANCE:
+        return find_install_location(game)
+    return os.path.join(game["INSTANCES_DIR"], instance_name)
+
+
+def launch_game(instance_path, game, profile=None):
+    """
+    Launch the game from the given instance folder (or base directory) and return its process,
+    with the priority and CPU affinity of the launch profile, if any.
+    Raises FileNotFoundError if the folder has no game executable.
+    """
+    game_exe = os.path.join(instance_path, game["EXE_NAME"])
+    app_id_path = os.path.join(instance_path, "steam_appid.txt")
+    detach_file(instance_path, "steam_appid.txt")
+    detach_private(instance_path)
+    with open(app_id_path, "w") as f:
+        app_id = game["APP_ID"]
+        f.write(str(app_id))
+    if os.path.exists(game_exe):
+        print("[INFO] Launching game from instance...")
+        env = os.environ.copy()
+        env["PATH"] = instance_path + ";" + env["PATH"]
+        env["PWD"] = instance_path
+        profile = profile or {}
+        process = subprocess.Popen(game_exe, cwd=instance_path, env=env, creationflags=creation_flags(profile),
+                                   preexec_fn=child_setup(profile))
+        apply_profile(process, profile)
+        return process
+    invalidate_install_location(game)
+    raise FileNotFoundError("Game executable not found in the instance folder.")
+
+
+def prefetch_profile_path(instance_name, game):
+    """The Global Instance's profile sits next to its info file instead of in the Steam folder."""
+    if instance_name == LOCAL_INSTANCE:
+        return os.path.join(game["INSTANCES_DIR"], "Global_Instance_Prefetch.json")
+    return os.path.join(game["INSTANCES_DIR"], instance_name, PREFETCH_FILE)
+
+
+def launch_instance(instance_name, game, prefetch=PREFETCH, warm=None):
+    """
+    Launch an instance and mark it played. With prefetch, the files its last startups read are
+    warmed in parallel with the game starting, except on every PREFETCH_BASELINE_EVERY-th launch
+    (or with warm=False), which measures the startup without it.
+    Returns (process, startup) where startup, if not None, blocks until the game has finished
+    starting, records what it read and returns the run (see prefetch.record_startup).
+    """
+    path = get_instance_path(instance_name, game)
+    if not path:
+        raise FileNotFoundError("Installation not found.")
+    profile_file = prefetch_profile_path(instance_name, game)
+    warmer = None
+    cached = None
+    if prefetch:
+        profile = load_profile(profile_file)
+        if warm is None:
+            warm = not baseline_due(profile["runs"], PREFETCH_BASELINE_EVERY)
+        if profile["files"]:
+            if warm:
+                warmer = start_warm(path, profile["files"])
+            else:
+                cached = cached_fraction(path, profile["files"])
+    started = time.monotonic()
+    process = launch_game(path, game, get_launch_profile(instance_name, game))
+    mark_instance_played(instance_name, game)
+    if not prefetch or not can_observe():
+        return process, None
+
+    def startup():
+        run = record_startup(process, path, profile_file, started, warmer, limit=PREFETCH_RECORD_SECONDS,
+                             cached=cached)
+        summary = format_summary(summarize(load_profile(profile_file)))
+        if run["ready"] is not None:
+            label = " with prefetch" if run["prefetched"] else " (files already cached)" if warm_cache(run) else ""
+            print(f"[INFO] '{instance_name}' ready in {run['ready']:.1f}s{label}; {summary}")
+        return run
+    return process, startup
+
+
+def get_launch_profile(instance_name, game):
+    """Return the launch profile of an instance (or the Global Instance); see launch_profile.py."""
+    if instance_name == LOCAL_INSTANCE:
+        info = get_global_instance_info(game)
+    else:
+        info = get_instance_info(os.path.join(game["INSTANCES_DIR"], instance_name))
+    profile = empty_profile()
+    profile.update({key: value for key, value in (info.get("launch_profile") or {}).items() if key in PROFILE_KEYS})
+    return profile
+
+
+def set_launch_profile(instance_name, game, profile):
+    """Store the launch profile of an instance. Raises ValueError if it is invalid."""
+    error = profile_error(profile)
+    if error:
+        raise ValueError(error)
+    profile = {key: profile.get(key) for key in PROFILE_KEYS}
+    if instance_name == LOCAL_INSTANCE:
+        info = get_global_instance_info(game)
+        info["launch_profile"] = profile
+        write_global_instance_info(game, info)
+    else:
+        path = os.path.join(game["INSTANCES_DIR"], instance_name)
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Instance '{instance_name}' not found.")
+        info = get_instance_info(path)
+        info["launch_profile"] = profile
+        write_instance_info(path, info)
+    print(f"[INFO] Saved the launch profile of '{instance_name}'.")
+
+
+def launch_cap(instance_name, game):
+    """How many games may be running for this instance to start now: the lower of its profile's
+    max_running and MAX_RUNNING_INSTANCES, or None for no limit."""
+    caps = [cap for cap in (get_launch_profile(instance_name, game)["max_running"], MAX_RUNNING_INSTANCES)
+            if cap is not None]
+    return min(caps) if caps else None
+
+
+def mark_instance_played(instance_name, game):
+    """Record that an instance (or the Global Instance) was just launched."""
+    if instance_name == LOCAL_INSTANCE:
+        info = get_global_instance_info(game)
+        mark_played(info)
+        write_global_instance_info(game, info)
+    else:
+        path = os.path.join(game["INSTANCES_DIR"], instance_name)
+        info = get_instance_info(path)
+        mark_played(info)
+        write_instance_info(path, info)
+
+
+def record_session(instance_name, game, session):
+    """
+    Add a finished play session (see supervisor.Session.summary) to an instance's metadata:
+    total playtime, number of sessions and the last session's stats. last_played becomes the exit time.
+    """
+    if instance_name == LOCAL_INSTANCE:
+        info = get_global_instance_info(game)
+    else:
+        path = os.path.join(game["INSTANCES_DIR"], instance_name)
+        if not os.path.isdir(path):
+            print(f"[WARN] Instance '{instance_name}' is gone, its session was not recorded.")
+            return
+        info = get_instance_info(path)
+    info["playtime"] = round(info.get("playtime", 0) + session["seconds"], 1)
+    info["sessions"] = info.get("sessions", 0) + 1
+    info["last_session"] = session
+    mark_played(info)
+    if instance_name == LOCAL_INSTANCE:
+        write_global_instance_info(game, info)
+    else:
+        write_instance_info(path, info)
+    print(f"[INFO] '{instance_name}' exited with code {session['exit_code']} after {session['seconds']:.0f}s")
+
+
+def instance_stats(game):
+    """Return the playtime and last session stats of every instance, the Global Instance first."""
+    infos = [get_global_instance_info(game)] + [info for info in list_instance_infos(game["INSTANCES_DIR"])
+                                                if info.get("instance") != LOCAL_INSTANCE]
+    return [{"instance": info.get("instance", LOCAL_INSTANCE), "version": info.get("version", ""),
+             "playtime": info.get("playtime", 0), "sessions": info.get("sessions", 0),
+             "last_session": info.get("last_session")} for info in infos]
+
+
+def instance_name_error(game, name):
+    """Return why name can't be used for a new instance, or None if it can."""
+    if not name:
+        return "Instance name cannot be empty."
+    if name == LOCAL_INSTANCE:
+        return "Cannot use 'Global Instance' as an instance name."
+    if len(name) > 25:
+        return "Instance name cannot exceed 25 characters."
+    if os.path.exists(os.path.join(game["INSTANCES_DIR"], name)):
+        return "An instance with that name already exists."
+    return None
+
+
+def version_name_error(game, name):
+    """Return why name can't be used for a new version, or None if it can."""
+    if not name:
+        return "Version name cannot be empty."
+    if name == LOCAL_VERSION:
+        return "Cannot use 'Steam Version' as a version name."
+    if len(name) > 25:
+        return "Version name cannot exceed 25 characters."
+    if version_exists(game, name):
+        return "A version with that name already exists."
+    return None
+
+
+def rename_instance(instance_name, new_name, game):
+    """Rename an instance folder and its metadata. Returns the new path."""
+    old_path = os.path.join(game["INSTANCES_DIR"], instance_name)
+    new_path = os.path.join(game["INSTANCES_DIR"], new_name)
+    os.rename(old_path, new_path)
+    rename_instance_info(old_path, new_path)
+    return new_path
+
+
+def trash_instance(instance_path, game):
+    """Move an instance to the game's trash and drop it from the catalog. Returns the trash entry."""
+    info = get_instance_info(instance_path)
+    entry = move_to_trash(instance_path, game["TRASH_DIR"], meta={"kind": "instance", "info": info})
+    delete_instance_info(instance_path)
+    return entry
+
+
+def trash_version(version, game):
+    """Move a version (folder or archive) and its manifest to the game's trash. Returns the trash entry."""
+    entry = move_to_trash(get_version_source(version, game), game["TRASH_DIR"],
+                          extra_files=[version_manifest_path(game, version)], meta={"kind": "version", "version": version})
+    catalog.delete_version(game["VERSIONS_DIR"], version)
+    return entry
+
+
+def restore_trashed(entry, game):
+    """Undo trash_instance / trash_version while the entry is still in the trash."""
+    meta = restore(game["TRASH_DIR"], entry)
+    if meta.get("kind") == "instance":
+        info = meta["info"]
+        catalog.put_instance(game["INSTANCES_DIR"], info["instance"], info)
+    else:
+        catalog.put_version(game["VERSIONS_DIR"], meta["version"])
+
+
+def scan_instances(game):
+    """Return the instance folder names on disk for the game (excluding the Global Instance)."""
+    if not os.path.exists(game["INSTANCES_DIR"]):
+        os.makedirs(game["INSTANCES_DIR"])
+    return [instance for instance in os.listdir(game["INSTANCES_DIR"])
+            if os.path.isdir(os.path.join(game["INSTANCES_DIR"], instance)) and instance != LOCAL_INSTANCE]
+
+
+def scan_versions(game):
+    """Return the names of the version folders, archives and deltas on disk for the game."""
+    if not os.path.exists(game["VERSIONS_DIR"]):
+        return []
+    names = [folder for folder in os.listdir(game["VERSIONS_DIR"])
+             if os.path.isdir(os.path.join(game["VERSIONS_DIR"], folder))]
+    for name in list_archives(game["VERSIONS_DIR"]) + list_deltas(game["VERSIONS_DIR"]):
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def sync_catalog(game):
+    """Bring the catalog in line with the instance and version folders on disk."""
+    sync_instance_infos(game["INSTANCES_DIR"], scan_instances(game))
+    catalog.sync_versions(game["VERSIONS_DIR"], scan_versions(game))
+
+
+def apply_disk_changes(game, changes):
+    """
+    Update the catalog from folder watcher changes ({folder: names or None}).
+    Only the reported entries are looked at; None means the folder must be rescanned.
+    Returns True if anything changed.
+    """
+    changed = False
+    for folder, names in changes.items():
+        if names is None:
+            sync_catalog(game)
+            return True
+        if folder == game["INSTANCES_DIR"]:
+            changed |= refresh_instance_infos(folder, [name for name in names if name != LOCAL_INSTANCE])
+        elif folder == game["VERSIONS_DIR"]:
+            known = set(catalog.list_versions(folder))
+            for name in names:
+                exists = version_exists(game, name)
+                if exists and name not in known:
+                    catalog.put_version(folder, name)
+                    changed = True
+                elif not exists and name in known:
+                    catalog.delete_version(folder, name)
+                    changed = True
+    return changed
+
+
+def version_exists(game, version):
+    """True if the version is on disk as a folder, an archive or a delta."""
+    return (os.path.isdir(os.path.join(game["VERSIONS_DIR"], version))
+            or os.path.isfile(archive_path(game["VERSIONS_DIR"], version))
+            or os.path.isfile(delta_path(game["VERSIONS_DIR"], version)))
+
+
+def version_kind(source):
+    """Return "folder", "archive" or "delta" for a path returned by get_version_source."""
+    if not os.path.isfile(source):
+        return "folder"
+    return "delta" if source.endswith(DELTA_SUFFIX) else "archive"
+
+
+def load_delta(game, source, progress=None, cancel_event=None):
+    """
+    Return (Steam install, delta index, Steam manifest) for a delta version, after checking the
+    Steam files it was made against are unchanged.
+    """
+    install = find_install_location(game)
+    if not install:
+        raise FileNotFoundError("Delta versions need the Steam Version installed.")
+    base_files = update_version_manifest(game, LOCAL_VERSION, install, progress=progress, cancel_event=cancel_event)
+    index = read_index(source)
+    check_baseline(index, base_files)
+    return install, index, base_files
+
+
+def load_version_files(game, version, source, progress=None, cancel_event=None):
+    """
+    Return the manifest files dict of a version. Folders are re-checked with update_version_manifest;
+    an archive never changes, so its manifest is only built (by hashing its members) when missing;
+    a delta's manifest comes from its index and the Steam manifest.
+    """
+    if version_kind(source) == "delta":
+        _, index, base_files = load_delta(game, source, progress=progress, cancel_event=cancel_event)
+        return delta_manifest(index, base_files)
+    if version_kind(source) == "archive":
+        manifest_file = version_manifest_path(game, version)
+        files = load_manifest(manifest_file)
+        if not files:
+            files = index_archive(source, progress=progress, cancel_event=cancel_event)
+            save_manifest(manifest_file, files)
+        return files
+    return update_version_manifest(game, version, source, progress=progress, cancel_event=cancel_event)
+
+
+def compress_version(version, game, progress=None, cancel_event=None):
+    """
+    Replace a version folder with an LZMA archive of it. Returns the archive size and the folder's
+    unique and shared bytes (see file_store.folder_usage): deleting the folder frees only the unique
+    ones, files its instances still link to stay on disk.
+    """
+    folder = os.path.join(game["VERSIONS_DIR"], version)
+    archive = archive_path(game["VERSIONS_DIR"], version)
+    if os.path.exists(archive):
+        raise FileExistsError(f"An archive for '{version}' already exists.")
+    folder_bytes, shared_bytes = folder_usage(folder)
+    manifest = pack_tree(folder, archive, progress=progress, cancel_event=cancel_event)
+    save_manifest(version_manifest_path(game, version), manifest)
+    # The complete folder is still what get_version_source picks; move it out in one rename so
+    # nobody ever sees it half deleted, then delete it at leisure.
+    staging = staging_path(game, version)
+    os.rename(folder, staging)
+    remove_tree(staging)
+    archive_bytes = os.path.getsize(archive)
+    catalog.put_version(game["VERSIONS_DIR"], version, size=archive_bytes)
+    print(f"[INFO] Compressed version '{version}': {folder_bytes} -> {archive_bytes} bytes"
+          f"{f' ({shared_bytes} bytes still used by its instances)' if shared_bytes else ''}")
+    return {"folder_bytes": folder_bytes, "shared_bytes": shared_bytes, "archive_bytes": archive_bytes}
+
+
+def store_version_delta(folder, version, game, progress=None, cancel_event=None):
+    """
+    Store the game folder as the delta version named version: only the files that differ from
+    the Steam Version are kept. Returns the number of changed files and the delta size.
+    """
+    install = find_install_location(game)
+    if not install:
+        raise FileNotFoundError("Delta versions need the Steam Version installed.")
+    delta = delta_path(game["VERSIONS_DIR"], version)
+    if os.path.exists(delta):
+        raise FileExistsError(f"A delta for '{version}' already exists.")
+    base_files = update_version_manifest(game, LOCAL_VERSION, install, progress=progress, cancel_event=cancel_event)
+    files = update_version_manifest(game, version, folder, progress=progress, cancel_event=cancel_event)
+    index = create_delta(folder, install, base_files, files, delta, progress=progress, cancel_event=cancel_event)
+    # A delta's manifest is derived from its index, so the folder's one would only go stale.
+    delete_version_manifest(game, version)
+    size = os.path.getsize(delta)
+    catalog.put_version(game["VERSIONS_DIR"], version, size=size)
+    changed = sum(1 for entry in index["files"].values() if entry["op"] != "same")
+    return {"changed": changed, "delta_bytes": size}
+
+
+def convert_version_to_delta(version, game, progress=None, cancel_event=None):
+    """Replace a version folder with a delta against the Steam Version."""
+    folder = os.path.join(game["VERSIONS_DIR"], version)
+    result = store_version_delta(folder, version, game, progress=progress, cancel_event=cancel_event)
+    remove_tree(folder)
+    return result
+
+
+def import_version_archive(path, version, game, progress=None, cancel_event=None):
+    """Add a zip of a game folder as the archived version named version."""
+    archive = archive_path(game["VERSIONS_DIR"], version)
+    if version_exists(game, version):
+        raise FileExistsError(f"Version '{version}' already exists.")
+    shutil.copy2(path, archive + ".tmp")
+    os.replace(archive + ".tmp", archive)
+    try:
+        files = index_archive(archive, progress=progress, cancel_event=cancel_event)
+    except BaseException:
+        os.remove(archive)
+        raise
+    save_manifest(version_manifest_path(game, version), files)
+    catalog.put_version(game["VERSIONS_DIR"], version, size=os.path.getsize(archive))
+    print(f"[INFO] Imported '{path}' as version '{version}' ({len(files)} files)")
+    return files
+
+
+# --- Cold storage ---
+def plan_cold_storage(game, budget, min_idle_days=COLD_MIN_IDLE_DAYS):
+    """
+    Decide which version folders to compress so the rest fit in budget bytes.
+    Sizes are the bytes only the version folder holds (see file_store.folder_usage). Versions
+    whose files instances still link to (the file store shares them) are skipped: compressing
+    those would add an archive while freeing next to nothing.
+    Least recently used versions (by the last played time of their instances) go first;
+    versions used in the last min_idle_days are kept.
+    Returns (versions, {version: bytes}, hot bytes, {skipped shared version: shared bytes}).
+    """
+    now = time.time()
+    hot = []
+    sizes = {}
+    shared = {}
+    for row in catalog.version_usage(game["VERSIONS_DIR"], game["INSTANCES_DIR"]):
+        folder = os.path.join(game["VERSIONS_DIR"], row["name"])
+        if not os.path.isdir(folder):
+            continue
+        sizes[row["name"]], shared_bytes = folder_usage(folder)
+        if shared_bytes:
+            shared[row["name"]] = shared_bytes
+        hot.append((row["last_used"] or row["created"] or 0, row["name"]))
+    total = sum(sizes.values())
+    plan = []
+    for last_used, name in sorted(hot):
+        if total <= budget:
+            break
+        if now - last_used < min_idle_days * 86400 or name in shared:
+            continue
+        plan.append(name)
+        total -= sizes[name]
+    return plan, sizes, total, shared
+
+
+def apply_cold_storage(game, budget=VERSION_DISK_BUDGET, plan=None, progress=None, cancel_event=None):
+    """
+    Move idle versions to cold storage (archives) until the version folders fit in budget.
+    plan is the result of plan_cold_storage, e.g. after the user confirmed it; planned afresh if None.
+    Raises ValueError when no budget is configured. Returns a report with the versions moved and the bytes reclaimed.
+    """
+    if budget is None:
+        raise ValueError("No version disk budget is configured (VERSION_DISK_BUDGET in config.py).")
+    plan, sizes, _, _ = plan if plan is not None else plan_cold_storage(game, budget)
+    report = {"moved": [], "reclaimed_bytes": 0, "hot_bytes": sum(sizes.values())}
+    for index, version in enumerate(plan):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CopyCancelled("Cold storage cancelled.")
+        stats = compress_version(version, game, cancel_event=cancel_event)
+        catalog.set_version_tier(game["VERSIONS_DIR"], version, "cold")
+        report["moved"].append(version)
+        report["reclaimed_bytes"] += stats["folder_bytes"] - stats["archive_bytes"]
+        report["hot_bytes"] -= sizes[version]
+        if progress:
+            progress(index + 1, len(plan))
+    print(f"[INFO] Cold storage: moved {len(report['moved'])} versions, "
+          f"reclaimed {report['reclaimed_bytes'] / (1024 * 1024):.1f} MB")
+    return report
+
+
+def rehydrate_version(version, game, progress=None, cancel_event=None):
+    """Turn a cold (archived) version back into a folder. Returns the seconds it took."""
+    start = time.perf_counter()
+    archive = archive_path(game["VERSIONS_DIR"], version)
+    folder = os.path.join(game["VERSIONS_DIR"], version)
+    files = load_version_files(game, version, archive)
+    # Extract next to Versions and rename the finished folder into place: get_version_source
+    # prefers the folder, so a half extracted one must never appear under the version's name.
+    staging = staging_path(game, version)
+    try:
+        extract_archive(archive, staging, files, progress=progress, cancel_event=cancel_event)
+        os.rename(staging, folder)
+    except BaseException:
+        if os.path.exists(staging):
+            remove_tree(staging)
+        raise
+    os.remove(archive)
+    catalog.set_version_tier(game["VERSIONS_DIR"], version, "hot")
+    seconds = time.perf_counter() - start
+    print(f"[INFO] Rehydrated version '{version}' in {seconds:.2f}s")
+    return seconds
+
+
+def list_instances(game):
+    """Return a list of instance names for the game (excluding the Global Instance) from the catalog."""
+    return [name for name in catalog.instance_names(game["INSTANCES_DIR"]) if name != LOCAL_INSTANCE]
+
+
+def get_version_options(game):
+    """Return a list of available versions (vanilla plus catalogued folders in Versions)."""
+    return [LOCAL_VERSION] + catalog.list_versions(game["VERSIONS_DIR"])
+
+
+def get_product_version(exe_path):
+    try:
+        import win32api
+        info = win32api.GetFileVersionInfo(exe_path, "\\")
+        ms = info['FileVersionMS']
+        ls = info['FileVersionLS']
+        return f"{(ms >> 16) & 0xFFFF}.{ms & 0xFFFF}.{(ls >> 16) & 0xFFFF}.{ls & 0xFFFF}"
+    except Exception:
+        return "Unknown"
+
+
+# --- Helper functions for cloning ---
+def clone_instance(instance_name, new_name, game, progress=None, cancel_event=None):
+    """
+    Clone an instance (including Global Instance) as new_name.
+    Raises on failure and returns the copy stats.
+    """
+    if instance_name == LOCAL_INSTANCE:
+        source = find_install_location(game)
+        if not source:
+            raise FileNotFoundError("Global Instance source not found.")
+    else:
+        source = os.path.join(game["INSTANCES_DIR"], instance_name)
+    new_path = os.path.join(game["INSTANCES_DIR"], new_name)
+    if instance_name == LOCAL_INSTANCE:
+        try:
+            stats = copy_tree(source, new_path, progress=progress, cancel_event=cancel_event)
+        except OSError:
+            invalidate_install_location(game)
+            raise
+    else:
+        stats = link_tree(source, new_path, progress=progress, cancel_event=cancel_event)
+    info = dict(get_instance_info(source)) if instance_name != LOCAL_INSTANCE else {}
+    info["instance"] = new_name
+    if instance_name == LOCAL_INSTANCE:
+        info["version"] = LOCAL_VERSION
+    info["last_played"] = ""
+    info["last_played_ts"] = None
+    info["size"] = stats["bytes"]
+    info["created"] = None
+    write_instance_info(new_path, info)
+    return stats
+
+
+def clone_version(version_name, new_name, game, progress=None, cancel_event=None):
+    """
+    Clone a version folder as new_name (including the vanilla version).
+    Raises on failure and returns the copy stats.
+    """
+    if version_name == LOCAL_VERSION:
+        source = find_install_location(game)
+        if not source:
+            raise FileNotFoundError("Installation for vanilla version not found.")
+    else:
+        source = get_version_source(version_name, game)
+        if not source:
+            raise FileNotFoundError(f"Version '{version_name}' not found.")
+    new_path = os.path.join(game["VERSIONS_DIR"], new_name)
+    if version_kind(source) != "folder":
+        # Archived and delta versions are cloned as another archive or delta.
+        start = time.perf_counter()
+        new_file = new_path + source[len(os.path.join(game["VERSIONS_DIR"], version_name)):]
+        if version_kind(source) == "archive":
+            files = load_version_files(game, version_name, source, progress=progress, cancel_event=cancel_event)
+            save_manifest(version_manifest_path(game, new_name), files)
+        shutil.copy2(source, new_file)
+        size = os.path.getsize(new_file)
+        catalog.put_version(game["VERSIONS_DIR"], new_name, size=size)
+        seconds = time.perf_counter() - start
+        return {"files": 1, "bytes": size, "seconds": seconds, "throughput": size / seconds if seconds > 0 else 0.0,
+                "strategy": "copy"}
+    if version_name == LOCAL_VERSION:
+        try:
+            stats = copy_tree(source, new_path, progress=progress, cancel_event=cancel_event)
+        except OSError:
+            invalidate_install_location(game)
+            raise
+        catalog.put_version(game["VERSIONS_DIR"], new_name, size=stats["bytes"])
+        return stats
+    files = update_version_manifest(game, version_name, source, progress=progress, cancel_event=cancel_event)
+    stats = link_tree(source, new_path, ingest=True, progress=progress, cancel_event=cancel_event,
+                      hashes=strong_hashes(files))
+    # Linked and copied files keep their size and mtime, so the source manifest is valid for the clone.
+    save_manifest(version_manifest_path(game, new_name), files)
+    catalog.put_version(game["VERSIONS_DIR"], new_name, size=stats["bytes"])
+    return stats
+
+
+# --- Verify / repair ---
+def get_version_source(version, game):
+    """
+    Return the folder holding a version's files (the Steam install for the vanilla version),
+    the archive of an archived version, the delta of a delta version, or None.
+    """
+    if version == LOCAL_VERSION:
+        return find_install_location(game)
+    if not version:
+        return None
+    path = os.path.join(game["VERSIONS_DIR"], version)
+    if os.path.isdir(path):
+        return path
+    for stored in (archive_path(game["VERSIONS_DIR"], version), delta_path(game["VERSIONS_DIR"], version)):
+        if os.path.isfile(stored):
+            return stored
+    return None
+
+
+def verify_instance(instance_path, game, progress=None, cancel_event=None):
+    """
+    Diff an instance against the version recorded in its instance_info.json.
+    Returns the verify_tree report plus the "version" it was checked against.
+    """
+    version = get_instance_info(instance_path).get("version", "")
+    source = get_version_source(version, game)
+    if not source:
+        raise FileNotFoundError(f"Source version '{version}' for this instance was not found.")
+    files = load_version_files(game, version, source, progress=progress, cancel_event=cancel_event)
+    report = verify_tree(instance_path, files, progress=progress, cancel_event=cancel_event)
+    report["version"] = version
+    print(f"[INFO] Verified '{instance_path}' against '{version}': {report['ok']} ok, "
+          f"{len(report['missing'])} missing, {len(report['modified'])} modified, {len(report['added'])} user-added")
+    return report
+
+
+def repair_instance(instance_path, game, report=None, progress=None, cancel_event=None):
+    """
+    Restore only the missing and modified files of an instance from its version.
+    User-added files are left alone. Returns the report with "restored" and "restored_bytes".
+    """
+    if report is None:
+        report = verify_instance(instance_path, game, progress=progress, cancel_event=cancel_event)
+    source = get_version_source(report["version"], game)
+    drifted = report["missing"] + report["modified"]
+    if version_kind(source) != "folder":
+        if version_kind(source) == "delta":
+            install, index, _ = load_delta(game, source, cancel_event=cancel_event)
+            restored_bytes = materialize_files(source, install, instance_path, drifted, index,
+                                               cancel_event=cancel_event)
+        else:
+            files = load_version_files(game, report["version"], source)
+            restored_bytes = extract_files(source, instance_path, drifted, files, cancel_event=cancel_event)
+        report["restored"] = len(drifted)
+        report["restored_bytes"] = restored_bytes
+        print(f"[INFO] Repaired '{instance_path}' from the {version_kind(source)}: restored {len(drifted)} files "
+              f"({restored_bytes} bytes)")
+        return report
+    src_links = read_links(source)
+    restored_bytes = 0
+    for index, rel in enumerate(drifted):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CopyCancelled("Repair cancelled.")
+        restored_bytes += restore_file(source, instance_path, rel, src_links)
+        if progress:
+            progress(index + 1, len(drifted))
+    report["restored"] = len(drifted)
+    report["restored_bytes"] = restored_bytes
+    print(f"[INFO] Repaired '{instance_path}': restored {len(drifted)} files ({restored_bytes} bytes)")
+    return report
+
+
+# --- Batch operations ---
+BATCH_WORKERS = 4
+
+
+def run_batch(names, func, workers=BATCH_WORKERS, progress=None, cancel_event=None):
+    """
+    Run func(name, progress, cancel_event) for every name on a thread pool and return
+    [(name, result, error)] in the order of names; error is the exception func raised, or None.
+    progress receives the combined progress of all the items, each weighted equally.
+    """
+    fractions = [0.0] * len(names)
+    scale = 1000
+
+    def report():
+        if progress:
+            progress(int(sum(fractions) * scale), len(names) * scale)
+
+    def run(index):
+        def item_progress(done, total):
+            fractions[index] = min(1.0, done / total) if total else 0.0
+            report()
+
+        name = names[index]
+        try:
+            if cancel_event is not None and cancel_event.is_set():
+                raise CopyCancelled("Batch cancelled.")
+            return name, func(name, item_progress, cancel_event), None
+        except Exception as e:
+            return name, None, e
+        finally:
+            fractions[index] = 1.0
+            report()
+
+    if not names:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as pool:
+        return list(pool.map(run, range(len(names))))
+
+
+def next_clone_name(game, name, taken=()):
+    """Return a free instance name (not on disk nor in taken) for a copy of name: "name 2", "name 3", ..."""
+    number = 2
+    while True:
+        suffix = f" {number}"
+        candidate = name[:25 - len(suffix)] + suffix
+        if candidate not in taken and instance_name_error(game, candidate) is None:
+            return candidate
+        number += 1
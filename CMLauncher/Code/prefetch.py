@@ -0,0 +1,257 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Startup prefetch. While an instance starts, the files the game has open are sampled and kept in
+# the instance's prefetch profile; on its next launch those files are warmed into the OS page cache
+# in parallel with the game starting, so its first loads come from memory instead of the disk.
+# Linux asks the kernel to read ahead (posix_fadvise WILLNEED); elsewhere the files are read once.
+#
+# The same sampler measures "time to ready": the time from spawning the game until its file reads
+# go quiet for SETTLE_SECONDS, i.e. until it has finished loading and sits at its menu. Runs are
+# kept with the profile so launches with and without prefetch can be compared: every few launches
+# skip warming (see baseline_due) to keep measuring the startup without it. Such a run is only a
+# cold baseline if the files weren't cached anyway (e.g. the game ran a minute ago), so it records
+# the fraction that already was ("cached") and warm-cache runs are left out of the cold average.
+# Sampling open files needs psutil, or /proc on Linux; without either nothing is recorded. Open
+# files are sampled every SAMPLE_SECONDS, so a file opened and closed between two samples is missed.
+
+PREFETCH_FILE = "prefetch.json"
+SAMPLE_SECONDS = 0.2
+SETTLE_SECONDS = 5.0
+MAX_RUNS = 10
+WARM_WORKERS = 4
+CHUNK_SIZE = 1024 * 1024
+# Runs that started with at least this fraction of the profile's files cached count as warm.
+WARM_CACHE_FRACTION = 0.5
+# Pages checked per file by cached_fraction.
+CACHE_PROBES = 16
+PAGE_SIZE = 4096
+
+
+def load_profile(profile_file):
+    """Return {"files": [relative paths in first-read order], "runs": [...]}, empty if there is no profile yet."""
+    try:
+        with open(profile_file, "r") as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        profile = {}
+    profile.setdefault("files", [])
+    profile.setdefault("runs", [])
+    return profile
+
+
+def save_profile(profile_file, profile):
+    tmp = profile_file + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(profile, f)
+    os.replace(tmp, profile_file)
+
+
+def _warm_file(path):
+    """Bring one file into the page cache. Returns its size (0 if it is gone)."""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            else:
+                while f.read(CHUNK_SIZE):
+                    pass
+            return size
+    except OSError:
+        return 0
+
+
+def warm(folder, rels, workers=WARM_WORKERS):
+    """Warm the files rels of folder, in order. Returns {"files", "bytes", "seconds", "method"}."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        sizes = list(pool.map(_warm_file, [os.path.join(folder, rel) for rel in rels]))
+    return {"files": sum(1 for size in sizes if size), "bytes": sum(sizes),
+            "seconds": time.perf_counter() - start,
+            "method": "fadvise" if hasattr(os, "posix_fadvise") else "read"}
+
+
+def start_warm(folder, rels):
+    """Run warm on a background thread; the returned thread's .result is set when it finishes."""
+    thread = threading.Thread(target=lambda: setattr(thread, "result", warm(folder, rels)), daemon=True)
+    thread.result = None
+    thread.start()
+    return thread
+
+
+def baseline_due(runs, every):
+    """True if the next launch should skip warming: one launch in every measures the cold startup."""
+    if not every:
+        return False
+    streak = 0
+    for run in reversed(runs):
+        if not run["prefetched"]:
+            break
+        streak += 1
+    return streak >= every - 1
+
+
+def _cached_pages(path):
+    """Return (cached probes, probes) for a file; reads that would wait for the disk fail instead."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return 0, 0
+    try:
+        size = os.fstat(fd).st_size
+        pages = (size + PAGE_SIZE - 1) // PAGE_SIZE
+        probes = sorted({page * pages // CACHE_PROBES for page in range(CACHE_PROBES)}) if pages else []
+        buffer = bytearray(1)
+        cached = 0
+        for page in probes:
+            try:
+                if os.preadv(fd, [buffer], page * PAGE_SIZE, os.RWF_NOWAIT) > 0:
+                    cached += 1
+            except BlockingIOError:
+                pass
+        return cached, len(probes)
+    except OSError:
+        return 0, 0
+    finally:
+        os.close(fd)
+
+
+def cached_fraction(folder, rels):
+    """
+    Estimate the fraction of the files rels of folder already in the OS page cache, from a few
+    non-blocking reads per file. None where that can't be told (needs preadv with RWF_NOWAIT, Linux).
+    """
+    if not hasattr(os, "RWF_NOWAIT") or not rels:
+        return None
+    cached = probes = 0
+    for rel in rels:
+        file_cached, file_probes = _cached_pages(os.path.join(folder, rel))
+        cached += file_cached
+        probes += file_probes
+    return cached / probes if probes else None
+
+
+def warm_cache(run):
+    """True if an unprefetched run found most of its files cached already."""
+    return run.get("cached") is not None and run["cached"] >= WARM_CACHE_FRACTION
+
+
+def can_observe():
+    return psutil is not None or os.path.isdir("/proc/self/fd")
+
+
+def observe(pid):
+    """Return (paths of the files pid has open, bytes it has read so far), or None once it is gone."""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            paths = {f.path for f in process.open_files()}
+            try:
+                counters = process.io_counters()
+                reads = getattr(counters, "read_chars", counters.read_bytes)
+            except (psutil.AccessDenied, AttributeError):
+                reads = None
+            return paths, reads
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+    fd_dir = f"/proc/{pid}/fd"
+    paths = set()
+    try:
+        for fd in os.listdir(fd_dir):
+            try:
+                paths.add(os.readlink(os.path.join(fd_dir, fd)))
+            except OSError:
+                pass
+        with open(f"/proc/{pid}/io", "r") as f:
+            reads = next((int(line.split()[1]) for line in f if line.startswith("rchar:")), None)
+    except OSError:
+        return None
+    return paths, reads
+
+
+def record_startup(process, folder, profile_file, started, warmer=None, limit=60, cached=None):
+    """
+    Sample the starting process until its reads settle (or it exits, or limit seconds pass),
+    then merge the files it opened under folder into the profile and add the run.
+    started is the time.monotonic() of the spawn and warmer the start_warm thread (None if not warmed).
+    cached is the cached_fraction of the profile's files at launch for a run that wasn't warmed.
+    Returns the run: {"ready": seconds or None, "prefetched": bool, "files": count, "cached": fraction}.
+    """
+    root = os.path.normcase(os.path.abspath(folder)) + os.sep
+    seen = []
+    seen_set = set()
+    last_reads = None
+    last_activity = None
+    while True:
+        now = time.monotonic()
+        sample = observe(process.pid) if process.poll() is None else None
+        if sample is None:
+            # Exited (or vanished) before settling: no ready time for this run.
+            last_activity = None
+            break
+        paths, reads = sample
+        active = reads is not None and reads != last_reads
+        last_reads = reads
+        for path in sorted(paths):
+            norm = os.path.normcase(os.path.abspath(path))
+            if norm.startswith(root) and norm not in seen_set:
+                seen_set.add(norm)
+                seen.append(os.path.relpath(path, folder))
+                active = True
+        if active:
+            last_activity = now
+        elif last_activity is not None and now - last_activity >= SETTLE_SECONDS:
+            break
+        if now - started >= limit:
+            break
+        time.sleep(SAMPLE_SECONDS)
+
+    profile = load_profile(profile_file)
+    files = seen + [rel for rel in profile["files"] if rel not in seen]
+    files = [rel for rel in files if os.path.basename(rel) != PREFETCH_FILE]
+    run = {"ready": None if last_activity is None else round(last_activity - started, 3),
+           "prefetched": warmer is not None, "files": len(seen), "time": time.time()}
+    if warmer is not None and warmer.result:
+        run["warmed_bytes"] = warmer.result["bytes"]
+    if cached is not None:
+        run["cached"] = round(cached, 2)
+    profile["files"] = files
+    profile["runs"] = (profile["runs"] + [run])[-MAX_RUNS:]
+    save_profile(profile_file, profile)
+    return run
+
+
+def summarize(profile):
+    """
+    Return {"cold": average ready seconds without prefetch, "warm": with prefetch, "saved": cold - warm},
+    with None for whichever has no measured runs yet. Unprefetched runs that found the files cached
+    anyway don't count as cold.
+    """
+    def average(prefetched):
+        times = [run["ready"] for run in profile["runs"]
+                 if run["prefetched"] == prefetched and run["ready"] and not warm_cache(run)]
+        return sum(times) / len(times) if times else None
+
+    cold, warmed = average(False), average(True)
+    return {"cold": cold, "warm": warmed, "saved": cold - warmed if cold is not None and warmed is not None else None}
+
+
+def format_summary(summary):
+    if summary["saved"] is not None:
+        change = "faster" if summary["saved"] >= 0 else "slower"
+        return (f"{summary['warm']:.1f}s to ready with prefetch vs {summary['cold']:.1f}s without "
+                f"({abs(summary['saved']):.1f}s {change})")
+    if summary["warm"] is not None:
+        return f"{summary['warm']:.1f}s to ready with prefetch"
+    if summary["cold"] is not None:
+        return f"{summary['cold']:.1f}s to ready"
+    return "no startup measured yet"
@@ -0,0 +1,207 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+# Finds installed Steam games without guessing paths.
+# Every Steam install lists its library folders in steamapps/libraryfolders.vdf, and each
+# library has a steamapps/appmanifest_<APP_ID>.acf per installed game whose "installdir" names
+# the folder under steamapps/common. Both files use Valve's KeyValues text format.
+
+LIBRARY_FOLDERS_FILE = os.path.join("steamapps", "libraryfolders.vdf")
+PROBE_WORKERS = 8
+
+DEFAULT_STEAM_ROOTS = [
+    r"C:\Program Files (x86)\Steam",
+    r"C:\Program Files\Steam",
+    os.path.expanduser("~/.steam/steam"),
+    os.path.expanduser("~/.local/share/Steam"),
+]
+
+_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|([{}])|//[^\n]*|([^\s"{}]+)')
+_ESCAPES = {"n": "\n", "t": "\t", "\\": "\\", '"': '"'}
+
+# (APP_ID, roots) -> (manifest mtime signature, library, install path or None); see find_app.
+_app_cache = {}
+_app_cache_lock = threading.Lock()
+
+
+class VDFError(ValueError):
+    """Raised for malformed KeyValues text."""
+
+
+def _unescape(text):
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(0)), text)
+
+
+def parse_vdf(text):
+    """
+    Parse KeyValues text (libraryfolders.vdf, appmanifest_*.acf) into nested dicts.
+    Keys are lower-cased since KeyValues lookups are case-insensitive.
+    """
+    root = {}
+    stack = [root]
+    key = None
+    for match in _TOKEN.finditer(text):
+        quoted, brace, bare = match.groups()
+        if brace == "{":
+            if key is None:
+                raise VDFError("Block without a key.")
+            block = {}
+            stack[-1][key] = block
+            stack.append(block)
+            key = None
+        elif brace == "}":
+            if key is not None or len(stack) == 1:
+                raise VDFError("Unexpected '}'.")
+            stack.pop()
+        elif quoted is not None or bare is not None:
+            token = _unescape(quoted) if quoted is not None else bare
+            if key is None:
+                key = token.lower()
+            else:
+                stack[-1][key] = token
+                key = None
+    if key is not None or len(stack) != 1:
+        raise VDFError("Unexpected end of file.")
+    return root
+
+
+def read_vdf(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_vdf(f.read())
+
+
+def steam_roots():
+    """Return the Steam install folders to search: the registry entry first (Windows), then the defaults."""
+    roots = []
+    if winreg is not None:
+        try:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Valve\Steam") as key:
+                roots.append(os.path.normpath(winreg.QueryValueEx(key, "SteamPath")[0]))
+        except OSError:
+            pass
+    roots.extend(DEFAULT_STEAM_ROOTS)
+    return roots
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def library_folders(roots):
+    """
+    Return [(library path, app ids listed for it)] for every library of the given Steam roots.
+    Old libraryfolders.vdf files map "1", "2"... straight to paths and list no apps (None).
+    """
+    libraries = []
+    seen = set()
+
+    def add(path, apps):
+        key = os.path.normcase(os.path.normpath(path))
+        if key not in seen:
+            seen.add(key)
+            libraries.append((path, apps))
+
+    for root in roots:
+        vdf = os.path.join(root, LIBRARY_FOLDERS_FILE)
+        if not os.path.isfile(vdf):
+            continue
+        try:
+            folders = read_vdf(vdf).get("libraryfolders", {})
+        except (OSError, VDFError) as e:
+            print(f"[WARN] Could not read {vdf}: {e}")
+            add(root, None)
+            continue
+        for name, entry in folders.items():
+            if not name.isdigit():
+                continue
+            if isinstance(entry, dict):
+                if "path" in entry:
+                    apps = entry.get("apps")
+                    add(entry["path"], set(apps) if isinstance(apps, dict) else None)
+            else:
+                add(entry, None)
+        # The Steam folder itself is always a library, even when the file doesn't list it.
+        add(root, None)
+    return libraries
+
+
+def _app_manifest(library, app_id):
+    return os.path.join(library, "steamapps", f"appmanifest_{app_id}.acf")
+
+
+def _probe_library(library, app_id):
+    """Return the install folder of app_id in library, or None."""
+    manifest = _app_manifest(library, app_id)
+    try:
+        state = read_vdf(manifest).get("appstate", {})
+    except (OSError, VDFError):
+        return None
+    installdir = state.get("installdir") if isinstance(state, dict) else None
+    if not installdir:
+        return None
+    path = os.path.join(library, "steamapps", "common", installdir)
+    return path if os.path.isdir(path) else None
+
+
+def _signature(roots, app_id, found_library):
+    """mtimes of every libraryfolders.vdf plus the app manifest that produced the result."""
+    files = [os.path.join(root, LIBRARY_FOLDERS_FILE) for root in roots]
+    if found_library:
+        files.append(_app_manifest(found_library, app_id))
+    return tuple((path, _mtime(path)) for path in files)
+
+
+def find_app(app_id, roots=None):
+    """
+    Return the install folder of the Steam app app_id, or None if no library has it.
+    Libraries that list the app in libraryfolders.vdf are checked first; otherwise every library
+    is probed in parallel. The result is cached until one of the manifests it came from changes,
+    so repeat lookups only stat a few files.
+    """
+    roots = steam_roots() if roots is None else list(roots)
+    key = (app_id, tuple(roots))
+    with _app_cache_lock:
+        cached = _app_cache.get(key)
+    if cached:
+        signature, library, path = cached
+        if _signature(roots, app_id, library) == signature:
+            return path
+
+    libraries = library_folders(roots)
+    app = str(app_id)
+    listed = [library for library, apps in libraries if apps is not None and app in apps]
+    library, path = None, None
+    for candidate in listed:
+        path = _probe_library(candidate, app_id)
+        if path:
+            library = candidate
+            break
+    if path is None:
+        others = [candidate for candidate, _ in libraries if candidate not in listed]
+        if others:
+            with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(others))) as pool:
+                for candidate, result in zip(others, pool.map(lambda lib: _probe_library(lib, app_id), others)):
+                    if result:
+                        library, path = candidate, result
+                        break
+
+    with _app_cache_lock:
+        _app_cache[key] = (_signature(roots, app_id, library), library, path)
+    if path:
+        print(f"[INFO] Found Steam app {app_id} in library '{library}'")
+    return path
+
+
+def clear_cache():
+    with _app_cache_lock:
+        _app_cache.clear()
@@ -0,0 +1,267 @@
+import os
+import queue
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from config import SUPERVISOR_SAMPLE_SECONDS
+
+# Tracks launched games until they exit. One background thread checks every process for exit about
+# once a second and samples its CPU time, memory and disk I/O every SUPERVISOR_SAMPLE_SECONDS (a few
+# syscalls per game, so sampling is cheap). When a game exits its session is handed to on_exit,
+# e.g. to be added to the instance's metadata, and queued for the UI to collect with poll().
+# Resource stats need psutil, or /proc on Linux; without either only playtime and the exit code
+# are known.
+# LaunchQueue uses the running sessions to hold launches above a running-instance cap until
+# enough games have exited.
+
+EXIT_CHECK_SECONDS = 1.0
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _read_proc(pid):
+    with open(f"/proc/{pid}/stat", "r") as f:
+        # The command name may contain spaces and parentheses; the fields start after the last ")".
+        fields = f.read().rsplit(")", 1)[1].split()
+    stats = {"cpu_seconds": (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS}
+    with open(f"/proc/{pid}/status", "r") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                stats["rss"] = int(line.split()[1]) * 1024
+            elif line.startswith("VmHWM:"):
+                stats["peak_rss"] = int(line.split()[1]) * 1024
+    try:
+        with open(f"/proc/{pid}/io", "r") as f:
+            io = dict(line.split(":", 1) for line in f)
+        stats["read_bytes"] = int(io["read_bytes"])
+        stats["write_bytes"] = int(io["write_bytes"])
+    except (OSError, KeyError, ValueError):
+        pass
+    return stats
+
+
+def sample(pid):
+    """Return the resource counters of a running process, {} if they can't be read, or None once it is gone."""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            with process.oneshot():
+                cpu = process.cpu_times()
+                memory = process.memory_info()
+                stats = {"cpu_seconds": cpu.user + cpu.system, "rss": memory.rss}
+                if hasattr(memory, "peak_wset"):
+                    stats["peak_rss"] = memory.peak_wset
+                try:
+                    io = process.io_counters()
+                    stats["read_bytes"] = io.read_bytes
+                    stats["write_bytes"] = io.write_bytes
+                except (psutil.AccessDenied, AttributeError):
+                    pass
+            return stats
+        except psutil.NoSuchProcess:
+            return None
+        except psutil.AccessDenied:
+            return {}
+    if os.path.isdir("/proc/self"):
+        try:
+            return _read_proc(pid)
+        except FileNotFoundError:
+            return None
+        except (OSError, IndexError, ValueError):
+            return {}
+    return {}
+
+
+class Session:
+    """One run of an instance: the process plus what has been measured so far."""
+
+    def __init__(self, process, instance_name, game):
+        self.process = process
+        self.instance_name = instance_name
+        self.game = game
+        self.started = time.time()
+        self.started_monotonic = time.monotonic()
+        self.ended_monotonic = None
+        self.exit_code = None
+        self.stats = {}
+        self.samples = 0
+        self.next_sample = self.started_monotonic
+        self.done = threading.Event()
+
+    def update(self, stats):
+        peak = max(self.stats.get("peak_rss", 0), stats.get("peak_rss", 0), stats.get("rss", 0))
+        self.stats.update(stats)
+        if peak:
+            self.stats["peak_rss"] = peak
+        self.samples += 1
+
+    def summary(self):
+        """The session as stored in instance metadata."""
+        end = self.ended_monotonic if self.ended_monotonic is not None else time.monotonic()
+        seconds = round(end - self.started_monotonic, 1)
+        summary = {"start": self.started, "seconds": seconds, "exit_code": self.exit_code, "samples": self.samples}
+        for key in ("cpu_seconds", "peak_rss", "read_bytes", "write_bytes"):
+            if key in self.stats:
+                summary[key] = self.stats[key]
+        if "cpu_seconds" in self.stats and seconds > 0:
+            summary["cpu_percent"] = round(self.stats["cpu_seconds"] / seconds * 100, 1)
+        return summary
+
+
+class Supervisor:
+    """Background thread tracking launched games; see the module comment."""
+
+    def __init__(self, on_exit=None, interval=SUPERVISOR_SAMPLE_SECONDS):
+        self.on_exit = on_exit
+        self.interval = interval
+        self.sessions = []
+        self.lock = threading.Lock()
+        self.finished = queue.Queue()
+        self.wake = threading.Event()
+        self.stopped = False
+        self.thread = None
+
+    def watch(self, process, instance_name, game):
+        """Start tracking a launched process and return its Session."""
+        session = Session(process, instance_name, game)
+        with self.lock:
+            self.sessions.append(session)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+        self.wake.set()
+        return session
+
+    def running(self):
+        with self.lock:
+            return list(self.sessions)
+
+    def wait(self, timeout=None):
+        """Block until a session ends and return it (None after timeout). Don't mix with poll()."""
+        try:
+            return self.finished.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def poll(self):
+        """Return the sessions that ended since the last call. Call from the UI thread."""
+        ended = []
+        while True:
+            try:
+                ended.append(self.finished.get_nowait())
+            except queue.Empty:
+                return ended
+
+    def stop(self):
+        """Stop tracking. Games still running get their session so far recorded, without an exit code."""
+        self.stopped = True
+        self.wake.set()
+        for session in self.running():
+            self._end(session)
+
+    def _end(self, session):
+        with self.lock:
+            if session not in self.sessions:
+                return
+            self.sessions.remove(session)
+        session.ended_monotonic = time.monotonic()
+        if self.on_exit:
+            try:
+                self.on_exit(session)
+            except Exception as e:
+                print(f"[ERROR] Could not record the session of '{session.instance_name}': {e}")
+        session.done.set()
+        self.finished.put(session)
+
+    def _run(self):
+        while not self.stopped:
+            self.wake.clear()
+            now = time.monotonic()
+            for session in self.running():
+                exit_code = session.process.poll()
+                if exit_code is not None:
+                    session.exit_code = exit_code
+                    self._end(session)
+                elif now >= session.next_sample:
+                    stats = sample(session.process.pid)
+                    if stats:
+                        session.update(stats)
+                    session.next_sample = now + self.interval
+            self.wake.wait(EXIT_CHECK_SECONDS)
+
+
+class LaunchQueue:
+    """
+    Holds launches that would go over a running-instance cap until enough games have exited.
+    Requests launch strictly in the order they were made: one waiting for its cap also holds back
+    the requests behind it, even those whose caps would allow them, so none waits forever.
+    Not thread-safe: request, cancel and dispatch are all called from the same (UI) thread.
+    """
+
+    def __init__(self, supervisor):
+        self.supervisor = supervisor
+        self.requests = []
+        # Launches still starting on another thread, not yet watched by the supervisor.
+        self.starting = 0
+
+    def request(self, instance_name, cap, launch):
+        """
+        Call launch() now if fewer than cap games are running (cap None for no limit), else queue it.
+        Returns None if it was launched, or the queued request (which cancel takes).
+        """
+        request = {"instance": instance_name, "cap": cap, "launch": launch}
+        self.requests.append(request)
+        self.dispatch()
+        if request not in self.requests:
+            return None
+        ahead = len(self.requests) - 1
+        print(f"[INFO] Queued '{instance_name}': {len(self.supervisor.running())} running, limit {cap}"
+              f"{f', {ahead} queued ahead' if ahead else ''}.")
+        return request
+
+    def cancel(self, request):
+        if request in self.requests:
+            self.requests.remove(request)
+            print(f"[INFO] Cancelled the queued launch of '{request['instance']}'.")
+
+    def pending(self):
+        return list(self.requests)
+
+    def hold(self):
+        """Count a launch that finishes on another thread against the caps until release() is called."""
+        self.starting += 1
+
+    def release(self):
+        """A held launch is now watched (or failed): launch what it held back. Returns the launched requests."""
+        self.starting -= 1
+        return self.dispatch()
+
+    def dispatch(self):
+        """
+        Launch queued requests oldest first, up to the first one its cap still holds back.
+        Call whenever a session ends.
+        A failing launch is dropped from the queue and its exception passed on once the rest ran.
+        Returns the launched requests.
+        """
+        launched = []
+        error = None
+        for request in list(self.requests):
+            if not self._allowed(request["cap"]):
+                break
+            self.requests.remove(request)
+            try:
+                request["launch"]()
+                launched.append(request)
+            except Exception as e:
+                error = error or e
+        if error:
+            raise error
+        return launched
+
+    def _allowed(self, cap):
+        return cap is None or len(self.supervisor.running()) + self.starting < cap
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+
+# The launcher's modules are flat files in the Code folder, imported as e.g. "import catalog".
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+@pytest.fixture
+def fixture_text():
+    """Return the text of a file under tests/fixtures."""
+    def read(*parts):
+        with open(os.path.join(FIXTURES_DIR, *parts), "r", encoding="utf-8") as f:
+            return f.read()
+    return read
+
+
+@pytest.fixture
+def catalog_db(tmp_path, monkeypatch):
+    """Point the shared catalog connection at a fresh database under tmp_path."""
+    import catalog
+    monkeypatch.setattr(catalog, "CATALOG_FILE", str(tmp_path / "catalog" / "catalog.db"))
+    monkeypatch.setattr(catalog, "_conn", None)
+    yield catalog.CATALOG_FILE
+    if catalog._conn is not None:
+        catalog._conn.close()
+
+
+@pytest.fixture
+def game(tmp_path, monkeypatch, catalog_db):
+    """
+    A game whose Steam install, versions, instances, file store and catalog all live under tmp_path,
+    with COPY_MODE "store". The Steam install (tmp_path/Steam) holds only Game.exe.
+    """
+    import file_store
+    import operations
+    import version_archive
+    monkeypatch.setattr(file_store, "STORE_DIR", str(tmp_path / "Store"))
+    monkeypatch.setattr(file_store, "COPY_MODE", "store")
+    monkeypatch.setattr(version_archive, "COPY_MODE", "store")
+    steam = tmp_path / "Steam"
+    steam.mkdir()
+    (steam / "Game.exe").write_bytes(b"steam exe")
+    root = tmp_path / "Games" / "Test"
+    game = {
+        "VERSIONS_DIR": str(root / "Versions"),
+        "INSTANCES_DIR": str(root / "Instances"),
+        "TRASH_DIR": str(root / ".trash"),
+        "APP_ID": 1,
+        "EXE_NAME": "Game.exe",
+        "POSSIBLE_PATHS": [str(steam)],
+    }
+    operations.ensure_game_folders(game)
+    operations.invalidate_install_location(game)
+    yield game
+    operations.invalidate_install_location(game)
+
+
+@pytest.fixture
+def make_version(game):
+    """Return a function creating the version folder name from {relative path: bytes} and cataloguing it."""
+    import catalog
+
+    def make(name, files):
+        folder = os.path.join(game["VERSIONS_DIR"], name)
+        for rel, data in files.items():
+            path = os.path.join(folder, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        catalog.put_version(game["VERSIONS_DIR"], name)
+        return folder
+    return make
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from copy_engine import CopyCancelled
+from operations import run_batch
+
+
+def test_run_batch_keeps_order_and_collects_errors():
+    def func(name, progress, cancel_event):
+        time.sleep(0.01 * (5 - int(name)))
+        if name == "3":
+            raise OSError("broken")
+        return int(name) * 10
+
+    results = run_batch([str(n) for n in range(5)], func, workers=3)
+    assert [(name, result) for name, result, _ in results] == [("0", 0), ("1", 10), ("2", 20), ("3", None),
+                                                              ("4", 40)]
+    errors = {name: error for name, _, error in results if error is not None}
+    assert list(errors) == ["3"] and str(errors["3"]) == "broken"
+
+
+def test_run_batch_progress_weighs_items_equally():
+    seen = []
+    lock = threading.Lock()
+
+    def progress(done, total):
+        with lock:
+            seen.append((done, total))
+
+    def func(name, item_progress, cancel_event):
+        # A big item reporting halfway counts as much as a small one.
+        item_progress(500 if name == "big" else 1, 1000 if name == "big" else 2)
+        return name
+
+    run_batch(["big", "small"], func, workers=1, progress=progress)
+    assert seen[0] == (500, 2000)
+    assert seen[-1] == (2000, 2000)
+    assert [done for done, _ in seen] == sorted(done for done, _ in seen)
+
+
+def test_run_batch_cancel_skips_remaining_items():
+    cancel = threading.Event()
+    started = []
+
+    def func(name, progress, cancel_event):
+        started.append(name)
+        cancel_event.set()
+        return name
+
+    results = run_batch(["a", "b", "c"], func, workers=1, cancel_event=cancel)
+    assert started == ["a"]
+    assert results[0] == ("a", "a", None)
+    assert all(isinstance(error, CopyCancelled) for _, _, error in results[1:])
+
+
+@pytest.mark.parametrize("workers", [0, 1, 8])
+def test_run_batch_empty_and_worker_counts(workers):
+    assert run_batch([], lambda *args: None, workers=workers) == []
+    assert run_batch(["a"], lambda name, *args: name, workers=workers) == [("a", "a", None)]
@@ -0,0 +1,95 @@
+import datetime
+import json
+import os
+import sqlite3
+
+import catalog
+from instance_info import get_instance_info, write_instance_info, sync_instance_infos, refresh_instance_infos, \
+    list_instance_infos, retarget_version, LAST_PLAYED_FORMAT
+
+
+def write_json(instance_path, info):
+    os.makedirs(instance_path, exist_ok=True)
+    with open(os.path.join(instance_path, "instance_info.json"), "w") as f:
+        json.dump(info, f)
+
+
+def test_old_schema_is_migrated(catalog_db):
+    # The first catalog had no last_played_ts on instances and no tier on versions.
+    os.makedirs(os.path.dirname(catalog_db))
+    conn = sqlite3.connect(catalog_db)
+    with conn:
+        conn.executescript("""
+            CREATE TABLE instances (root TEXT NOT NULL, name TEXT NOT NULL, version TEXT NOT NULL DEFAULT '',
+                                    last_played TEXT NOT NULL DEFAULT '', size INTEGER, created REAL,
+                                    extra TEXT NOT NULL DEFAULT '{}', PRIMARY KEY (root, name));
+            CREATE TABLE versions (root TEXT NOT NULL, name TEXT NOT NULL, size INTEGER, created REAL,
+                                   PRIMARY KEY (root, name));
+            INSERT INTO instances (root, name, version, last_played, created, extra)
+                VALUES ('I', 'old', 'v1', '2024-01-02 03:04:05', 1.0, '{"launch_profile": {"nice": 5}}');
+            INSERT INTO versions (root, name, created) VALUES ('V', 'v1', 1.0);
+        """)
+    conn.close()
+
+    info = catalog.get_instance("I", "old")
+    assert info["version"] == "v1" and info["last_played_ts"] is None
+    assert info["launch_profile"] == {"nice": 5}
+    assert catalog.get_version_tier("V", "v1") == "hot"
+    catalog.set_version_tier("V", "v1", "cold")
+    assert catalog.get_version_tier("V", "v1") == "cold"
+    info["last_played_ts"] = 2.0
+    catalog.put_instance("I", "old", info)
+    assert catalog.version_usage("V", "I") == [{"name": "v1", "tier": "cold", "created": 1.0, "last_used": 2.0}]
+
+
+def test_instance_json_is_imported_on_first_sight(tmp_path, catalog_db):
+    root = str(tmp_path / "Instances")
+    played = "2024-05-06 07:08:09"
+    write_json(os.path.join(root, "a"), {"instance": "a", "version": "v1", "last_played": played, "note": "x"})
+    info = get_instance_info(os.path.join(root, "a"))
+    assert info["version"] == "v1" and info["note"] == "x"
+    assert info["last_played_ts"] == datetime.datetime.strptime(played, LAST_PLAYED_FORMAT).timestamp()
+    # From now on the catalog is the source of truth, not the JSON export.
+    write_json(os.path.join(root, "a"), {"instance": "a", "version": "changed"})
+    assert get_instance_info(os.path.join(root, "a"))["version"] == "v1"
+
+
+def test_write_exports_json(tmp_path, catalog_db):
+    path = str(tmp_path / "Instances" / "a")
+    os.makedirs(path)
+    write_instance_info(path, {"instance": "a", "version": "v1", "last_played": ""})
+    with open(os.path.join(path, "instance_info.json")) as f:
+        assert json.load(f)["version"] == "v1"
+
+
+def test_sync_and_refresh_follow_the_folders(tmp_path, catalog_db):
+    root = str(tmp_path / "Instances")
+    for name in ("a", "b"):
+        write_json(os.path.join(root, name), {"instance": name, "version": "v1", "last_played": ""})
+    sync_instance_infos(root, ["a", "b"])
+    assert [info["instance"] for info in list_instance_infos(root)] == ["a", "b"]
+    write_json(os.path.join(root, "c"), {"instance": "c", "version": "v2", "last_played": ""})
+    os.remove(os.path.join(root, "a", "instance_info.json"))
+    os.rmdir(os.path.join(root, "a"))
+    assert refresh_instance_infos(root, ["a", "c"])
+    assert [info["instance"] for info in list_instance_infos(root)] == ["b", "c"]
+    assert not refresh_instance_infos(root, ["b"])
+    sync_instance_infos(root, ["c"])
+    assert catalog.instance_names(root) == ["c"]
+
+
+def test_retarget_version_rewrites_only_affected_exports(tmp_path, catalog_db):
+    root = str(tmp_path / "Instances")
+    for name, version in (("a", "old"), ("b", "other")):
+        write_json(os.path.join(root, name), {"instance": name, "version": version, "last_played": ""})
+    sync_instance_infos(root, ["a", "b"])
+    assert retarget_version(root, "old", "new") == ["a"]
+    assert catalog.instances_for_version(root, "new") == ["a"]
+    with open(os.path.join(root, "a", "instance_info.json")) as f:
+        assert json.load(f)["version"] == "new"
+
+
+def test_sync_versions(catalog_db):
+    catalog.sync_versions("V", ["a", "b"])
+    catalog.sync_versions("V", ["b", "c"])
+    assert catalog.list_versions("V") == ["b", "c"]
@@ -0,0 +1,80 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import cli
+
+
+@pytest.fixture
+def run(game, monkeypatch, capsys):
+    """Run the CLI against the test game and return (exit code, parsed JSON output)."""
+    monkeypatch.setattr(cli, "games", {"Test": game})
+
+    def run(*argv):
+        code = cli.main(list(argv))
+        return code, json.loads(capsys.readouterr().out)
+    return run
+
+
+def names(listing):
+    return sorted(info["instance"] for info in listing)
+
+
+def test_create_list_and_verify(game, make_version, run):
+    make_version("mod", {"Game.exe": b"modded exe", os.path.join("Content", "a.xnb"): b"a" * 100})
+    code, results = run("create", "one", "two", "--version", "mod")
+    assert code == 0
+    assert [(entry["instance"], entry["ok"], entry["version"]) for entry in results] == [("one", True, "mod"),
+                                                                                         ("two", True, "mod")]
+    assert os.path.isfile(os.path.join(game["INSTANCES_DIR"], "two", "Game.exe"))
+    assert names(run("list")[1]) == ["one", "two"]
+    assert "mod" in [entry["version"] for entry in run("list", "--versions")[1]]
+
+    code, results = run("verify", "one")
+    assert code == 0 and results[0]["clean"] and results[0]["ok_files"] == 2
+
+
+def test_failures_set_the_exit_code(game, make_version, run):
+    make_version("mod", {"Game.exe": b"modded exe"})
+    run("create", "one", "--version", "mod")
+    code, results = run("create", "one", "x" * 26, "fresh", "--version", "mod")
+    assert code == 1
+    assert [entry["ok"] for entry in results] == [False, False, True]
+    assert all(entry["error"] for entry in results[:2])
+    with pytest.raises(SystemExit, match="not found"):
+        run("create", "other", "--version", "missing")
+    with pytest.raises(SystemExit, match="Unknown game"):
+        run("--game", "Nope", "list")
+
+
+def test_clone_rename_and_delete(game, make_version, run):
+    make_version("mod", {"Game.exe": b"modded exe"})
+    run("create", "one", "--version", "mod")
+    code, results = run("clone", "one", "copy")
+    assert code == 0 and results[0]["path"] == os.path.join(game["INSTANCES_DIR"], "copy")
+
+    code, result = run("rename", "copy", "renamed")
+    assert result["path"] == os.path.join(game["INSTANCES_DIR"], "renamed")
+    with pytest.raises(SystemExit):
+        run("rename", "one", "renamed")
+    assert names(run("list")[1]) == ["one", "renamed"]
+
+    code, results = run("delete", "renamed")
+    assert code == 0 and results == [{"instance": "renamed", "ok": True, "purged": False}]
+    assert not os.path.exists(os.path.join(game["INSTANCES_DIR"], "renamed"))
+    # Kept in the trash until the undo window passes, unless purged.
+    assert os.listdir(game["TRASH_DIR"])
+    run("delete", "one", "--purge")
+    assert names(run("list")[1]) == []
+
+
+def test_gc_removes_unused_store_files(game, make_version, run):
+    version = make_version("mod", {"Game.exe": b"modded exe"})
+    run("create", "one", "--version", "mod")
+    assert run("gc")[1] == {"ok": True, "freed_bytes": 0}
+    # Folders deleted outside the launcher leave their store files behind.
+    shutil.rmtree(version)
+    shutil.rmtree(os.path.join(game["INSTANCES_DIR"], "one"))
+    assert run("gc")[1] == {"ok": True, "freed_bytes": len(b"modded exe")}
@@ -0,0 +1,107 @@
+import os
+import random
+
+import pytest
+
+import catalog
+from file_store import folder_usage
+from operations import create_instance, plan_cold_storage, apply_cold_storage, rehydrate_version, compress_version, \
+    get_version_source, trash_instance
+from trash import purge
+from version_archive import archive_path
+
+DAY = 86400
+
+
+def files(seed):
+    rng = random.Random(seed)
+    return {"Game.exe": rng.randbytes(200_000), os.path.join("Content", "data.xnb"): bytes(300_000)}
+
+
+def disk_usage(root):
+    """Bytes used under root, each inode counted once."""
+    seen = set()
+    total = 0
+    for folder, _, names in os.walk(root):
+        for name in names:
+            st = os.lstat(os.path.join(folder, name))
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                total += st.st_size
+    return total
+
+
+def idle(game, name, days=30):
+    with catalog._lock:
+        conn = catalog.connect()
+        with conn:
+            conn.execute("UPDATE versions SET created = created - ? WHERE root = ? AND name = ?",
+                         (days * DAY, game["VERSIONS_DIR"], name))
+
+
+def test_folder_usage_counts_each_file_once(tmp_path, game, make_version):
+    folder = make_version("v", files(1))
+    assert folder_usage(folder) == (500_000, 0)
+    os.link(os.path.join(folder, "Game.exe"), os.path.join(folder, "copy.exe"))
+    assert folder_usage(folder) == (500_000, 0)
+    # An instance built from the version links to the same store blobs.
+    assert create_instance("i", "v", game) == os.path.join(game["INSTANCES_DIR"], "i")
+    unique, shared = folder_usage(folder)
+    assert shared >= 500_000 - 200_000
+    trash_instance(os.path.join(game["INSTANCES_DIR"], "i"), game)
+    for entry in os.listdir(game["TRASH_DIR"]):
+        if not entry.endswith(".json") and ".extra" not in entry:
+            purge(game["TRASH_DIR"], entry)
+    assert folder_usage(folder)[1] == 0
+
+
+def test_versions_shared_with_instances_are_not_moved(tmp_path, game, make_version):
+    make_version("shared", files(1))
+    make_version("alone", files(2))
+    assert isinstance(create_instance("i", "shared", game), str)
+    idle(game, "shared")
+    idle(game, "alone")
+    catalog.put_instance(game["INSTANCES_DIR"], "i", {"version": "shared", "last_played_ts": 0.0, "created": 0.0})
+    versions, sizes, hot_bytes, shared = plan_cold_storage(game, budget=0)
+    assert versions == ["alone"]
+    assert list(shared) == ["shared"] and sizes["shared"] < 500_000
+    assert hot_bytes == sizes["shared"]
+
+
+def test_apply_reports_real_disk_change(tmp_path, game, make_version):
+    make_version("old", files(3))
+    idle(game, "old")
+    before = disk_usage(game["VERSIONS_DIR"]) + disk_usage(str(tmp_path / "Store"))
+    report = apply_cold_storage(game, budget=0)
+    after = disk_usage(game["VERSIONS_DIR"]) + disk_usage(str(tmp_path / "Store"))
+    assert report["moved"] == ["old"]
+    assert report["reclaimed_bytes"] > 0
+    # Only the archive's manifest, saved next to it, is not in the report.
+    assert before - after == pytest.approx(report["reclaimed_bytes"], abs=16 * 1024)
+    assert catalog.get_version_tier(game["VERSIONS_DIR"], "old") == "cold"
+    assert get_version_source("old", game) == archive_path(game["VERSIONS_DIR"], "old")
+
+
+def test_recent_versions_and_budget_are_respected(game, make_version):
+    make_version("new", files(4))
+    make_version("old", files(5))
+    idle(game, "old")
+    assert plan_cold_storage(game, budget=10 ** 9)[0] == []
+    assert plan_cold_storage(game, budget=0)[0] == ["old"]
+    with pytest.raises(ValueError):
+        apply_cold_storage(game, budget=None)
+
+
+def test_rehydrate_round_trip(game, make_version):
+    data = files(6)
+    folder = make_version("v", data)
+    stats = compress_version("v", game)
+    assert stats["shared_bytes"] == 0 and not os.path.exists(folder)
+    catalog.set_version_tier(game["VERSIONS_DIR"], "v", "cold")
+    rehydrate_version("v", game)
+    for rel, content in data.items():
+        with open(os.path.join(folder, rel), "rb") as f:
+            assert f.read() == content
+    assert not os.path.exists(archive_path(game["VERSIONS_DIR"], "v"))
+    assert catalog.get_version_tier(game["VERSIONS_DIR"], "v") == "hot"
+    assert os.listdir(os.path.join(os.path.dirname(game["VERSIONS_DIR"]), ".staging")) == []
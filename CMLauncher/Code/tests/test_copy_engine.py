@@ -0,0 +1,138 @@
+import errno
+import os
+import threading
+
+import pytest
+
+from copy_engine import copy_tree, scan_tree, CopyCancelled, format_copy_stats, CHUNK_SIZE
+
+
+def make_tree(root):
+    files = {
+        "Game.exe": os.urandom(3 * CHUNK_SIZE + 17),
+        os.path.join("Content", "a.xnb"): b"a" * 1000,
+        os.path.join("Content", "Sub", "b.xnb"): b"",
+        os.path.join("Empty", "Nested", "c.txt"): b"c",
+    }
+    for rel, data in files.items():
+        os.makedirs(os.path.join(root, os.path.dirname(rel)), exist_ok=True)
+        with open(os.path.join(root, rel), "wb") as f:
+            f.write(data)
+    os.makedirs(os.path.join(root, "Hollow"))
+    return files
+
+
+def read_tree(root):
+    dirs, files = scan_tree(root)
+    contents = {}
+    for rel, _ in files:
+        with open(os.path.join(root, rel), "rb") as f:
+            contents[rel] = f.read()
+    return sorted(dirs), contents
+
+
+def test_copy_tree_copies_everything(tmp_path):
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    files = make_tree(src)
+    seen = []
+    stats = copy_tree(src, dst, progress=lambda done, total: seen.append((done, total)), workers=4)
+    assert read_tree(dst) == read_tree(src)
+    assert read_tree(dst)[1] == files
+    total = sum(len(data) for data in files.values())
+    assert stats["files"] == len(files) and stats["bytes"] == total
+    assert seen[-1] == (total, total)
+    assert os.stat(os.path.join(dst, "Game.exe")).st_mtime_ns == os.stat(os.path.join(src, "Game.exe")).st_mtime_ns
+    assert "files" in format_copy_stats(stats)
+
+
+def test_copy_tree_refuses_existing_destination(tmp_path):
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    make_tree(src)
+    os.makedirs(dst)
+    with pytest.raises(FileExistsError):
+        copy_tree(src, dst)
+    assert os.listdir(dst) == []
+
+
+def test_copy_tree_cancelled_before_start_leaves_nothing(tmp_path):
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    make_tree(src)
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(CopyCancelled):
+        copy_tree(src, dst, cancel_event=cancel)
+    assert not os.path.exists(dst)
+
+
+def test_copy_tree_cancelled_midway_removes_partial_copy(tmp_path):
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    make_tree(src)
+    cancel = threading.Event()
+
+    def progress(done, total):
+        if done:
+            cancel.set()
+
+    with pytest.raises(CopyCancelled):
+        copy_tree(src, dst, progress=progress, cancel_event=cancel, workers=1)
+    assert not os.path.exists(dst)
+
+
+def test_copy_tree_failure_removes_partial_copy(tmp_path, monkeypatch):
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    make_tree(src)
+    import copy_engine
+    real = copy_engine._copy_file
+
+    def flaky(src_file, dst_file, *args):
+        if src_file.endswith("c.txt"):
+            raise OSError("disk full")
+        return real(src_file, dst_file, *args)
+
+    monkeypatch.setattr(copy_engine, "_copy_file", flaky)
+    with pytest.raises(OSError, match="disk full"):
+        copy_tree(src, dst)
+    assert not os.path.exists(dst)
+
+
+def test_copy_mode_copy_uses_plain_copies(monkeypatch):
+    import copy_engine
+    monkeypatch.setattr(copy_engine, "COPY_MODE", "copy")
+    assert copy_engine.available_strategies() == ["copy"]
+
+
+def test_unsupported_strategy_falls_back_and_is_cached(tmp_path, monkeypatch):
+    import copy_engine
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    files = make_tree(src)
+    calls = []
+
+    def unsupported(fsrc, fdst, size, progress):
+        calls.append(fsrc.name)
+        raise OSError(errno.EOPNOTSUPP, "not supported")
+
+    monkeypatch.setattr(copy_engine, "_volume_strategies", {})
+    monkeypatch.setattr(copy_engine, "available_strategies", lambda: ["reflink", "copy"])
+    monkeypatch.setitem(copy_engine.COPIERS, "reflink", unsupported)
+    stats = copy_tree(src, dst, workers=1)
+    assert read_tree(dst)[1] == files
+    assert stats["strategy"] == "copy"
+    # The first failure drops reflink for the volume; later files go straight to copy.
+    assert len(calls) == 1
+    assert copy_engine.volume_strategy(src, dst) == "copy"
+
+
+def test_real_errors_are_not_swallowed(tmp_path, monkeypatch):
+    import copy_engine
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    make_tree(src)
+
+    def broken(fsrc, fdst, size, progress):
+        raise OSError(errno.EIO, "I/O error")
+
+    monkeypatch.setattr(copy_engine, "_volume_strategies", {})
+    monkeypatch.setattr(copy_engine, "available_strategies", lambda: ["reflink", "copy"])
+    monkeypatch.setitem(copy_engine.COPIERS, "reflink", broken)
+    with pytest.raises(OSError, match="I/O error"):
+        copy_tree(src, dst)
+    assert not os.path.exists(dst)
@@ -0,0 +1,132 @@
+import os
+import stat
+
+import pytest
+
+import file_store
+from file_store import ingest_tree, link_tree, read_links, is_linked, blob_path, detach_file, remove_file, \
+    remove_tree, collect_garbage, is_private, STORE_LINKS_FILE
+
+FILES = {
+    "Game.exe": b"exe" * 1000,
+    os.path.join("Content", "a.xnb"): b"shared",
+    os.path.join("Content", "b.xnb"): b"shared",
+    "settings.ini": b"volume=5",
+}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_store, "STORE_DIR", str(tmp_path / "Store"))
+    monkeypatch.setattr(file_store, "COPY_MODE", "store")
+    return str(tmp_path / "Store")
+
+
+def make_folder(path, files=FILES):
+    for rel, data in files.items():
+        os.makedirs(os.path.join(path, os.path.dirname(rel)), exist_ok=True)
+        with open(os.path.join(path, rel), "wb") as f:
+            f.write(data)
+    return path
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def blobs(store):
+    objects = os.path.join(store, "objects")
+    return sorted(name for _, _, names in os.walk(objects) for name in names)
+
+
+@pytest.mark.parametrize("rel, private", [
+    ("settings.ini", True),
+    (os.path.join("Saves", "slot1.dat"), True),
+    (os.path.join("Mods", "Foo", "foo.dll"), True),
+    ("Game.exe", False),
+    (os.path.join("Content", "a.xnb"), False),
+])
+def test_is_private(rel, private):
+    assert is_private(rel) == private
+
+
+def test_ingest_shares_identical_files(tmp_path, store):
+    folder = make_folder(str(tmp_path / "v1"))
+    links = ingest_tree(folder)
+    assert set(links) == {"Game.exe", os.path.join("Content", "a.xnb"), os.path.join("Content", "b.xnb")}
+    assert read_links(folder) == links
+    assert len(blobs(store)) == 2
+    a, b = (os.path.join(folder, "Content", name) for name in ("a.xnb", "b.xnb"))
+    assert os.path.samefile(a, b)
+    assert not os.stat(blob_path(links["Game.exe"])).st_mode & stat.S_IWUSR
+    # Private files stay ordinary files.
+    assert os.stat(os.path.join(folder, "settings.ini")).st_nlink == 1
+    # A second ingest finds nothing new.
+    assert ingest_tree(folder, hashes={}) == links
+
+
+def test_link_tree_links_stored_files_and_copies_the_rest(tmp_path, store):
+    src = make_folder(str(tmp_path / "v1"))
+    dst = str(tmp_path / "inst")
+    stats = link_tree(src, dst, ingest=True)
+    assert stats["linked"] == 3 and stats["files"] == 4
+    for rel, data in FILES.items():
+        assert read(os.path.join(dst, rel)) == data
+    assert os.path.samefile(os.path.join(src, "Game.exe"), os.path.join(dst, "Game.exe"))
+    assert not os.path.samefile(os.path.join(src, "settings.ini"), os.path.join(dst, "settings.ini"))
+    assert read_links(dst) == read_links(src)
+    with pytest.raises(FileExistsError):
+        link_tree(src, dst)
+
+
+def test_link_tree_copies_outside_store_mode(tmp_path, store, monkeypatch):
+    monkeypatch.setattr(file_store, "COPY_MODE", "copy")
+    src = make_folder(str(tmp_path / "v1"))
+    dst = str(tmp_path / "inst")
+    stats = link_tree(src, dst, ingest=True)
+    assert "linked" not in stats
+    assert not os.path.exists(os.path.join(dst, STORE_LINKS_FILE))
+    assert os.stat(os.path.join(dst, "Game.exe")).st_nlink == 1
+
+
+def test_detach_file_leaves_the_blob_alone(tmp_path, store):
+    src = make_folder(str(tmp_path / "v1"))
+    dst = str(tmp_path / "inst")
+    link_tree(src, dst, ingest=True)
+    digest = read_links(dst)["Game.exe"]
+    detach_file(dst, "Game.exe")
+    path = os.path.join(dst, "Game.exe")
+    assert "Game.exe" not in read_links(dst)
+    assert not is_linked(path, digest)
+    with open(path, "ab") as f:
+        f.write(b"patched")
+    assert read(blob_path(digest)) == FILES["Game.exe"]
+    assert read(os.path.join(src, "Game.exe")) == FILES["Game.exe"]
+
+
+def test_removing_folders_releases_unused_blobs(tmp_path, store):
+    src = make_folder(str(tmp_path / "v1"))
+    dst = str(tmp_path / "inst")
+    link_tree(src, dst, ingest=True)
+    remove_file(dst, "Game.exe")
+    assert not os.path.exists(os.path.join(dst, "Game.exe"))
+    assert "Game.exe" not in read_links(dst)
+    assert len(blobs(store)) == 2
+    remove_tree(src)
+    # The instance still links to the shared blob; the exe blob lost its last user.
+    assert not os.path.exists(src)
+    assert len(blobs(store)) == 1
+    remove_tree(dst)
+    assert blobs(store) == []
+
+
+def test_collect_garbage_removes_orphaned_blobs(tmp_path, store):
+    folder = make_folder(str(tmp_path / "v1"))
+    links = ingest_tree(folder)
+    # Deleting a folder without remove_tree leaves its blobs behind.
+    os.remove(os.path.join(folder, "Game.exe"))
+    assert collect_garbage() == len(FILES["Game.exe"])
+    assert not os.path.exists(blob_path(links["Game.exe"]))
+    assert os.path.exists(blob_path(links[os.path.join("Content", "a.xnb")]))
+    assert collect_garbage() == 0
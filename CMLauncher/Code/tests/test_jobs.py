@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from copy_engine import CopyCancelled
+from jobs import JobQueue, QUEUED, DONE, FAILED, CANCELLED
+
+
+@pytest.fixture
+def jobs():
+    queue = JobQueue(workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def wait_finished(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < deadline, f"job '{job.title}' did not finish"
+        time.sleep(0.01)
+
+
+def test_job_result_and_progress(jobs):
+    def work(job):
+        job.report(5, 10)
+        job.set_status("halfway")
+        return 42
+
+    job = jobs.submit("answer", work)
+    wait_finished(job)
+    assert (job.state, job.result, job.error) == (DONE, 42, None)
+    assert job.progress == (5, 10) and job.status == "halfway"
+    assert jobs.active() == []
+
+
+def test_failed_and_cancelled_jobs(jobs):
+    def fail(job):
+        raise OSError("disk full")
+
+    def cancelled(job):
+        raise CopyCancelled("stop")
+
+    failed = jobs.submit("fail", fail)
+    stopped = jobs.submit("cancel", cancelled)
+    wait_finished(failed)
+    wait_finished(stopped)
+    assert failed.state == FAILED and str(failed.error) == "disk full"
+    assert stopped.state == CANCELLED and stopped.error is None
+
+
+def test_cancel_before_start_never_runs(jobs):
+    release = threading.Event()
+    ran = []
+    blocker = jobs.submit("blocker", lambda job: release.wait(5))
+    queued = jobs.submit("queued", lambda job: ran.append(job))
+    assert queued.state == QUEUED
+    queued.cancel()
+    release.set()
+    wait_finished(blocker)
+    wait_finished(queued)
+    assert queued.state == CANCELLED and ran == []
+
+
+def test_hidden_jobs_skip_the_queue(jobs):
+    release = threading.Event()
+    blocker = jobs.submit("blocker", lambda job: release.wait(5))
+    hidden = jobs.submit("load tab", lambda job: "loaded", hidden=True)
+    try:
+        wait_finished(hidden)
+        assert hidden.result == "loaded"
+        assert not blocker.finished
+    finally:
+        release.set()
+    wait_finished(blocker)
+
+
+def test_poll_reports_each_changed_job_once():
+    # Without workers the job only runs when _run is called, so every state change is queued by then.
+    jobs = JobQueue(workers=0)
+    job = jobs.submit("quick", lambda job: None)
+    jobs._run(job)
+    # Queued, running and done were all pushed, but poll returns the job once.
+    assert jobs.poll() == [job]
+    assert jobs.poll() == []
+    jobs.forget(job)
+    assert job not in jobs.jobs
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from launch_profile import parse_cpus, format_cpus, profile_error, describe, empty_profile, child_setup
+
+
+@pytest.mark.parametrize("text, cpus", [
+    ("", None),
+    ("  ", None),
+    ("0", [0]),
+    ("0-3,6", [0, 1, 2, 3, 6]),
+    (" 6 , 0-1 ,1", [0, 1, 6]),
+    ("2-2", [2]),
+])
+def test_parse_cpus(text, cpus):
+    assert parse_cpus(text) == cpus
+
+
+@pytest.mark.parametrize("text", ["a", "1-", "-1", "3-1", "1,,2", "0-x"])
+def test_parse_cpus_rejects(text):
+    with pytest.raises(ValueError):
+        parse_cpus(text)
+
+
+@pytest.mark.parametrize("cpus, text", [
+    (None, ""),
+    ([], ""),
+    ([0], "0"),
+    ([0, 1, 2, 3, 6], "0-3,6"),
+    ([6, 2, 1, 3], "1-3,6"),
+    ([0, 2, 4], "0,2,4"),
+])
+def test_format_cpus(cpus, text):
+    assert format_cpus(cpus) == text
+    if cpus:
+        assert parse_cpus(text) == sorted(cpus)
+
+
+def test_profile_error(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    assert profile_error(empty_profile()) is None
+    assert profile_error({"nice": 19, "cpus": [0, 3], "max_running": 1}) is None
+    assert "between -20 and 19" in profile_error({"nice": 20})
+    assert "between -20 and 19" in profile_error({"nice": -21})
+    assert "cannot be empty" in profile_error({"cpus": []})
+    assert profile_error({"cpus": [4]}) == "This machine only has CPUs 0-3."
+    assert "at least 1" in profile_error({"max_running": 0})
+
+
+def test_describe():
+    assert describe(empty_profile()) == "default"
+    assert describe({"nice": 10, "cpus": [0, 1, 2, 3], "max_running": 2}) == "nice 10, CPUs 0-3, max 2 running"
+
+
+def test_child_setup_only_when_needed():
+    assert child_setup(empty_profile()) is None
+    assert child_setup({"cpus": []}) is None
+    if hasattr(os, "sched_setaffinity"):
+        assert callable(child_setup({"cpus": [0]}))
@@ -0,0 +1,147 @@
+import random
+
+import pytest
+
+pytest.importorskip("tkinter")
+import main
+from main import longest_increasing_run
+
+
+def is_increasing_run(values, indexes):
+    return indexes == sorted(indexes) and all(values[a] < values[b] for a, b in zip(indexes, indexes[1:]))
+
+
+@pytest.mark.parametrize("values, length", [
+    ([], 0),
+    ([5], 1),
+    ([0, 1, 2, 3], 4),
+    ([3, 2, 1, 0], 1),
+    ([1, 1, 1], 1),
+    ([3, 0, 1, 4, 2, 5], 4),
+    ([9, 1, 8, 2, 7, 3], 3),
+])
+def test_longest_increasing_run(values, length):
+    run = longest_increasing_run(values)
+    assert len(run) == length
+    assert is_increasing_run(values, run)
+
+
+def test_longest_increasing_run_matches_brute_force():
+    rng = random.Random(10)
+    for _ in range(200):
+        values = rng.sample(range(8), rng.randint(0, 8))
+        best = 0
+        for mask in range(1 << len(values)):
+            picked = [i for i in range(len(values)) if mask >> i & 1]
+            if is_increasing_run(values, picked):
+                best = max(best, len(picked))
+        run = longest_increasing_run(values)
+        assert len(run) == best and is_increasing_run(values, run)
+
+
+class FakeTree:
+    """Records the Treeview calls GameTab makes for its instance list."""
+
+    def __init__(self):
+        self.rows = []
+        self.values = {}
+        self.calls = []
+
+    def __getitem__(self, key):
+        assert key == "columns"
+        return ("Instance", "Version", "Last Played")
+
+    def yview(self):
+        return (0.0, 1.0)
+
+    def yview_moveto(self, fraction):
+        self.calls.append(("yview_moveto", fraction))
+
+    def insert(self, parent, index, iid, values):
+        self.calls.append(("insert", iid))
+        self.rows.append(iid)
+        self.values[iid] = values
+
+    def delete(self, *iids):
+        self.calls.append(("delete",) + iids)
+        for iid in iids:
+            self.rows.remove(iid)
+            del self.values[iid]
+
+    def item(self, iid, values):
+        self.calls.append(("item", iid))
+        self.values[iid] = values
+
+    def move(self, iid, parent, index):
+        self.calls.append(("move", iid))
+        self.rows.remove(iid)
+        self.rows.insert(index, iid)
+
+
+class InstanceList:
+    """The instance list logic of GameTab on a fake tree."""
+    apply_rows = main.GameTab.apply_rows
+    sort_tree = main.GameTab.sort_tree
+    sort_by = main.GameTab.sort_by
+    reorder_rows = main.GameTab.reorder_rows
+    row_for = staticmethod(main.GameTab.row_for)
+
+    def __init__(self):
+        self.tree = FakeTree()
+        self.row_values = {}
+        self.row_keys = {}
+        self.row_order = []
+        self.sort_column = "Instance"
+        self.sort_reverse = False
+
+    def on_instance_select(self, event):
+        pass
+
+    def show(self, infos):
+        self.tree.calls.clear()
+        self.apply_rows({info["instance"]: self.row_for(info) for info in infos})
+        return self.tree.calls
+
+
+def info(name, version="v1", ts=None):
+    return {"instance": name, "version": version, "last_played_ts": ts}
+
+
+def test_apply_rows_touches_only_changes():
+    view = InstanceList()
+    calls = view.show([info("b"), info("a"), info("c")])
+    assert view.tree.rows == ["a", "b", "c"]
+    assert sorted(call[0] for call in calls) == ["insert"] * 3 + ["move"] * 1
+
+    assert view.show([info("a"), info("b"), info("c")]) == []
+
+    calls = view.show([info("a"), info("b", "v2"), info("d")])
+    assert calls == [("delete", "c"), ("item", "b"), ("insert", "d")]
+    assert view.tree.rows == ["a", "b", "d"] == view.row_order
+    assert view.tree.values["b"][1] == "v2"
+
+
+
+def test_sorting_moves_as_few_rows_as_possible():
+    view = InstanceList()
+    names = [f"i{n:02}" for n in range(20)]
+    view.show([info(name, ts=float(n)) for n, name in enumerate(names)])
+    # Re-sorting by last played puts the rows in the same order: nothing moves.
+    view.tree.calls.clear()
+    view.sort_by("Last Played")
+    assert view.tree.calls == []
+    # One instance played just now moves alone.
+    calls = view.show([info(name, ts=100.0 if name == "i05" else float(n)) for n, name in enumerate(names)])
+    assert [call for call in calls if call[0] == "move"] == [("move", "i05")]
+    assert view.tree.rows[-1] == "i05" and view.tree.rows == view.row_order
+    view.sort_by("Last Played")
+    assert view.tree.rows[0] == "i05"
+    assert view.tree.rows == sorted(view.tree.rows, key=lambda iid: view.row_keys[iid][2], reverse=True)
+
+
+def test_never_played_sorts_last():
+    view = InstanceList()
+    view.sort_column = "Last Played"
+    view.sort_reverse = True
+    view.show([info("a"), info("b", ts=5.0), info("c", ts=1.0)])
+    assert view.tree.rows == ["b", "c", "a"]
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+import manifest
+from manifest import hash_file, update_manifest, load_manifest, diff_manifests, MMAP_SIZE
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    root = tmp_path / "version"
+    write(str(root / "Game.exe"), b"exe")
+    write(str(root / "Content" / "a.xnb"), b"a" * 1000)
+    write(str(root / "instance_info.json"), b"{}")
+    return str(root)
+
+
+@pytest.mark.parametrize("size", [0, 10, MMAP_SIZE + 3])
+def test_hash_file_matches_sha256(tmp_path, size):
+    data = os.urandom(size)
+    path = str(tmp_path / "file")
+    write(path, data)
+    assert hash_file(path) == hashlib.sha256(data).hexdigest()
+    assert hash_file(path, size) == hash_file(path)
+
+
+def test_update_manifest_hashes_only_changed_files(tmp_path, folder, monkeypatch):
+    manifest_file = str(tmp_path / "version.manifest.json")
+    files = update_manifest(folder, manifest_file)
+    # Launcher files are not part of the version.
+    assert set(files) == {"Game.exe", os.path.join("Content", "a.xnb")}
+    assert files["Game.exe"]["strong"] == hashlib.sha256(b"exe").hexdigest()
+    assert load_manifest(manifest_file) == files
+
+    hashed = []
+    real = manifest.hash_file
+    monkeypatch.setattr(manifest, "hash_file", lambda path, size=None: hashed.append(path) or real(path, size))
+    assert update_manifest(folder, manifest_file) == files
+    assert hashed == []
+
+    write(os.path.join(folder, "Game.exe"), b"patched exe")
+    write(os.path.join(folder, "Mods", "new.dll"), b"new")
+    updated = update_manifest(folder, manifest_file)
+    assert sorted(hashed) == sorted(os.path.join(folder, rel) for rel in ("Game.exe", os.path.join("Mods", "new.dll")))
+    assert diff_manifests(files, updated) == ([os.path.join("Mods", "new.dll")], [], ["Game.exe"])
+
+
+def test_load_manifest_ignores_unknown_formats(tmp_path):
+    manifest_file = str(tmp_path / "old.manifest.json")
+    with open(manifest_file, "w") as f:
+        json.dump({"format": 0, "files": {"Game.exe": {}}}, f)
+    assert load_manifest(manifest_file) == {}
+    with open(manifest_file, "w") as f:
+        f.write("not json")
+    assert load_manifest(manifest_file) == {}
+    assert load_manifest(str(tmp_path / "missing.manifest.json")) == {}
+
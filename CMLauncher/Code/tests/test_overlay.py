@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+import cli
+from file_store import read_links, blob_path
+from operations import create_instance, overlay_version_files, resync_instance
+
+FILES = {
+    "Game.exe": b"modded exe",
+    os.path.join("Content", "a.xnb"): b"a" * 1000,
+    os.path.join("Mods", "old.dll"): b"old mod",
+}
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def replace(path, data, mtime_ns=None):
+    """Give a file new content without writing through a store link."""
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def version_and_instance(game, make_version):
+    version = make_version("mod", FILES)
+    instance = create_instance("inst", "mod", game)
+    return version, instance
+
+
+def test_unchanged_files_are_skipped(game, version_and_instance):
+    _, instance = version_and_instance
+    summary = resync_instance(instance, game)
+    assert summary["version"] == "mod"
+    assert (summary["copied"], summary["skipped"], summary["removed"]) == (0, len(FILES), 0)
+    # Same content with another mtime is hashed and still skipped.
+    exe = os.path.join(instance, "Game.exe")
+    replace(exe, FILES["Game.exe"], mtime_ns=0)
+    assert overlay_version_files(instance, "mod", game)["copied"] == 0
+
+
+def test_changed_files_are_copied_without_touching_the_store(game, version_and_instance):
+    version, instance = version_and_instance
+    digest = read_links(instance)["Game.exe"]
+    replace(os.path.join(version, "Game.exe"), b"modded exe v2")
+    replace(os.path.join(version, "Content", "new.xnb"), b"new")
+    summary = resync_instance(instance, game)
+    assert (summary["copied"], summary["skipped"]) == (2, len(FILES) - 1)
+    assert summary["copied_bytes"] == len(b"modded exe v2") + len(b"new")
+    assert read(os.path.join(instance, "Game.exe")) == b"modded exe v2"
+    assert read(os.path.join(instance, "Content", "new.xnb")) == b"new"
+    # The old exe blob was unlinked from the instance, never overwritten.
+    assert "Game.exe" not in read_links(instance)
+    assert not os.path.exists(blob_path(digest)) or read(blob_path(digest)) == FILES["Game.exe"]
+
+
+def test_prune_removes_only_files_an_overlay_installed(game, version_and_instance):
+    version, instance = version_and_instance
+    resync_instance(instance, game)
+    os.remove(os.path.join(version, "Mods", "old.dll"))
+    replace(os.path.join(instance, "Mods", "mine.dll"), b"user mod")
+    # Without prune the file stays, and is remembered for a later prune.
+    assert resync_instance(instance, game)["removed"] == 0
+    assert os.path.exists(os.path.join(instance, "Mods", "old.dll"))
+    assert resync_instance(instance, game, prune=True)["removed"] == 1
+    assert not os.path.exists(os.path.join(instance, "Mods", "old.dll"))
+    assert read(os.path.join(instance, "Mods", "mine.dll")) == b"user mod"
+
+
+def test_missing_version(game, version_and_instance):
+    version, instance = version_and_instance
+    os.rename(version, version + "-gone")
+    with pytest.raises(FileNotFoundError, match="mod"):
+        resync_instance(instance, game)
+
+
+def test_cli_sync(game, version_and_instance, monkeypatch, capsys):
+    version, instance = version_and_instance
+    monkeypatch.setattr(cli, "games", {"Test": game})
+    replace(os.path.join(version, "Game.exe"), b"modded exe v2")
+    assert cli.main(["sync", "inst", "--prune"]) == 0
+    result = json.loads(capsys.readouterr().out)
+    assert result[0]["ok"] and result[0]["copied"] == 1 and result[0]["version"] == "mod"
+    assert read(os.path.join(instance, "Game.exe")) == b"modded exe v2"
+    assert cli.main(["sync", "missing"]) == 1
+    assert not json.loads(capsys.readouterr().out)[0]["ok"]
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from prefetch import baseline_due, cached_fraction, summarize, format_summary, warm_cache, load_profile
+
+
+def runs(*prefetched):
+    return [{"prefetched": flag} for flag in prefetched]
+
+
+@pytest.mark.parametrize("history, every, due", [
+    (runs(), 5, False),
+    (runs(True, True, True), 5, False),
+    (runs(False, True, True, True, True), 5, True),
+    (runs(True, True, True, False), 5, False),
+    (runs(True), 1, True),
+    (runs(False), 1, True),
+    (runs(True, True), 2, True),
+    (runs(True) * 10, None, False),
+])
+def test_baseline_due(history, every, due):
+    assert baseline_due(history, every) == due
+
+
+def test_summary_leaves_out_warm_cache_runs():
+    profile = {"files": [], "runs": [
+        {"prefetched": False, "ready": 10.0},
+        {"prefetched": False, "ready": 4.0, "cached": 0.9},
+        {"prefetched": False, "ready": 12.0, "cached": 0.1},
+        {"prefetched": True, "ready": 6.0},
+        {"prefetched": True, "ready": None},
+    ]}
+    assert summarize(profile) == {"cold": 11.0, "warm": 6.0, "saved": 5.0}
+    assert format_summary(summarize(profile)) == "6.0s to ready with prefetch vs 11.0s without (5.0s faster)"
+    assert [warm_cache(run) for run in profile["runs"]] == [False, True, False, False, False]
+
+
+def test_summary_without_runs(tmp_path):
+    profile = load_profile(str(tmp_path / "missing.json"))
+    assert format_summary(summarize(profile)) == "no startup measured yet"
+
+
+@pytest.mark.skipif(not hasattr(os, "RWF_NOWAIT"), reason="needs preadv with RWF_NOWAIT")
+def test_cached_fraction(tmp_path):
+    with open(tmp_path / "a", "wb") as f:
+        f.write(os.urandom(256 * 1024))
+    with open(tmp_path / "empty", "wb"):
+        pass
+    # Just written, so in the page cache.
+    assert cached_fraction(str(tmp_path), ["a", "empty", "missing"]) == 1.0
+    assert cached_fraction(str(tmp_path), ["empty"]) is None
+    assert cached_fraction(str(tmp_path), []) is None
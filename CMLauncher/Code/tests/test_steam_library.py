@@ -0,0 +1,140 @@
+import os
+
+import pytest
+
+import steam_library
+from steam_library import parse_vdf, library_folders, find_app, VDFError
+
+APP_ID = 253430
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    steam_library.clear_cache()
+    yield
+    steam_library.clear_cache()
+
+
+def escape(path):
+    """Write a path the way Steam does inside a quoted KeyValues string."""
+    return path.replace("\\", "\\\\")
+
+
+def make_library(path, apps=None, installed=True):
+    """Create a Steam library at path with a manifest (and install folder) for every app in apps."""
+    os.makedirs(os.path.join(path, "steamapps", "common"), exist_ok=True)
+    for app_id, installdir in (apps or {}).items():
+        with open(os.path.join(path, "steamapps", f"appmanifest_{app_id}.acf"), "w") as f:
+            f.write(f'"AppState"\n{{\n\t"appid"\t\t"{app_id}"\n\t"installdir"\t\t"{installdir}"\n}}\n')
+        if installed:
+            os.makedirs(os.path.join(path, "steamapps", "common", installdir), exist_ok=True)
+
+
+def write_library_folders(root, text):
+    os.makedirs(os.path.join(root, "steamapps"), exist_ok=True)
+    with open(os.path.join(root, steam_library.LIBRARY_FOLDERS_FILE), "w") as f:
+        f.write(text)
+
+
+def test_parse_new_library_folders(fixture_text):
+    folders = parse_vdf(fixture_text("steam", "libraryfolders.vdf"))["libraryfolders"]
+    assert folders["0"]["path"] == r"C:\Program Files (x86)\Steam"
+    assert folders["1"]["path"] == r"D:\SteamLibrary"
+    assert folders["1"]["label"] == "Games"
+    assert set(folders["0"]["apps"]) == {"228980", "253430"}
+    assert folders["1"]["apps"] == {"675210": "241172480"}
+
+
+def test_parse_old_library_folders(fixture_text):
+    folders = parse_vdf(fixture_text("steam", "libraryfolders_old.vdf"))["libraryfolders"]
+    assert folders["1"] == r"D:\SteamLibrary"
+    assert folders["2"] == r"E:\Games\Steam Library"
+    assert folders["timenextstatsreport"] == "1616271400"
+
+
+def test_parse_app_manifest(fixture_text):
+    state = parse_vdf(fixture_text("steam", "appmanifest_253430.acf"))["appstate"]
+    assert state["appid"] == "253430"
+    assert state["installdir"] == "CastleMiner Z"
+    assert state["launcherpath"] == r"C:\Program Files (x86)\Steam\steam.exe"
+    assert state["installeddepots"]["253431"]["manifest"] == "5185470112405183420"
+    assert state["userconfig"] == {"language": "english"}
+
+
+def test_parse_escapes_comments_and_bare_tokens():
+    text = '// a comment\n"Root"\n{\n\t"quote"\t"say \\"hi\\""\n\tbare value // trailing\n\t"tab"\t"a\\tb"\n}\n'
+    assert parse_vdf(text) == {"root": {"quote": 'say "hi"', "bare": "value", "tab": "a\tb"}}
+
+
+@pytest.mark.parametrize("text", ['"a"\n{\n\t"b"\t"c"\n', '"a"\t"b"\n}\n', '{\n}\n', '"dangling"'])
+def test_parse_malformed(text):
+    with pytest.raises(VDFError):
+        parse_vdf(text)
+
+
+def test_library_folders_new_layout(tmp_path, fixture_text):
+    root = str(tmp_path / "Steam")
+    other = str(tmp_path / "Library 2")
+    text = fixture_text("steam", "libraryfolders.vdf")
+    text = text.replace(escape(r"C:\Program Files (x86)\Steam"), escape(root))
+    text = text.replace(escape(r"D:\SteamLibrary"), escape(other))
+    write_library_folders(root, text)
+    assert library_folders([root]) == [(root, {"228980", "253430"}), (other, {"675210"})]
+
+
+def test_library_folders_old_layout(tmp_path, fixture_text):
+    root = str(tmp_path / "Steam")
+    write_library_folders(root, fixture_text("steam", "libraryfolders_old.vdf"))
+    # Old files list no apps, and the Steam folder itself is always a library.
+    assert library_folders([root]) == [(r"D:\SteamLibrary", None), (r"E:\Games\Steam Library", None), (root, None)]
+
+
+def test_library_folders_skips_missing_and_unreadable(tmp_path):
+    broken = str(tmp_path / "Broken")
+    write_library_folders(broken, '"libraryfolders"\n{\n')
+    assert library_folders([str(tmp_path / "Missing"), broken]) == [(broken, None)]
+
+
+def test_find_app_in_listed_library(tmp_path, fixture_text):
+    root = str(tmp_path / "Steam")
+    library = str(tmp_path / "Games")
+    text = fixture_text("steam", "libraryfolders.vdf")
+    text = text.replace(escape(r"C:\Program Files (x86)\Steam"), escape(root))
+    text = text.replace(escape(r"D:\SteamLibrary"), escape(library))
+    text = text.replace('"675210"', f'"{APP_ID}"').replace('"253430"', '"1"')
+    write_library_folders(root, text)
+    make_library(root)
+    make_library(library, {APP_ID: "CastleMiner Z"})
+    assert find_app(APP_ID, [root]) == os.path.join(library, "steamapps", "common", "CastleMiner Z")
+
+
+def test_find_app_probes_unlisted_libraries(tmp_path):
+    root = str(tmp_path / "Steam")
+    library = str(tmp_path / "Games")
+    write_library_folders(root, f'"LibraryFolders"\n{{\n\t"1"\t\t"{escape(library)}"\n}}\n')
+    make_library(root)
+    make_library(library, {APP_ID: "CastleMiner Z"})
+    assert find_app(APP_ID, [root]) == os.path.join(library, "steamapps", "common", "CastleMiner Z")
+
+
+def test_find_app_missing(tmp_path, fixture_text):
+    root = str(tmp_path / "Steam")
+    write_library_folders(root, fixture_text("steam", "libraryfolders_old.vdf"))
+    make_library(root, {675210: "CastleMiner Warfare"})
+    assert find_app(APP_ID, [root]) is None
+    # A manifest whose install folder is gone doesn't count either.
+    make_library(root, {APP_ID: "CastleMiner Z"}, installed=False)
+    assert find_app(APP_ID, [root]) is None
+
+
+def test_find_app_cache_follows_manifest_changes(tmp_path):
+    root = str(tmp_path / "Steam")
+    write_library_folders(root, '"libraryfolders"\n{\n}\n')
+    make_library(root, {APP_ID: "CastleMiner Z"})
+    first = find_app(APP_ID, [root])
+    assert first == os.path.join(root, "steamapps", "common", "CastleMiner Z")
+    make_library(root, {APP_ID: "CMZ"})
+    manifest = os.path.join(root, "steamapps", f"appmanifest_{APP_ID}.acf")
+    stat = os.stat(manifest)
+    os.utime(manifest, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert find_app(APP_ID, [root]) == os.path.join(root, "steamapps", "common", "CMZ")
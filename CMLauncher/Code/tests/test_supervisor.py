@@ -0,0 +1,147 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import supervisor as supervisor_module
+from operations import create_instance, record_session, instance_stats
+from instance_info import get_instance_info
+from supervisor import LaunchQueue, Session, Supervisor, sample
+
+
+class FakeSupervisor:
+    def __init__(self):
+        self.sessions = []
+
+    def running(self):
+        return list(self.sessions)
+
+
+@pytest.fixture
+def queue():
+    supervisor = FakeSupervisor()
+    launches = LaunchQueue(supervisor)
+    launched = []
+
+    def request(name, cap):
+        def launch():
+            supervisor.sessions.append(name)
+            launched.append(name)
+        return launches.request(name, cap, launch)
+
+    return supervisor, launches, request, launched
+
+
+def test_launches_wait_for_their_cap(queue):
+    supervisor, launches, request, launched = queue
+    assert request("a", 1) is None
+    waiting = request("b", 1)
+    assert waiting is not None and launched == ["a"]
+    assert launches.dispatch() == []
+    supervisor.sessions.remove("a")
+    assert launches.dispatch() == [waiting]
+    assert launched == ["a", "b"] and launches.pending() == []
+
+
+def test_held_launches_count_against_the_cap(queue):
+    supervisor, launches, request, launched = queue
+    # A launch still starting on a worker is not running yet, but takes its slot.
+    launches.hold()
+    waiting = request("b", 1)
+    assert waiting is not None and launched == []
+    supervisor.sessions.append("a")
+    assert launches.release() == []
+    supervisor.sessions.remove("a")
+    assert launches.dispatch() == [waiting]
+
+
+def test_queue_is_first_in_first_out(queue):
+    supervisor, launches, request, launched = queue
+    request("a", None)
+    request("b", None)
+    # c waits for the two running games; d has no cap but must not overtake it.
+    request("c", 2)
+    request("d", None)
+    assert launched == ["a", "b"]
+    assert [r["instance"] for r in launches.pending()] == ["c", "d"]
+    supervisor.sessions.remove("a")
+    launches.dispatch()
+    assert launched == ["a", "b", "c", "d"]
+
+
+def test_cancel_and_failing_launch(queue):
+    supervisor, launches, request, launched = queue
+    request("a", 1)
+    waiting = request("b", 1)
+    launches.cancel(waiting)
+    assert launches.pending() == []
+
+    def broken():
+        raise OSError("exe missing")
+
+    # A launch that fails is dropped and doesn't stop the ones queued behind it.
+    supervisor.sessions.append("z")
+    request("x", 2)
+    request("c", 5)
+    launches.requests[0]["launch"] = broken
+    supervisor.sessions.remove("z")
+    with pytest.raises(OSError, match="exe missing"):
+        launches.dispatch()
+    assert launched == ["a", "c"] and launches.pending() == []
+
+
+def test_sample_reads_a_running_process():
+    stats = sample(os.getpid())
+    if not stats:
+        pytest.skip("no psutil or /proc here")
+    assert stats["cpu_seconds"] > 0 and stats["rss"] > 0
+
+
+def test_sample_of_an_exited_process_is_none():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    assert sample(process.pid) is None
+
+
+def test_session_keeps_the_peak_memory():
+    session = Session(None, "inst", {})
+    session.update({"cpu_seconds": 1.0, "rss": 300})
+    session.update({"cpu_seconds": 2.0, "rss": 100})
+    session.started_monotonic -= 10
+    summary = session.summary()
+    assert (summary["cpu_seconds"], summary["peak_rss"], summary["samples"]) == (2.0, 300, 2)
+    assert summary["cpu_percent"] == pytest.approx(20.0, abs=0.5)
+    assert summary["exit_code"] is None
+
+
+def test_supervisor_records_exit_and_samples(monkeypatch):
+    monkeypatch.setattr(supervisor_module, "EXIT_CHECK_SECONDS", 0.02)
+    ended = []
+    tracker = Supervisor(on_exit=ended.append, interval=0.02)
+    process = subprocess.Popen([sys.executable, "-c", "import sys, time; time.sleep(0.5); sys.exit(3)"])
+    session = tracker.watch(process, "inst", {})
+    assert tracker.running() == [session]
+    assert tracker.wait(timeout=10) is session
+    assert ended == [session] and session.done.is_set()
+    assert session.exit_code == 3
+    assert tracker.running() == []
+    summary = session.summary()
+    assert summary["seconds"] >= 0.4
+    if sample(os.getpid()):
+        assert summary["samples"] > 0 and "cpu_seconds" in summary
+    tracker.stop()
+
+
+def test_record_session_adds_up_playtime(game, make_version):
+    make_version("mod", {"Game.exe": b"modded exe"})
+    path = create_instance("inst", "mod", game)
+    record_session("inst", game, {"start": 1.0, "seconds": 60.0, "exit_code": 0, "samples": 3})
+    record_session("inst", game, {"start": 2.0, "seconds": 30.5, "exit_code": 1, "samples": 1})
+    info = get_instance_info(path)
+    assert (info["playtime"], info["sessions"], info["last_session"]["exit_code"]) == (90.5, 2, 1)
+    assert info["last_played_ts"]
+    stats = {entry["instance"]: entry for entry in instance_stats(game)}
+    assert (stats["inst"]["playtime"], stats["inst"]["sessions"]) == (90.5, 2)
+    # A session of a deleted instance is dropped.
+    record_session("gone", game, {"start": 3.0, "seconds": 1.0, "exit_code": 0, "samples": 0})
@@ -0,0 +1,132 @@
+import json
+import os
+import time
+
+import pytest
+
+import trash
+from trash import move_to_trash, restore, reap, reap_due, purge, _claim_due, Reaper
+
+
+def make_folder(path, content=b"data"):
+    os.makedirs(path)
+    with open(os.path.join(path, "file.bin"), "wb") as f:
+        f.write(content)
+    return path
+
+
+def backdate(trash_dir, entry, seconds):
+    path = os.path.join(trash_dir, entry + trash.RECORD_SUFFIX)
+    with open(path) as f:
+        record = json.load(f)
+    record["deleted"] -= seconds
+    with open(path, "w") as f:
+        json.dump(record, f)
+
+
+@pytest.fixture
+def trash_dir(tmp_path):
+    return str(tmp_path / "Trash")
+
+
+def test_move_and_restore(tmp_path, trash_dir):
+    folder = make_folder(str(tmp_path / "Versions" / "mod"))
+    manifest = str(tmp_path / "Versions" / "mod.manifest.json")
+    with open(manifest, "w") as f:
+        f.write("{}")
+    entry = move_to_trash(folder, trash_dir, extra_files=[manifest, str(tmp_path / "missing")], meta={"kind": "v"})
+    assert not os.path.exists(folder) and not os.path.exists(manifest)
+    assert restore(trash_dir, entry) == {"kind": "v"}
+    assert os.path.isfile(os.path.join(folder, "file.bin")) and os.path.isfile(manifest)
+    assert os.listdir(trash_dir) == []
+
+
+def test_restore_refuses_taken_origin(tmp_path, trash_dir):
+    folder = make_folder(str(tmp_path / "a"))
+    entry = move_to_trash(folder, trash_dir)
+    make_folder(folder, b"new")
+    with pytest.raises(FileExistsError):
+        restore(trash_dir, entry)
+    purge(trash_dir, entry)
+    assert os.listdir(trash_dir) == []
+    with pytest.raises(FileNotFoundError):
+        restore(trash_dir, entry)
+
+
+def test_same_name_deleted_twice_gets_separate_entries(tmp_path, trash_dir):
+    folder = str(tmp_path / "a")
+    first = move_to_trash(make_folder(folder, b"1"), trash_dir)
+    second = move_to_trash(make_folder(folder, b"2"), trash_dir)
+    assert first != second
+    restore(trash_dir, first)
+    with open(os.path.join(folder, "file.bin"), "rb") as f:
+        assert f.read() == b"1"
+
+
+def test_claim_waits_for_the_undo_window(tmp_path, trash_dir):
+    entry = move_to_trash(make_folder(str(tmp_path / "a")), trash_dir)
+    due, wait = _claim_due(trash_dir, 30)
+    assert due == [] and 0 < wait <= 30
+    backdate(trash_dir, entry, 31)
+    due, wait = _claim_due(trash_dir, 30)
+    assert due == [entry] and wait is None
+    # Claimed entries can no longer be restored.
+    with pytest.raises(FileNotFoundError):
+        restore(trash_dir, entry)
+    reap(trash_dir, entry)
+    assert os.listdir(trash_dir) == []
+
+
+@pytest.mark.parametrize("name", ["a.json", "b.extra0", "c.json.extra1", "plain"])
+def test_odd_names_are_reaped(tmp_path, trash_dir, name):
+    folder = make_folder(str(tmp_path / name))
+    extra = str(tmp_path / (name + ".manifest.json"))
+    with open(extra, "w") as f:
+        f.write("{}")
+    entry = move_to_trash(folder, trash_dir, extra_files=[extra])
+    backdate(trash_dir, entry, 60)
+    assert _claim_due(trash_dir, 30) == ([entry], None)
+    reap(trash_dir, entry)
+    assert os.listdir(trash_dir) == []
+
+
+def test_leftovers_are_reaped(trash_dir):
+    # A folder whose reclamation was interrupted, a record whose move never happened and an entry
+    # named the way older launchers did.
+    os.makedirs(os.path.join(trash_dir, "123"))
+    with open(os.path.join(trash_dir, "456.json"), "w") as f:
+        json.dump({"origin": "x", "deleted": 0, "extras": [], "meta": {}}, f)
+    os.makedirs(os.path.join(trash_dir, "789-a.json"))
+    with open(os.path.join(trash_dir, "789-a.json.json"), "w") as f:
+        json.dump({"origin": "a.json", "deleted": 0, "extras": [], "meta": {}}, f)
+    due, wait = _claim_due(trash_dir, 30)
+    assert sorted(due) == ["123", "789-a.json"] and wait is None
+    for entry in due:
+        reap(trash_dir, entry)
+    assert os.listdir(trash_dir) == []
+
+
+def test_reap_due_keeps_entries_inside_the_undo_window(tmp_path, trash_dir):
+    old = move_to_trash(make_folder(str(tmp_path / "old")), trash_dir)
+    fresh = move_to_trash(make_folder(str(tmp_path / "fresh")), trash_dir)
+    backdate(trash_dir, old, 60)
+    assert reap_due(trash_dir, 30) == 1
+    assert not os.path.exists(os.path.join(trash_dir, old))
+    restore(trash_dir, fresh)
+    assert os.path.exists(str(tmp_path / "fresh"))
+
+
+def test_reaper_survives_a_broken_trash_folder(tmp_path, trash_dir):
+    broken = str(tmp_path / "not a folder")
+    with open(broken, "w") as f:
+        f.write("")
+    entry = move_to_trash(make_folder(str(tmp_path / "a")), trash_dir)
+    reaper = Reaper([broken, trash_dir], undo_seconds=0)
+    reaper.start()
+    deadline = time.monotonic() + 5
+    while os.path.exists(os.path.join(trash_dir, entry)) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not os.path.exists(os.path.join(trash_dir, entry))
+    assert reaper.thread.is_alive()
+    reaper.stop()
+    reaper.thread.join(5)
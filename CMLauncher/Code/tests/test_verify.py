@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from file_store import read_links, is_linked
+from manifest import update_manifest, verify_tree
+from operations import create_instance, verify_instance, repair_instance
+
+FILES = {
+    "Game.exe": b"modded exe",
+    os.path.join("Content", "a.xnb"): b"a" * 1000,
+    os.path.join("Content", "b.xnb"): b"b" * 1000,
+}
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def replace(path, data):
+    """Swap a file for new content the way the game would, without writing through a store link."""
+    os.remove(path)
+    write(path, data)
+
+
+def test_verify_tree(tmp_path):
+    folder = str(tmp_path / "version")
+    for rel, data in FILES.items():
+        write(os.path.join(folder, rel), data)
+    files = update_manifest(folder, str(tmp_path / "version.manifest.json"))
+    assert verify_tree(folder, files) == {"missing": [], "modified": [], "added": [], "ok": 3, "hashed": 0}
+
+    os.remove(os.path.join(folder, "Game.exe"))
+    write(os.path.join(folder, "extra.txt"), b"extra")
+    # Same size and content with a new mtime is hashed and found intact.
+    path = os.path.join(folder, "Content", "a.xnb")
+    os.utime(path, ns=(0, 0))
+    assert verify_tree(folder, files) == {"missing": ["Game.exe"], "modified": [], "added": ["extra.txt"], "ok": 2,
+                                          "hashed": 1}
+    write(path, b"c" * 1000)
+    assert verify_tree(folder, files)["modified"] == [os.path.join("Content", "a.xnb")]
+
+
+@pytest.fixture
+def instance(game, make_version):
+    make_version("mod", FILES)
+    return create_instance("inst", "mod", game)
+
+
+def test_verify_instance_reports_drift(game, instance):
+    report = verify_instance(instance, game)
+    assert report["version"] == "mod"
+    assert (report["missing"], report["modified"], report["added"], report["ok"]) == ([], [], [], 3)
+
+    os.remove(os.path.join(instance, "Game.exe"))
+    replace(os.path.join(instance, "Content", "a.xnb"), b"x" * 1000)
+    write(os.path.join(instance, "Saves", "slot1.sav"), b"save")
+    report = verify_instance(instance, game)
+    assert report["missing"] == ["Game.exe"]
+    assert report["modified"] == [os.path.join("Content", "a.xnb")]
+    assert report["added"] == [os.path.join("Saves", "slot1.sav")]
+
+
+def test_repair_restores_only_drifted_files(game, instance):
+    os.remove(os.path.join(instance, "Game.exe"))
+    replace(os.path.join(instance, "Content", "a.xnb"), b"x" * 1000)
+    write(os.path.join(instance, "Saves", "slot1.sav"), b"save")
+    report = repair_instance(instance, game)
+    assert report["restored"] == 2
+    assert report["restored_bytes"] == len(FILES["Game.exe"]) + 1000
+    for rel, data in FILES.items():
+        assert read(os.path.join(instance, rel)) == data
+    # Restored files are store links again, and the player's save is untouched.
+    links = read_links(instance)
+    assert all(is_linked(os.path.join(instance, rel), links[rel]) for rel in FILES)
+    assert read(os.path.join(instance, "Saves", "slot1.sav")) == b"save"
+    report = verify_instance(instance, game)
+    assert (report["missing"], report["modified"]) == ([], [])
+
+
+def test_verify_missing_version(game, instance):
+    os.rename(os.path.join(game["VERSIONS_DIR"], "mod"), os.path.join(game["VERSIONS_DIR"], "gone"))
+    with pytest.raises(FileNotFoundError, match="mod"):
+        verify_instance(instance, game)
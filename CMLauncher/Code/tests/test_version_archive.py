@@ -0,0 +1,120 @@
+import os
+import threading
+import zipfile
+
+import pytest
+
+from copy_engine import CopyCancelled
+from file_store import read_links, STORE_LINKS_FILE
+from operations import import_version_archive, create_instance, repair_instance, get_version_source, version_kind
+from version_archive import members, pack_tree, index_archive, extract_archive, extract_files, archive_path
+
+FILES = {
+    "Game.exe": b"modded exe" * 100,
+    "Content/a.xnb": b"a" * 5000,
+    "Content/Sub/b.xnb": b"",
+    "settings.ini": b"volume=5",
+}
+
+
+def make_zip(path, files, top=""):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_LZMA) as zf:
+        for name, data in files.items():
+            zf.writestr(top + name, data)
+    return path
+
+
+def read_tree(root):
+    """Return {"/"-separated relative path: bytes} for a folder, without the store links file."""
+    tree = {}
+    for folder, _, names in os.walk(root):
+        for name in names:
+            if name != STORE_LINKS_FILE:
+                with open(os.path.join(folder, name), "rb") as f:
+                    tree[os.path.relpath(os.path.join(folder, name), root).replace(os.sep, "/")] = f.read()
+    return tree
+
+
+def test_members_strips_a_shared_top_folder(tmp_path):
+    path = make_zip(str(tmp_path / "mod.zip"), dict(FILES, **{"instance_info.json": b"{}"}), top="Game v1.2/")
+    with zipfile.ZipFile(path) as zf:
+        assert sorted(rel.replace(os.sep, "/") for rel in members(zf)) == sorted(FILES)
+
+
+@pytest.mark.parametrize("name", ["../evil.dll", "/etc/evil", "C:/evil.dll", "Content/../../evil.dll"])
+def test_members_rejects_unsafe_paths(tmp_path, name):
+    path = make_zip(str(tmp_path / "bad.zip"), {"Game.exe": b"exe", name: b"evil"})
+    with zipfile.ZipFile(path) as zf, pytest.raises(ValueError, match="Unsafe path"):
+        members(zf)
+
+
+def test_pack_and_extract_round_trip(tmp_path, game):
+    folder = str(tmp_path / "version")
+    for name, data in FILES.items():
+        os.makedirs(os.path.dirname(os.path.join(folder, name)), exist_ok=True)
+        with open(os.path.join(folder, name), "wb") as f:
+            f.write(data)
+    archive = str(tmp_path / "version.zip")
+    files = pack_tree(folder, archive)
+    assert index_archive(archive) == files
+    dst = str(tmp_path / "out")
+    stats = extract_archive(archive, dst, files)
+    assert read_tree(dst) == FILES
+    assert stats["files"] == len(FILES)
+    assert len(read_links(dst)) == len(FILES) - 1
+    # Extracted files carry the manifest mtime, so verify's stat pass accepts them.
+    for rel, entry in files.items():
+        assert os.stat(os.path.join(dst, rel)).st_mtime_ns == entry["mtime"]
+
+
+def test_cancelled_extract_leaves_nothing(tmp_path):
+    archive = make_zip(str(tmp_path / "mod.zip"), FILES)
+    cancel = threading.Event()
+    cancel.set()
+    dst = str(tmp_path / "out")
+    with pytest.raises(CopyCancelled):
+        extract_archive(archive, dst, cancel_event=cancel)
+    assert not os.path.exists(dst)
+
+
+def test_instances_of_an_archived_version(tmp_path, game):
+    zip_file = make_zip(str(tmp_path / "download.zip"), FILES, top="Mod/")
+    files = import_version_archive(zip_file, "mod", game)
+    source = get_version_source("mod", game)
+    assert source == archive_path(game["VERSIONS_DIR"], "mod") and version_kind(source) == "archive"
+    assert len(files) == len(FILES)
+
+    first = create_instance("first", "mod", game)
+    second = create_instance("second", "mod", game)
+    for instance in (first, second):
+        tree = read_tree(instance)
+        assert {rel: tree[rel] for rel in FILES} == FILES
+    # The first instance added the files to the store, the second one is built from links.
+    stored = read_links(first)
+    assert "settings.ini" not in stored and len(stored) == len(FILES) - 1
+    assert read_links(second) == stored
+    assert os.path.samefile(os.path.join(first, "Game.exe"), os.path.join(second, "Game.exe"))
+
+
+def test_repair_from_an_archived_version(tmp_path, game):
+    import_version_archive(make_zip(str(tmp_path / "download.zip"), FILES), "mod", game)
+    instance = create_instance("inst", "mod", game)
+    os.remove(os.path.join(instance, "Game.exe"))
+    with open(os.path.join(instance, "settings.ini"), "wb") as f:
+        f.write(b"volume=9")
+    report = repair_instance(instance, game)
+    assert report["restored"] == 2
+    assert {rel: data for rel, data in read_tree(instance).items() if rel in FILES} == FILES
+
+
+def test_extract_files_replaces_only_the_given_files(tmp_path):
+    archive = make_zip(str(tmp_path / "mod.zip"), FILES)
+    dst = str(tmp_path / "out")
+    extract_archive(archive, dst)
+    with open(os.path.join(dst, "settings.ini"), "wb") as f:
+        f.write(b"volume=9")
+    os.remove(os.path.join(dst, "Game.exe"))
+    written = extract_files(archive, dst, ["Game.exe"])
+    assert written == len(FILES["Game.exe"])
+    assert read_tree(dst)["Game.exe"] == FILES["Game.exe"]
+    assert read_tree(dst)["settings.ini"] == b"volume=9"
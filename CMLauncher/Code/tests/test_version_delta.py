@@ -0,0 +1,196 @@
+import io
+import os
+import random
+import tracemalloc
+
+import pytest
+
+from manifest import update_manifest
+from version_delta import encode_file, decode_file, create_delta, read_index, check_baseline, delta_manifest, \
+    materialize_delta, materialize_files, BaselineMismatch, BLOCK_SIZE
+
+BASE = random.Random(20).randbytes(320 * 1024)
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def round_trip(tmp_path, base, target):
+    """Encode target against base, decode it again and return (literal bytes, patch size)."""
+    write(str(tmp_path / "base"), base)
+    write(str(tmp_path / "target"), target)
+    patch = io.BytesIO()
+    literal = encode_file(str(tmp_path / "base"), str(tmp_path / "target"), patch)
+    patch.seek(0)
+    decode_file(str(tmp_path / "base"), patch, str(tmp_path / "out"))
+    assert read(str(tmp_path / "out")) == target
+    return literal, len(patch.getvalue())
+
+
+@pytest.mark.parametrize("target, max_literal", [
+    (BASE, 0),
+    (BASE[:1000] + b"abc" + BASE[1000:], 3),
+    (BASE[:1000] + BASE[1003:], 0),
+    (BASE[:200_000] + BASE[250_000:], 0),
+    (BASE[:100_000], 0),
+    (BASE + b"tail", 4),
+    (b"head" + BASE, 4),
+    (BASE[:5000] + b"0123456789" + BASE[5010:], 64),
+    (BASE[:5000] + random.Random(1).randbytes(40_000) + BASE[5000:], 40_000),
+], ids=["same", "insert", "delete", "delete-block", "truncate", "append", "prepend", "replace", "insert-block"])
+def test_round_trip_stores_only_changes(tmp_path, target, max_literal):
+    literal, size = round_trip(tmp_path, BASE, target)
+    assert literal <= max_literal
+    assert size < max_literal + 200
+
+
+@pytest.mark.parametrize("base, target", [
+    (BASE, b""),
+    (b"", BASE[:10]),
+    (b"", b""),
+    (BASE[:10], BASE[:11]),
+    (b"x" * 100_000, b"x" * 150_001),
+    (BASE, random.Random(2).randbytes(len(BASE))),
+], ids=["to-empty", "from-empty", "both-empty", "tiny", "repetitive", "unrelated"])
+def test_round_trip_edge_cases(tmp_path, base, target):
+    round_trip(tmp_path, base, target)
+
+
+def test_literals_are_split_into_blocks(tmp_path):
+    target = random.Random(3).randbytes(3 * BLOCK_SIZE + 1)
+    patch_size = round_trip(tmp_path, b"", target)[1]
+    assert patch_size == len(target) + 4 * 5
+
+
+def test_encode_memory_is_bounded(tmp_path):
+    size = 8 * 1024 * 1024
+    write(str(tmp_path / "base"), random.Random(4).randbytes(size))
+    write(str(tmp_path / "target"), random.Random(5).randbytes(size))
+
+    class Discard(io.RawIOBase):
+        def write(self, data):
+            return len(data)
+
+    tracemalloc.start()
+    try:
+        literal = encode_file(str(tmp_path / "base"), str(tmp_path / "target"), Discard())
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert literal == size
+    assert peak < 4 * BLOCK_SIZE
+
+
+def test_decode_rejects_bad_patches(tmp_path):
+    write(str(tmp_path / "base"), b"abc")
+    with pytest.raises(ValueError):
+        decode_file(str(tmp_path / "base"), io.BytesIO(b"X"), str(tmp_path / "out"))
+    with pytest.raises(ValueError):
+        decode_file(str(tmp_path / "base"), io.BytesIO(b"L\x05\x00\x00\x00ab"), str(tmp_path / "out"))
+
+
+@pytest.fixture
+def steam_and_version(tmp_path):
+    """A fake Steam install and a modded copy of it, with their manifests."""
+    steam = str(tmp_path / "steam")
+    version = str(tmp_path / "version")
+    steam_files = {
+        "Game.exe": BASE,
+        os.path.join("Content", "same.xnb"): b"unchanged" * 1000,
+        os.path.join("Content", "removed.xnb"): b"gone" * 1000,
+        os.path.join("Content", "truncated.xnb"): BASE[:50_000],
+    }
+    version_files = {
+        "Game.exe": BASE[:1000] + b"patched" + BASE[1000:],
+        os.path.join("Content", "same.xnb"): b"unchanged" * 1000,
+        os.path.join("Content", "truncated.xnb"): BASE[:20_000],
+        os.path.join("Mods", "new.dll"): b"new file",
+    }
+    for rel, data in steam_files.items():
+        write(os.path.join(steam, rel), data)
+    for rel, data in version_files.items():
+        write(os.path.join(version, rel), data)
+    base_files = update_manifest(steam, str(tmp_path / "steam.manifest.json"))
+    files = update_manifest(version, str(tmp_path / "version.manifest.json"))
+    return steam, version, base_files, files, version_files
+
+
+def test_delta_materializes_the_version(tmp_path, steam_and_version):
+    steam, version, base_files, files, version_files = steam_and_version
+    delta = str(tmp_path / "mod.delta")
+    index = create_delta(version, steam, base_files, files, delta)
+    assert read_index(delta) == index
+    assert {rel: entry["op"] for rel, entry in index["files"].items()} == {
+        "Game.exe": "patch",
+        os.path.join("Content", "same.xnb"): "same",
+        os.path.join("Content", "truncated.xnb"): "patch",
+        os.path.join("Mods", "new.dll"): "new",
+    }
+    assert index["removed"] == [os.path.join("Content", "removed.xnb")]
+    # Files identical to Steam take the Steam manifest entry, which differs at most in mtime.
+    manifest = delta_manifest(index, base_files)
+    assert manifest.keys() == files.keys()
+    for rel, entry in files.items():
+        assert manifest[rel]["strong"] == entry["strong"]
+        assert manifest[rel]["size"] == entry["size"]
+
+    check_baseline(index, base_files)
+    dst = str(tmp_path / "built")
+    materialize_delta(delta, steam, dst, index)
+    built = {os.path.relpath(os.path.join(folder, name), dst): read(os.path.join(folder, name))
+             for folder, _, names in os.walk(dst) for name in names}
+    assert built == version_files
+    assert os.stat(os.path.join(dst, "Game.exe")).st_mtime_ns == files["Game.exe"]["mtime"]
+
+
+def test_materialize_files_restores_single_files(tmp_path, steam_and_version):
+    steam, version, base_files, files, version_files = steam_and_version
+    delta = str(tmp_path / "mod.delta")
+    index = create_delta(version, steam, base_files, files, delta)
+    dst = str(tmp_path / "built")
+    materialize_delta(delta, steam, dst, index)
+    write(os.path.join(dst, "Game.exe"), b"broken")
+    os.remove(os.path.join(dst, "Mods", "new.dll"))
+    materialize_files(delta, steam, dst, ["Game.exe", os.path.join("Mods", "new.dll")], index)
+    assert read(os.path.join(dst, "Game.exe")) == version_files["Game.exe"]
+    assert read(os.path.join(dst, "Mods", "new.dll")) == b"new file"
+
+
+def test_baseline_mismatch(tmp_path, steam_and_version):
+    steam, version, base_files, files, _ = steam_and_version
+    index = create_delta(version, steam, base_files, files, str(tmp_path / "mod.delta"))
+    write(os.path.join(steam, "Game.exe"), BASE[::-1])
+    changed = update_manifest(steam, str(tmp_path / "steam.manifest.json"))
+    with pytest.raises(BaselineMismatch, match="Game.exe"):
+        check_baseline(index, changed)
+    # Steam files the delta doesn't reference may change freely.
+    write(os.path.join(steam, "Game.exe"), BASE)
+    write(os.path.join(steam, "Content", "removed.xnb"), b"patched by Steam")
+    check_baseline(index, update_manifest(steam, str(tmp_path / "steam.manifest.json")))
+
+
+def test_private_files_are_stored_whole(tmp_path, steam_and_version):
+    steam, version, _, _, _ = steam_and_version
+    write(os.path.join(steam, "settings.ini"), b"volume=5")
+    write(os.path.join(version, "settings.ini"), b"volume=5")
+    base_files = update_manifest(steam, str(tmp_path / "steam.manifest.json"))
+    files = update_manifest(version, str(tmp_path / "version.manifest.json"))
+    delta = str(tmp_path / "mod.delta")
+    index = create_delta(version, steam, base_files, files, delta)
+    assert index["files"]["settings.ini"]["op"] == "new"
+    assert "settings.ini" not in index["baseline"]["files"]
+    # The Steam Version rewriting its settings leaves the delta usable.
+    write(os.path.join(steam, "settings.ini"), b"volume=9")
+    changed = update_manifest(steam, str(tmp_path / "steam.manifest.json"))
+    check_baseline(index, changed)
+    dst = str(tmp_path / "built")
+    materialize_delta(delta, steam, dst, index)
+    assert read(os.path.join(dst, "settings.ini")) == b"volume=5"
@@ -0,0 +1,48 @@
+import os
+import queue
+
+import pytest
+
+import watcher
+from watcher import DirectoryWatcher
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watch(request, tmp_path, monkeypatch):
+    """Start a watcher on tmp_path and return a function waiting for its next report."""
+    if request.param == "polling":
+        def no_inotify(*args):
+            raise OSError("no inotify")
+        monkeypatch.setattr(watcher, "_InotifyBackend", no_inotify)
+    monkeypatch.setattr(watcher, "POLL_SECONDS", 0.05)
+    reports = queue.Queue()
+    folder = str(tmp_path)
+    instance = DirectoryWatcher([folder], reports.put, debounce=0.05, file_suffixes=(".zip", ".delta"))
+    if request.param == "polling":
+        instance.backend.interval = 0.05
+    elif isinstance(instance.backend, watcher._PollingBackend):
+        pytest.skip("inotify is not available")
+    instance.start()
+    yield folder, lambda: reports.get(timeout=5)
+    instance.stop()
+    instance.thread.join(5)
+
+
+def test_reports_folders_and_version_files(watch):
+    folder, next_report = watch
+    os.makedirs(os.path.join(folder, "mod"))
+    assert next_report() == {folder: {"mod"}}
+    with open(os.path.join(folder, "old.zip"), "wb"):
+        pass
+    assert next_report() == {folder: {"old"}}
+    os.rename(os.path.join(folder, "old.zip"), os.path.join(folder, "new.delta"))
+    assert next_report() == {folder: {"old", "new"}}
+
+
+def test_ignores_other_files(watch):
+    folder, next_report = watch
+    for name in ("mod.manifest.json", "mod.delta.tmp", ".zip"):
+        with open(os.path.join(folder, name), "wb"):
+            pass
+    os.makedirs(os.path.join(folder, "mod"))
+    assert next_report() == {folder: {"mod"}}
@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+import time
+
+from file_store import remove_tree
+
+# Deleting a version or instance renames it into the game's trash folder (same volume, so it is
+# instant) next to a <entry>.json record of where it came from. Until UNDO_SECONDS have passed
+# the entry can be restored; after that the Reaper deletes it in the background (the command line,
+# which has no reaper, reclaims due entries with reap_due when it starts).
+# The reaper removes the record before the folder, so a folder in the trash without a record is
+# one whose reclamation was interrupted and is simply reaped again on the next start.
+# Entries are named by their deletion time in nanoseconds only (the original path is in the
+# record), so no instance or version name can be mistaken for a record or an extra file.
+
+UNDO_SECONDS = 30
+REAPER_NICENESS = 19
+REAPER_IDLE_SECONDS = 60
+
+RECORD_SUFFIX = ".json"
+EXTRA_SUFFIX = ".extra"
+
+_lock = threading.Lock()
+
+
+def _record_path(trash_dir, entry):
+    return os.path.join(trash_dir, entry + RECORD_SUFFIX)
+
+
+def _read_record(trash_dir, entry):
+    try:
+        with open(_record_path(trash_dir, entry), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def move_to_trash(folder, trash_dir, extra_files=(), meta=None):
+    """
+    Move folder (and any extra_files belonging to it, such as a version manifest) into trash_dir.
+    meta is stored with the entry and handed back by restore. Returns the entry id.
+    """
+    os.makedirs(trash_dir, exist_ok=True)
+    extras = [path for path in extra_files if os.path.exists(path)]
+    record = {"origin": folder, "deleted": time.time(), "extras": extras, "meta": meta or {}}
+    with _lock:
+        entry = time.time_ns()
+        while any(os.path.exists(path) for path in (os.path.join(trash_dir, str(entry)),
+                                                     _record_path(trash_dir, str(entry)))):
+            entry += 1
+        entry = str(entry)
+        with open(_record_path(trash_dir, entry), "w") as f:
+            json.dump(record, f)
+        try:
+            os.rename(folder, os.path.join(trash_dir, entry))
+        except OSError:
+            os.remove(_record_path(trash_dir, entry))
+            raise
+        for index, path in enumerate(extras):
+            os.replace(path, os.path.join(trash_dir, f"{entry}{EXTRA_SUFFIX}{index}"))
+    print(f"[INFO] Moved '{folder}' to the trash.")
+    return entry
+
+
+def restore(trash_dir, entry):
+    """
+    Put a trashed entry back where it came from and return its meta.
+    Raises FileNotFoundError if it has already been reclaimed and FileExistsError if the
+    original location has been taken in the meantime.
+    """
+    with _lock:
+        record = _read_record(trash_dir, entry)
+        if record is None:
+            raise FileNotFoundError("It has already been permanently deleted.")
+        if os.path.exists(record["origin"]):
+            raise FileExistsError(f"'{record['origin']}' already exists.")
+        os.rename(os.path.join(trash_dir, entry), record["origin"])
+        for index, path in enumerate(record["extras"]):
+            extra = os.path.join(trash_dir, f"{entry}{EXTRA_SUFFIX}{index}")
+            if os.path.exists(extra):
+                os.replace(extra, path)
+        os.remove(_record_path(trash_dir, entry))
+    print(f"[INFO] Restored '{record['origin']}' from the trash.")
+    return record["meta"]
+
+
+def _claim_due(trash_dir, undo_seconds):
+    """
+    Return (entries to reap now, seconds until the next entry is due). Claimed entries lose
+    their record, so restore can no longer race the reaper for them.
+    """
+    due = []
+    wait = None
+    now = time.time()
+    with _lock:
+        try:
+            names = os.listdir(trash_dir)
+        except FileNotFoundError:
+            return due, wait
+        # Checked against the records, so entries left by older launchers (named after what was
+        # deleted, e.g. "<ns>-a.json") are still told apart from records and extra files.
+        records = {name[:-len(RECORD_SUFFIX)] for name in names
+                   if name.endswith(RECORD_SUFFIX) and os.path.isfile(os.path.join(trash_dir, name))}
+        for name in names:
+            if name.endswith(RECORD_SUFFIX) and name[:-len(RECORD_SUFFIX)] in records:
+                # A record without its folder: the move into the trash never happened.
+                if name[:-len(RECORD_SUFFIX)] not in names:
+                    os.remove(os.path.join(trash_dir, name))
+                continue
+            if EXTRA_SUFFIX in name and name.rsplit(EXTRA_SUFFIX, 1)[0] in records:
+                continue
+            record = _read_record(trash_dir, name)
+            if record is not None:
+                remaining = record["deleted"] + undo_seconds - now
+                if remaining > 0:
+                    wait = remaining if wait is None else min(wait, remaining)
+                    continue
+                os.remove(_record_path(trash_dir, name))
+            due.append(name)
+    return due, wait
+
+
+def reap(trash_dir, entry):
+    """Permanently delete a claimed trash entry and its extra files."""
+    path = os.path.join(trash_dir, entry)
+    if os.path.isdir(path):
+        remove_tree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+    for name in os.listdir(trash_dir):
+        if name.startswith(entry + EXTRA_SUFFIX):
+            os.remove(os.path.join(trash_dir, name))
+    print(f"[INFO] Reclaimed '{entry}' from the trash.")
+
+
+def reap_due(trash_dir, undo_seconds=UNDO_SECONDS):
+    """Permanently delete every entry of trash_dir whose undo window is over, right away. Returns how many."""
+    due, _ = _claim_due(trash_dir, undo_seconds)
+    reaped = 0
+    for entry in due:
+        try:
+            reap(trash_dir, entry)
+            reaped += 1
+        except OSError as e:
+            print(f"[WARN] Could not reclaim '{entry}': {e}")
+    return reaped
+
+
+def purge(trash_dir, entry):
+    """Permanently delete a trash entry right away, skipping its undo window."""
+    with _lock:
+        if os.path.exists(_record_path(trash_dir, entry)):
+            os.remove(_record_path(trash_dir, entry))
+    reap(trash_dir, entry)
+
+
+class Reaper:
+    """
+    Background thread that permanently deletes trash entries once their undo window is over.
+    It runs at the lowest CPU priority (which the Linux I/O schedulers also use for its disk
+    priority), and entries left over by a previous session are reaped as soon as it starts.
+    """
+
+    def __init__(self, trash_dirs, undo_seconds=UNDO_SECONDS):
+        self.trash_dirs = list(trash_dirs)
+        self.undo_seconds = undo_seconds
+        self.wake = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped = True
+        self.wake.set()
+
+    def notify(self):
+        """Tell the reaper something was trashed so it can schedule it."""
+        self.wake.set()
+
+    def _lower_priority(self):
+        if hasattr(os, "setpriority"):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), REAPER_NICENESS)
+            except OSError:
+                pass
+
+    def _run(self):
+        self._lower_priority()
+        while not self.stopped:
+            self.wake.clear()
+            next_due = REAPER_IDLE_SECONDS
+            for trash_dir in self.trash_dirs:
+                try:
+                    due, wait = _claim_due(trash_dir, self.undo_seconds)
+                except Exception as e:
+                    # One unreadable entry must not stop reclaiming for the rest of the session.
+                    print(f"[WARN] Could not check the trash '{trash_dir}': {e}")
+                    continue
+                for entry in due:
+                    if self.stopped:
+                        return
+                    try:
+                        reap(trash_dir, entry)
+                    except OSError as e:
+                        print(f"[WARN] Could not reclaim '{entry}': {e}")
+                if wait is not None:
+                    next_due = min(next_due, wait)
+            self.wake.wait(next_due)
@@ -0,0 +1,267 @@
+import hashlib
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from config import COPY_MODE
+from copy_engine import scan_tree, CopyCancelled
+from file_store import blob_path, is_private, write_links, ingest_tree, remove_file, remove_tree
+from manifest import LAUNCHER_FILES, HASH_WORKERS, strong_hashes
+
+# Archived versions are a single LZMA zip, Versions/<version>.zip, instead of a folder.
+# The zip central directory is the index that lets single files be pulled out (repair, overlay),
+# and the usual version manifest (Versions/<version>.manifest.json) holds the hashes.
+# Every member's manifest mtime is the one stored in the zip, and extracted files get that mtime,
+# so the size/mtime fast path of verify and overlay keeps working for extracted instances.
+
+ARCHIVE_SUFFIX = ".zip"
+CHUNK_SIZE = 1024 * 1024
+EXTRACT_WORKERS = os.cpu_count() or 1
+
+
+def archive_path(versions_dir, version):
+    return os.path.join(versions_dir, version + ARCHIVE_SUFFIX)
+
+
+def list_archives(versions_dir):
+    """Return the names of the archived versions in versions_dir."""
+    if not os.path.exists(versions_dir):
+        return []
+    return [name[:-len(ARCHIVE_SUFFIX)] for name in os.listdir(versions_dir)
+            if name.endswith(ARCHIVE_SUFFIX) and os.path.isfile(os.path.join(versions_dir, name))]
+
+
+def _check_cancel(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise CopyCancelled("Archive operation cancelled.")
+
+
+def _member_mtime(info):
+    """Member mtime in ns, at the 2 second resolution zip stores."""
+    date_time = info.date_time[:5] + (info.date_time[5] // 2 * 2,)
+    return int(time.mktime(date_time + (0, 0, -1))) * 1_000_000_000
+
+
+def members(zf):
+    """
+    Return {relative path: ZipInfo} for the files of an archive.
+    A single top-level folder shared by every member (how most zips of a game are made) is
+    stripped. Unsafe paths (absolute, "..") are rejected.
+    """
+    infos = [info for info in zf.infolist() if not info.is_dir()]
+    names = [info.filename.replace("\\", "/") for info in infos]
+    prefix = ""
+    tops = {name.split("/", 1)[0] for name in names}
+    if len(tops) == 1 and all("/" in name for name in names):
+        prefix = tops.pop() + "/"
+    result = {}
+    for info, name in zip(infos, names):
+        name = name[len(prefix):]
+        parts = name.split("/")
+        if name.startswith("/") or ".." in parts or ":" in parts[0]:
+            raise ValueError(f"Unsafe path in archive: {info.filename}")
+        rel = os.path.join(*parts)
+        if rel not in LAUNCHER_FILES:
+            result[rel] = info
+    return result
+
+
+def pack_tree(folder, archive, progress=None, cancel_event=None):
+    """
+    Compress folder into a new LZMA zip at archive, hashing each file as it is read.
+    Returns the manifest files dict of the archive.
+    """
+    _, files = scan_tree(folder)
+    files = sorted((rel, size) for rel, size in files if rel not in LAUNCHER_FILES)
+    total = sum(size for _, size in files)
+    done = 0
+    manifest = {}
+    tmp = archive + ".tmp"
+    start = time.perf_counter()
+    try:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_LZMA) as zf:
+            for rel, size in files:
+                _check_cancel(cancel_event)
+                path = os.path.join(folder, rel)
+                info = zipfile.ZipInfo.from_file(path, arcname=rel.replace(os.sep, "/"))
+                info.compress_type = zipfile.ZIP_LZMA
+                strong = hashlib.sha256()
+                with open(path, "rb") as src, zf.open(info, "w") as dst:
+                    while True:
+                        chunk = src.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        strong.update(chunk)
+                        dst.write(chunk)
+                        done += len(chunk)
+                        if progress:
+                            progress(done, total)
+                manifest[rel] = {"size": size, "mtime": _member_mtime(info), "strong": strong.hexdigest()}
+        os.replace(tmp, archive)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    packed = os.path.getsize(archive)
+    print(f"[INFO] Packed {len(files)} files ({total} bytes) into '{archive}' ({packed} bytes) "
+          f"in {time.perf_counter() - start:.2f}s")
+    return manifest
+
+
+class _Readers:
+    """One ZipFile per worker thread, so members decompress in parallel without sharing a handle."""
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.local = threading.local()
+        self.opened = []
+        self.lock = threading.Lock()
+
+    def get(self):
+        zf = getattr(self.local, "zf", None)
+        if zf is None:
+            zf = self.local.zf = zipfile.ZipFile(self.archive)
+            with self.lock:
+                self.opened.append(zf)
+        return zf
+
+    def close(self):
+        for zf in self.opened:
+            zf.close()
+
+
+def index_archive(archive, progress=None, cancel_event=None, workers=HASH_WORKERS):
+    """Hash every member of an archive (streaming, in parallel) and return its manifest files dict."""
+    with zipfile.ZipFile(archive) as zf:
+        infos = members(zf)
+    total = sum(info.file_size for info in infos.values())
+    readers = _Readers(archive)
+
+    def work(item):
+        _check_cancel(cancel_event)
+        rel, info = item
+        strong = hashlib.sha256()
+        with readers.get().open(info.filename) as src:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                strong.update(chunk)
+        return rel, {"size": info.file_size, "mtime": _member_mtime(info), "strong": strong.hexdigest()}
+
+    files = {}
+    done = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for rel, entry in pool.map(work, infos.items()):
+                files[rel] = entry
+                done += entry["size"]
+                if progress:
+                    progress(done, total)
+    finally:
+        readers.close()
+    return files
+
+
+def _extract_member(zf, info, path, mtime):
+    with zf.open(info.filename) as src, open(path, "wb") as dst:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            dst.write(chunk)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def extract_archive(archive, dst, files=None, progress=None, cancel_event=None, workers=EXTRACT_WORKERS):
+    """
+    Build the new folder dst from an archive, decompressing members in parallel.
+    files is the archive's manifest: members whose content is already in the file store are
+    hardlinked instead of decompressed, and the rest are added to the store afterwards, so the
+    next instance of the same version is built from links alone.
+    Returns copy_tree style stats with an extra "linked" count.
+    """
+    if os.path.exists(dst):
+        raise FileExistsError(f"Destination already exists: {dst}")
+    files = files or {}
+    use_store = COPY_MODE == "store" and bool(files)
+    start = time.perf_counter()
+    with zipfile.ZipFile(archive) as zf:
+        infos = members(zf)
+    total = sum(info.file_size for info in infos.values())
+    readers = _Readers(archive)
+    done = 0
+    linked = {}
+
+    def work(item):
+        _check_cancel(cancel_event)
+        rel, info = item
+        path = os.path.join(dst, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = files.get(rel)
+        digest = None
+        if use_store and entry and not is_private(rel) and os.path.exists(blob_path(entry["strong"])):
+            try:
+                os.link(blob_path(entry["strong"]), path)
+                digest = entry["strong"]
+            except OSError:
+                pass
+        if digest is None:
+            _extract_member(readers.get(), info, path, entry["mtime"] if entry else _member_mtime(info))
+        return rel, digest, info.file_size
+
+    os.makedirs(dst)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for rel, digest, size in pool.map(work, infos.items()):
+                if digest:
+                    linked[rel] = digest
+                done += size
+                if progress:
+                    progress(done, total)
+        write_links(dst, linked)
+        if use_store:
+            try:
+                ingest_tree(dst, cancel_event, strong_hashes(files))
+            except OSError as e:
+                print(f"[WARN] File store unavailable for '{dst}' ({e}), keeping private copies.")
+    except BaseException:
+        remove_tree(dst)
+        raise
+    finally:
+        readers.close()
+
+    seconds = time.perf_counter() - start
+    print(f"[INFO] Extracted {len(infos) - len(linked)} and linked {len(linked)} files from '{archive}' "
+          f"in {seconds:.2f}s")
+    return {
+        "files": len(infos),
+        "linked": len(linked),
+        "bytes": total,
+        "seconds": seconds,
+        "throughput": total / seconds if seconds > 0 else 0.0,
+        "strategy": "archive",
+    }
+
+
+def extract_files(archive, dst, rels, files=None, cancel_event=None):
+    """
+    Extract only rels from an archive into the existing folder dst, replacing what is there
+    (dropping store links first). Returns the number of bytes written.
+    """
+    files = files or {}
+    written = 0
+    with zipfile.ZipFile(archive) as zf:
+        infos = members(zf)
+        for rel in rels:
+            _check_cancel(cancel_event)
+            info = infos[rel]
+            remove_file(dst, rel)
+            path = os.path.join(dst, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            entry = files.get(rel)
+            _extract_member(zf, info, path, entry["mtime"] if entry else _member_mtime(info))
+            written += info.file_size
+    return written
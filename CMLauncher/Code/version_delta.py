@@ -0,0 +1,340 @@
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import time
+import zipfile
+
+from copy_engine import copy_tree, CopyCancelled
+from file_store import remove_file, remove_tree, is_private
+from manifest import LAUNCHER_FILES
+
+# Delta versions are stored as Versions/<version>.delta: a zip holding, for every file that differs
+# from the Steam Version, either a binary patch against the Steam file of the same path or the
+# whole file when Steam has no such file. Files identical to Steam are not stored at all.
+# delta.json inside the zip is the index: the fingerprint of the Steam files the delta was made
+# against, what happens to each file ("same", "patch", "new") and the files Steam has but the
+# version removed. A delta can only be applied while the Steam files it references are unchanged.
+# Files the game rewrites while it runs (is_private in file_store.py) are always stored whole, so
+# a settings file or log written by the Steam Version does not invalidate the delta.
+#
+# Patch format: a sequence of ops, each at most BLOCK_SIZE bytes of output, so encoding and
+# decoding stream with bounded memory:
+#   b"C" + <offset: u64> + <length: u32>   copy length bytes of the Steam file from offset
+#   b"L" + <length: u32> + data            literal bytes
+
+DELTA_SUFFIX = ".delta"
+INDEX_NAME = "delta.json"
+DELTA_FORMAT = 1
+BLOCK_SIZE = 64 * 1024
+# Encoding: matches are found at byte granularity and compared MATCH_SIZE bytes at a time.
+# After a mismatch, PROBE_SIZE bytes are searched for up to SEARCH_WINDOW bytes away to realign
+# the files; data that moved further than that is stored as literal bytes.
+PROBE_SIZE = 64
+MATCH_SIZE = 4096
+SEARCH_WINDOW = 64 * 1024
+
+_COPY = struct.Struct("<QI")
+_LITERAL = struct.Struct("<I")
+
+
+class BaselineMismatch(RuntimeError):
+    """Raised when the Steam files a delta was made against have changed."""
+
+
+def delta_path(versions_dir, version):
+    return os.path.join(versions_dir, version + DELTA_SUFFIX)
+
+
+def list_deltas(versions_dir):
+    """Return the names of the delta versions in versions_dir."""
+    if not os.path.exists(versions_dir):
+        return []
+    return [name[:-len(DELTA_SUFFIX)] for name in os.listdir(versions_dir)
+            if name.endswith(DELTA_SUFFIX) and os.path.isfile(os.path.join(versions_dir, name))]
+
+
+def _check_cancel(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise CopyCancelled("Delta operation cancelled.")
+
+
+def _member(rel):
+    return "files/" + rel.replace(os.sep, "/")
+
+
+def fingerprint(base_files):
+    """Fingerprint of the Steam files a delta depends on ({relative path: sha256})."""
+    h = hashlib.sha256()
+    for rel in sorted(base_files):
+        h.update(f"{rel}\0{base_files[rel]}\n".encode())
+    return h.hexdigest()
+
+
+@contextlib.contextmanager
+def _mapped(path):
+    """The contents of a file as a read-only buffer, without reading it into memory."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def _match_length(base, b, target, t):
+    """Length of the common prefix of base[b:] and target[t:]."""
+    length = 0
+    limit = min(len(base) - b, len(target) - t)
+    while length < limit:
+        size = min(MATCH_SIZE, limit - length)
+        if base[b + length:b + length + size] == target[t + length:t + length + size]:
+            length += size
+            continue
+        # Binary search for the first differing byte of this chunk.
+        low, high = 0, size
+        while low < high:
+            mid = (low + high + 1) // 2
+            if base[b + length:b + length + mid] == target[t + length:t + length + mid]:
+                low = mid
+            else:
+                high = mid - 1
+        return length + low
+    return length
+
+
+class _PatchWriter:
+    """Writes patch ops, merging adjacent copies and splitting literals into BLOCK_SIZE ops."""
+
+    def __init__(self, out):
+        self.out = out
+        self.pending = None
+        self.literal_bytes = 0
+
+    def copy(self, offset, length):
+        if self.pending and self.pending[0] + self.pending[1] == offset and self.pending[1] + length <= 0xFFFFFFFF:
+            self.pending = (self.pending[0], self.pending[1] + length)
+            return
+        self.flush()
+        self.pending = (offset, length)
+
+    def literal(self, data, start, end):
+        """Write data[start:end] as literals, slicing (and so copying) one block at a time."""
+        self.flush()
+        for offset in range(start, end, BLOCK_SIZE):
+            chunk = data[offset:min(end, offset + BLOCK_SIZE)]
+            self.out.write(b"L" + _LITERAL.pack(len(chunk)) + chunk)
+        self.literal_bytes += max(0, end - start)
+
+    def flush(self):
+        if self.pending:
+            self.out.write(b"C" + _COPY.pack(*self.pending))
+            self.pending = None
+
+
+def encode_file(base_path, target_path, out):
+    """
+    Write a patch turning base_path into target_path to the binary stream out.
+    The target is walked alongside the base: matching runs become copies, and after a mismatch
+    the two are realigned by searching SEARCH_WINDOW bytes either way, so inserted, deleted or
+    replaced bytes cost only themselves. Returns the number of literal bytes.
+    """
+    writer = _PatchWriter(out)
+    with _mapped(base_path) as base, _mapped(target_path) as target:
+        t = b = literal_start = 0
+        while t < len(target):
+            length = _match_length(base, b, target, t) if b < len(base) else 0
+            if length >= PROBE_SIZE or (length and t + length == len(target)):
+                writer.literal(target, literal_start, t)
+                writer.copy(b, length)
+                t += length
+                b += length
+                literal_start = t
+                continue
+            if t + PROBE_SIZE > len(target):
+                break
+            # Bytes deleted from the base: the target continues further on in the base.
+            probe = target[t:t + PROBE_SIZE]
+            found = base.find(probe, max(0, b - SEARCH_WINDOW), min(len(base), b + SEARCH_WINDOW))
+            if found >= 0:
+                b = found
+                continue
+            # Bytes inserted into the target: the base continues further on in the target.
+            if b + PROBE_SIZE <= len(base):
+                found = target.find(base[b:b + PROBE_SIZE], t + 1, min(len(target), t + SEARCH_WINDOW))
+                if found >= 0:
+                    t = found
+                    continue
+            # Replaced bytes: skip ahead in both as literal data, a probe at a time while the files
+            # line up again right after it.
+            step = MATCH_SIZE
+            if _match_length(base, b + PROBE_SIZE, target, t + PROBE_SIZE) >= PROBE_SIZE:
+                step = PROBE_SIZE
+            t += step
+            b += step
+        writer.literal(target, literal_start, len(target))
+        writer.flush()
+    return writer.literal_bytes
+
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated patch.")
+    return data
+
+
+def decode_file(base_path, patch, dst_path):
+    """Apply the patch stream to base_path, writing the result to dst_path."""
+    with open(base_path, "rb") as base, open(dst_path, "wb") as out:
+        while True:
+            op = patch.read(1)
+            if not op:
+                break
+            if op == b"C":
+                offset, length = _COPY.unpack(_read_exact(patch, _COPY.size))
+                base.seek(offset)
+                while length > 0:
+                    chunk = base.read(min(BLOCK_SIZE, length))
+                    if not chunk:
+                        raise ValueError("Patch reads past the end of the Steam file.")
+                    out.write(chunk)
+                    length -= len(chunk)
+            elif op == b"L":
+                (length,) = _LITERAL.unpack(_read_exact(patch, _LITERAL.size))
+                out.write(_read_exact(patch, length))
+            else:
+                raise ValueError(f"Bad patch op {op!r}.")
+
+
+def create_delta(folder, install, base_files, files, delta_file, progress=None, cancel_event=None):
+    """
+    Store the version folder as a delta against the Steam install.
+    base_files and files are the manifests of install and folder. Only files that differ from
+    Steam are read and written. Returns the index.
+    """
+    entries = {}
+    changed = []
+    for rel, entry in files.items():
+        base = base_files.get(rel)
+        if is_private(rel):
+            changed.append(rel)
+        elif base and base["strong"] == entry["strong"]:
+            entries[rel] = {"op": "same"}
+        else:
+            changed.append(rel)
+    removed = sorted(rel for rel in base_files if rel not in files)
+    total = sum(files[rel]["size"] for rel in changed)
+    done = 0
+    tmp = delta_file + ".tmp"
+    start = time.perf_counter()
+    try:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_LZMA) as zf:
+            for rel in sorted(changed):
+                _check_cancel(cancel_event)
+                entry = files[rel]
+                path = os.path.join(folder, rel)
+                base = None if is_private(rel) else base_files.get(rel)
+                with zf.open(_member(rel), "w", force_zip64=True) as out:
+                    if base:
+                        encode_file(os.path.join(install, rel), path, out)
+                    else:
+                        with open(path, "rb") as src:
+                            shutil.copyfileobj(src, out, BLOCK_SIZE)
+                entries[rel] = {"op": "patch" if base else "new", "size": entry["size"],
+                                "mtime": entry["mtime"], "strong": entry["strong"]}
+                done += entry["size"]
+                if progress:
+                    progress(done, total)
+            referenced = {rel: base_files[rel]["strong"] for rel, entry in entries.items()
+                          if entry["op"] != "new"}
+            index = {"format": DELTA_FORMAT, "baseline": {"fingerprint": fingerprint(referenced), "files": referenced},
+                     "files": entries, "removed": removed}
+            zf.writestr(INDEX_NAME, json.dumps(index))
+        os.replace(tmp, delta_file)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    print(f"[INFO] Stored {len(changed)} changed of {len(files)} files as a delta ({os.path.getsize(delta_file)} "
+          f"bytes) in {time.perf_counter() - start:.2f}s")
+    return index
+
+
+def read_index(delta_file):
+    with zipfile.ZipFile(delta_file) as zf:
+        return json.loads(zf.read(INDEX_NAME))
+
+
+def check_baseline(index, base_files):
+    """Raise BaselineMismatch unless every Steam file the delta references is unchanged."""
+    expected = index["baseline"]["files"]
+    current = {rel: base_files[rel]["strong"] for rel in expected if rel in base_files}
+    if fingerprint(current) != index["baseline"]["fingerprint"]:
+        changed = sorted(rel for rel in expected if current.get(rel) != expected[rel])
+        raise BaselineMismatch(f"The Steam Version changed since this delta was made ({len(changed)} files differ, "
+                               f"e.g. {changed[0]}). Restore the Steam files it was made against.")
+
+
+def delta_manifest(index, base_files):
+    """Return the manifest files dict of the version a delta describes."""
+    files = {}
+    for rel, entry in index["files"].items():
+        if entry["op"] == "same":
+            files[rel] = base_files[rel]
+        else:
+            files[rel] = {key: entry[key] for key in ("size", "mtime", "strong")}
+    return files
+
+
+def materialize_files(delta_file, install, dst, rels, index, cancel_event=None):
+    """
+    Write the version's copy of each of rels into the existing folder dst, replacing what is
+    there (dropping store links first). Returns the number of bytes written.
+    """
+    written = 0
+    with zipfile.ZipFile(delta_file) as zf:
+        for rel in rels:
+            _check_cancel(cancel_event)
+            entry = index["files"][rel]
+            remove_file(dst, rel)
+            path = os.path.join(dst, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if entry["op"] == "same":
+                shutil.copy2(os.path.join(install, rel), path)
+            else:
+                with zf.open(_member(rel)) as src:
+                    if entry["op"] == "patch":
+                        decode_file(os.path.join(install, rel), src, path)
+                    else:
+                        with open(path, "wb") as out:
+                            shutil.copyfileobj(src, out, BLOCK_SIZE)
+                os.utime(path, ns=(entry["mtime"], entry["mtime"]))
+            written += os.path.getsize(path)
+    return written
+
+
+def materialize_delta(delta_file, install, dst, index, progress=None, cancel_event=None):
+    """
+    Build the new folder dst from the Steam install plus a delta: the install is copied with
+    copy_tree, then removed files are dropped and changed files decoded.
+    Returns copy_tree's stats.
+    """
+    stats = copy_tree(install, dst, progress=progress, cancel_event=cancel_event)
+    try:
+        for name in LAUNCHER_FILES:
+            if os.path.exists(os.path.join(dst, name)):
+                os.remove(os.path.join(dst, name))
+        for rel in index["removed"]:
+            if os.path.exists(os.path.join(dst, rel)):
+                os.remove(os.path.join(dst, rel))
+        changed = [rel for rel, entry in index["files"].items() if entry["op"] != "same"]
+        materialize_files(delta_file, install, dst, changed, index, cancel_event=cancel_event)
+    except BaseException:
+        remove_tree(dst)
+        raise
+    stats["strategy"] += "+delta"
+    return stats
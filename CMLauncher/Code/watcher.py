@@ -0,0 +1,173 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+
+# Watches folders (a game's Instances and Versions) for sub-folders being added, removed or
+# renamed, e.g. from Explorer through "Open Folder". Files ending in one of file_suffixes are
+# watched too (versions stored as .zip archives or .delta files) and reported without the suffix.
+# Linux uses inotify; elsewhere the folders' mtimes are polled and only re-listed when they
+# change. Bursts of events are debounced and delivered as callback({folder: set of changed
+# names}). None instead of a set means the watcher lost track (event overflow, folder replaced)
+# and the whole folder should be rescanned.
+
+DEBOUNCE_SECONDS = 0.5
+POLL_SECONDS = 2.0
+
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT = struct.Struct("iIII")
+
+
+def _watched_name(name, is_dir, file_suffixes):
+    """The name to report for a folder entry, or None if it isn't watched."""
+    if is_dir:
+        return name
+    for suffix in file_suffixes:
+        if name.endswith(suffix) and len(name) > len(suffix):
+            return name[:-len(suffix)]
+    return None
+
+
+class _InotifyBackend:
+    def __init__(self, folders, file_suffixes=()):
+        self.file_suffixes = tuple(file_suffixes)
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.folders = {}
+        for folder in folders:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {folder}")
+            self.folders[wd] = folder
+
+    def wait(self, timeout):
+        """Block for up to timeout seconds and return [(folder, names or None)]."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        changes = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changes.extend((folder, None) for folder in self.folders.values())
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                if wd in self.folders:
+                    changes.append((self.folders[wd], None))
+            elif wd in self.folders:
+                name = _watched_name(name, mask & IN_ISDIR, self.file_suffixes)
+                if name is not None:
+                    changes.append((self.folders[wd], {name}))
+        return changes
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingBackend:
+    def __init__(self, folders, stop_event, interval=POLL_SECONDS, file_suffixes=()):
+        self.file_suffixes = tuple(file_suffixes)
+        self.stop_event = stop_event
+        self.interval = interval
+        self.state = {folder: self._snapshot(folder) for folder in folders}
+
+    @staticmethod
+    def _mtime(folder):
+        try:
+            return os.stat(folder).st_mtime_ns
+        except OSError:
+            return None
+
+    def _snapshot(self, folder):
+        mtime = self._mtime(folder)
+        if mtime is None:
+            return None, set()
+        with os.scandir(folder) as it:
+            names = (_watched_name(entry.name, entry.is_dir(), self.file_suffixes) for entry in it)
+            return mtime, {name for name in names if name is not None}
+
+    def wait(self, timeout):
+        self.stop_event.wait(min(timeout, self.interval))
+        changes = []
+        for folder, (mtime, names) in self.state.items():
+            if self._mtime(folder) == mtime:
+                continue
+            self.state[folder] = self._snapshot(folder)
+            changed = names ^ self.state[folder][1]
+            if changed:
+                changes.append((folder, changed))
+        return changes
+
+    def close(self):
+        pass
+
+
+class DirectoryWatcher:
+    """
+    Calls callback with the debounced sub-folder changes of folders, on a background thread.
+    Files named <name><suffix> for a suffix in file_suffixes are reported as <name>.
+    """
+
+    def __init__(self, folders, callback, debounce=DEBOUNCE_SECONDS, file_suffixes=()):
+        self.folders = list(folders)
+        self.callback = callback
+        self.debounce = debounce
+        self.stop_event = threading.Event()
+        try:
+            self.backend = _InotifyBackend(self.folders, file_suffixes)
+        except (OSError, AttributeError):
+            # No inotify (Windows, macOS) or no watches left: fall back to polling.
+            self.backend = _PollingBackend(self.folders, self.stop_event, file_suffixes=file_suffixes)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        pending = {}
+        deadline = None
+        try:
+            while not self.stop_event.is_set():
+                timeout = POLL_SECONDS if deadline is None else max(0.0, deadline - time.monotonic())
+                for folder, names in self.backend.wait(timeout):
+                    if names is None or pending.get(folder, set()) is None:
+                        pending[folder] = None
+                    else:
+                        pending.setdefault(folder, set()).update(names)
+                    deadline = time.monotonic() + self.debounce
+                if deadline is not None and time.monotonic() >= deadline:
+                    changes, pending, deadline = pending, {}, None
+                    try:
+                        self.callback(changes)
+                    except Exception as e:
+                        print(f"[ERROR] Folder watcher callback failed: {e}")
+        finally:
+            self.backend.close()